@@ -1,4 +1,7 @@
 import logging
+import os
+import tempfile
+from pathlib import Path
 
 from django.apps import AppConfig
 from django.conf import settings
@@ -44,7 +47,18 @@ class DjangoBlockNoteConfig(AppConfig):
         self._configure_blocknote_settings()
         self._configure_image_removal()
         self._configure_image_upload()
+        self._configure_render_cache()
         self._configure_slash_menu()
+        self._configure_viewer_theme()
+
+        import django_blocknote.checks  # noqa: F401
+        from django_blocknote.image.components import load_components
+        from django_blocknote.themes import load_theme_resolvers
+
+        # Resolve the storage, formatter, URL handler and theme resolvers once
+        # per process
+        load_components()
+        load_theme_resolvers()
 
     def _configure_slash_menu(self):
         """
@@ -254,6 +268,65 @@ class DjangoBlockNoteConfig(AppConfig):
             settings.DJ_BN_IMAGE_FORMATTER = (
                 "django_blocknote.image.convert_image_to_webp"
             )
+        # "adaptive", "legacy" or a dotted path to a policy callable.
+        if not hasattr(settings, "DJ_BN_IMAGE_ENCODER_POLICY"):
+            settings.DJ_BN_IMAGE_ENCODER_POLICY = "adaptive"
+
+        if not hasattr(settings, "DJ_BN_IMAGE_ENCODER_PRESET"):
+            settings.DJ_BN_IMAGE_ENCODER_PRESET = "balanced"  # fast, balanced, small
+
+        if not hasattr(settings, "DJ_BN_IMAGE_QUALITY"):
+            settings.DJ_BN_IMAGE_QUALITY = 80  # Lossy photos and animations
+
+        if not hasattr(settings, "DJ_BN_IMAGE_NEAR_LOSSLESS_QUALITY"):
+            settings.DJ_BN_IMAGE_NEAR_LOSSLESS_QUALITY = 90  # Images with alpha
+
+        # Images with at most this many colours are encoded losslessly.
+        if not hasattr(settings, "DJ_BN_SCREENSHOT_MAX_COLORS"):
+            settings.DJ_BN_SCREENSHOT_MAX_COLORS = 4096
+
+        # Also try the other of lossless/near-lossless and keep the smaller.
+        if not hasattr(settings, "DJ_BN_IMAGE_ENCODER_CANDIDATES"):
+            settings.DJ_BN_IMAGE_ENCODER_CANDIDATES: bool = False  # type: ignore[attr-defined]
+
+        if not hasattr(settings, "DJ_BN_IMAGE_ENCODER_TIME_BUDGET"):
+            settings.DJ_BN_IMAGE_ENCODER_TIME_BUDGET = 1.0  # Seconds
+
+        # Metadata is stripped from converted images, True keeps colour profiles.
+        if not hasattr(settings, "DJ_BN_IMAGE_KEEP_ICC_PROFILE"):
+            settings.DJ_BN_IMAGE_KEEP_ICC_PROFILE: bool = False  # type: ignore[attr-defined]
+
+        # A tiny data URI version of each image, returned by the upload view.
+        if not hasattr(settings, "DJ_BN_IMAGE_PLACEHOLDER"):
+            settings.DJ_BN_IMAGE_PLACEHOLDER: bool = True  # type: ignore[attr-defined]
+
+        if not hasattr(settings, "DJ_BN_IMAGE_PLACEHOLDER_SIZE"):
+            settings.DJ_BN_IMAGE_PLACEHOLDER_SIZE = 16  # Pixels, longest side
+
+        # Extra formats stored next to each image, e.g. ["avif"]. The best
+        # one the browser accepts is served by the serve_image view.
+        if not hasattr(settings, "DJ_BN_IMAGE_VARIANTS"):
+            settings.DJ_BN_IMAGE_VARIANTS: list[str] = []  # type: ignore[attr-defined]
+
+        # True: create variants on first request instead of on upload.
+        if not hasattr(settings, "DJ_BN_IMAGE_VARIANTS_LAZY"):
+            settings.DJ_BN_IMAGE_VARIANTS_LAZY: bool = False  # type: ignore[attr-defined]
+
+        if not hasattr(settings, "DJ_BN_IMAGE_AVIF_QUALITY"):
+            settings.DJ_BN_IMAGE_AVIF_QUALITY = 60
+
+        # True: uploads return the serve_image URL instead of the storage URL.
+        if not hasattr(settings, "DJ_BN_IMAGE_NEGOTIATE_URLS"):
+            settings.DJ_BN_IMAGE_NEGOTIATE_URLS: bool = False  # type: ignore[attr-defined]
+
+        # How long (seconds) browsers may cache the serve_image redirect.
+        if not hasattr(settings, "DJ_BN_IMAGE_SERVE_MAX_AGE"):
+            settings.DJ_BN_IMAGE_SERVE_MAX_AGE = 60 * 60  # 1 hour
+
+        # Converted images are spooled to disk beyond this size (bytes).
+        if not hasattr(settings, "DJ_BN_IMAGE_SPOOL_MAX_SIZE"):
+            settings.DJ_BN_IMAGE_SPOOL_MAX_SIZE = 1024 * 1024  # 1MB
+
         if not hasattr(settings, "DJ_BN_IMAGE_STORAGE"):
             settings.DJ_BN_IMAGE_STORAGE = ""
 
@@ -269,7 +342,93 @@ class DjangoBlockNoteConfig(AppConfig):
         if not hasattr(settings, "DJ_BN_MAX_FILE_SIZE"):
             settings.DJ_BN_MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
-        # TODO: Probably delete and use uploadUrl
+        # Checked from the image headers, before any pixel data is decoded.
+        if not hasattr(settings, "DJ_BN_MAX_PIXELS"):
+            settings.DJ_BN_MAX_PIXELS = 40_000_000  # Per frame, e.g. 8000x5000
+
+        if not hasattr(settings, "DJ_BN_MAX_FRAMES"):
+            settings.DJ_BN_MAX_FRAMES = 500  # Animated GIF/WebP frames
+
+        # Larger animations are converted to a still of their first frame.
+        if not hasattr(settings, "DJ_BN_ANIMATION_MAX_FRAMES"):
+            settings.DJ_BN_ANIMATION_MAX_FRAMES = 200
+
+        if not hasattr(settings, "DJ_BN_ANIMATION_MAX_PIXELS"):
+            settings.DJ_BN_ANIMATION_MAX_PIXELS = 50_000_000  # Summed over frames
+
+        # Batch uploads: files per request and threads processing them.
+        if not hasattr(settings, "DJ_BN_BATCH_UPLOAD_MAX_FILES"):
+            settings.DJ_BN_BATCH_UPLOAD_MAX_FILES = 20
+
+        if not hasattr(settings, "DJ_BN_BATCH_UPLOAD_WORKERS"):
+            settings.DJ_BN_BATCH_UPLOAD_WORKERS = 4
+
+        # Collect upload stage timings for the Prometheus metrics view
+        if not hasattr(settings, "DJ_BN_UPLOAD_METRICS"):
+            settings.DJ_BN_UPLOAD_METRICS = False
+
+        # Read by staff, or scrapers sending "Authorization: Bearer <token>"
+        if not hasattr(settings, "DJ_BN_UPLOAD_METRICS_TOKEN"):
+            settings.DJ_BN_UPLOAD_METRICS_TOKEN = ""
+
+        # Admission control, images processed at once in each process and
+        # how long further uploads queue before being rejected with a 503
+        if not hasattr(settings, "DJ_BN_UPLOAD_MAX_CONCURRENT"):
+            settings.DJ_BN_UPLOAD_MAX_CONCURRENT = os.cpu_count() or 1
+
+        if not hasattr(settings, "DJ_BN_UPLOAD_QUEUE_TIMEOUT"):
+            settings.DJ_BN_UPLOAD_QUEUE_TIMEOUT = 10  # seconds
+
+        # Uploads a minute per user, refilling a bucket of DJ_BN_UPLOAD_BURST.
+        # None disables the rate limit. Behind a reverse proxy, set
+        # DJ_BN_UPLOAD_CLIENT_KEY too, or all anonymous uploads share one bucket.
+        if not hasattr(settings, "DJ_BN_UPLOAD_RATE"):
+            settings.DJ_BN_UPLOAD_RATE = None
+
+        # Dotted path of a callable taking the request and returning the key
+        # anonymous uploads are rate limited by, REMOTE_ADDR by default.
+        if not hasattr(settings, "DJ_BN_UPLOAD_CLIENT_KEY"):
+            settings.DJ_BN_UPLOAD_CLIENT_KEY = ""
+
+        if not hasattr(settings, "DJ_BN_UPLOAD_BURST"):
+            settings.DJ_BN_UPLOAD_BURST = 20
+
+        # Threads for image processing in the async views, bounds the CPU and
+        # memory used by concurrent uploads in each process
+        if not hasattr(settings, "DJ_BN_ASYNC_UPLOAD_WORKERS"):
+            settings.DJ_BN_ASYNC_UPLOAD_WORKERS = 4
+
+        # Resumable chunked uploads, the directory must be shared by all
+        # processes serving uploads.
+        if not hasattr(settings, "DJ_BN_CHUNKED_UPLOAD_DIR"):
+            settings.DJ_BN_CHUNKED_UPLOAD_DIR = str(
+                Path(tempfile.gettempdir()) / "django_blocknote_chunks",
+            )
+
+        if not hasattr(settings, "DJ_BN_CHUNKED_UPLOAD_CHUNK_SIZE"):
+            settings.DJ_BN_CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+        # Unfinished chunked uploads are removed after this many seconds.
+        if not hasattr(settings, "DJ_BN_CHUNKED_UPLOAD_EXPIRY"):
+            settings.DJ_BN_CHUNKED_UPLOAD_EXPIRY = 24 * 60 * 60  # 1 day
+
+        # Chunked uploads each user (or anonymous client) may have in
+        # progress at once. None disables the limit.
+        if not hasattr(settings, "DJ_BN_CHUNKED_UPLOAD_MAX_OPEN"):
+            settings.DJ_BN_CHUNKED_UPLOAD_MAX_OPEN = 5
+
+        # Reuse stored images when a user uploads the same content again.
+        # Uses of shared files are counted in the database, and the unused
+        # image cleanup keeps files while other uploads still use them.
+        if not hasattr(settings, "DJ_BN_IMAGE_DEDUP"):
+            settings.DJ_BN_IMAGE_DEDUP: bool = False  # type: ignore[attr-defined]
+
+        # How long (seconds) content hashes are remembered, None is forever.
+        if not hasattr(settings, "DJ_BN_IMAGE_DEDUP_TIMEOUT"):
+            settings.DJ_BN_IMAGE_DEDUP_TIMEOUT = 30 * 24 * 60 * 60  # 30 days
+
+        # Uploads without a DJ_BN_IMAGE_URL_HANDLER are stored under this path,
+        # and serve_image only serves names under it.
         if not hasattr(settings, "DJ_BN_UPLOAD_PATH"):
             settings.DJ_BN_UPLOAD_PATH = (
                 "blocknote_uploads"  # Directory within MEDIA_ROOT
@@ -279,6 +438,8 @@ class DjangoBlockNoteConfig(AppConfig):
             settings.DJ_BN_IMAGE_UPLOAD_CONFIG = {
                 # Core Upload Settings
                 "uploadUrl": "/django-blocknote/upload-image/",
+                "batchUploadUrl": "/django-blocknote/upload-images/",
+                "chunkedUploadUrl": "/django-blocknote/upload-image/chunked/",
                 "maxFileSize": 10 * 1024 * 1024,  # 10MB
                 "allowedTypes": ["image/*"],
                 "showProgress": False,
@@ -323,6 +484,61 @@ class DjangoBlockNoteConfig(AppConfig):
                 # "transformResponse": None,  # Custom response transformation  # noqa: E501, ERA001
             }
 
+    def _configure_render_cache(self):
+        # Cache server-side renders, rendered on the first view of a document
+        if not hasattr(settings, "DJ_BN_RENDER_CACHE"):
+            settings.DJ_BN_RENDER_CACHE: bool = True  # type: ignore[attr-defined]
+
+        # Render documents into the cache when they're saved, rather than on
+        # their first view. Each save then waits for the render.
+        if not hasattr(settings, "DJ_BN_RENDER_CACHE_WARM_ON_SAVE"):
+            settings.DJ_BN_RENDER_CACHE_WARM_ON_SAVE = False
+
+        # The Django cache shared by all processes
+        if not hasattr(settings, "DJ_BN_RENDER_CACHE_ALIAS"):
+            settings.DJ_BN_RENDER_CACHE_ALIAS = "default"
+
+        if not hasattr(settings, "DJ_BN_RENDER_CACHE_TIMEOUT"):
+            settings.DJ_BN_RENDER_CACHE_TIMEOUT = 7 * 24 * 60 * 60  # 1 week
+
+        # Size of the in-process cache in front of the Django cache
+        if not hasattr(settings, "DJ_BN_RENDER_CACHE_MAX_BYTES"):
+            settings.DJ_BN_RENDER_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 16MB
+
+        # Top-level blocks embedded by paginated viewers, the rest are fetched
+        if not hasattr(settings, "DJ_BN_VIEWER_PAGE_SIZE"):
+            settings.DJ_BN_VIEWER_PAGE_SIZE = 50
+
+        # Most blocks served by one block range request
+        if not hasattr(settings, "DJ_BN_BLOCK_RANGE_MAX"):
+            settings.DJ_BN_BLOCK_RANGE_MAX = 200
+
+        if not hasattr(settings, "DJ_BN_BLOCK_INDEX_TIMEOUT"):
+            settings.DJ_BN_BLOCK_INDEX_TIMEOUT = 24 * 60 * 60  # 1 day
+
+        # Size of the in-process cache of block indexes
+        if not hasattr(settings, "DJ_BN_BLOCK_INDEX_MAX_BYTES"):
+            settings.DJ_BN_BLOCK_INDEX_MAX_BYTES = 16 * 1024 * 1024  # 16MB
+
+        # How long a viewer can keep fetching block ranges
+        if not hasattr(settings, "DJ_BN_BLOCK_RANGE_TOKEN_MAX_AGE"):
+            settings.DJ_BN_BLOCK_RANGE_TOKEN_MAX_AGE = 24 * 60 * 60  # 1 day
+
+    def _configure_viewer_theme(self):
+        # Dotted path of a callable taking the user, returning "light", "dark",
+        # "auto" or None
+        if not hasattr(settings, "DJ_BN_THEME_RESOLVER"):
+            settings.DJ_BN_THEME_RESOLVER = ""
+
+        # Attribute path of the theme from the user, e.g. "profile.theme"
+        if not hasattr(settings, "DJ_BN_THEME_ATTRIBUTE"):
+            settings.DJ_BN_THEME_ATTRIBUTE = ""
+
+        # Probe common profile relations and attributes for a theme, which may
+        # cost a query per probe
+        if not hasattr(settings, "DJ_BN_THEME_PROBE"):
+            settings.DJ_BN_THEME_PROBE: bool = False  # type: ignore[attr-defined]
+
     # TODO: Update with DJ_BN and tie in with ones above
     def _configure_blocknote_settings(self):
         """Set up BlockNote-specific settings with defaults."""
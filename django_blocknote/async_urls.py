@@ -0,0 +1,36 @@
+"""URLs for ASGI deployments, with async upload and removal views.
+
+Include these instead of `django_blocknote.urls` to use them. The routes
+are those of `django_blocknote.urls`, with the async views swapped in.
+"""
+
+from django.urls import URLPattern
+
+from django_blocknote import urls
+from django_blocknote.views import (
+    aremove_image,
+    aupload_file,
+    aupload_image,
+)
+
+app_name = "django_blocknote"
+app_label = "django_blocknote"
+
+# The async views, by the name of the route they replace
+ASYNC_VIEWS = {
+    "upload_image": aupload_image,
+    "remove_image": aremove_image,
+    "upload_file": aupload_file,
+}
+
+urlpatterns = [
+    URLPattern(
+        pattern.pattern,
+        ASYNC_VIEWS[pattern.name],
+        pattern.default_args,
+        pattern.name,
+    )
+    if pattern.name in ASYNC_VIEWS
+    else pattern
+    for pattern in urls.urlpatterns
+]
@@ -0,0 +1,340 @@
+"""Block ranges of large documents, for paginated readonly viewers.
+
+A paginated viewer embeds only the first `DJ_BN_VIEWER_PAGE_SIZE` top-level
+blocks of a document, and fetches the rest in ranges from the `block_range`
+view as the reader scrolls.
+
+Each document is serialized once into a block index: the JSON of its
+top-level blocks joined by commas, and the offset at which each block
+starts. The index is cached under a digest of that JSON, so a range is a
+slice of a cached string rather than a fresh query and serialization.
+Like renders, indexes are kept in an in-process LRU of
+`DJ_BN_BLOCK_INDEX_MAX_BYTES` in front of the render cache, which also
+serves indexes too large for the shared cache, e.g. over memcached's item
+size limit.
+
+The render cache also remembers the digest of each document's index, so
+viewers of an unchanged document reuse it. Saving or deleting the document
+through its model forgets the digest and its index.
+
+The viewer refers to the document by a signed token holding its model,
+primary key, field and digest. The view only serves documents a page has
+already shown, and never an arbitrary model or field. A cached index is
+only served while the document's remembered digest matches the token's,
+otherwise the document is read again. Once the document has changed, the
+view answers 409, and once it is deleted or the token has expired, 410.
+The viewer then stops fetching.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any, NamedTuple
+
+import structlog
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from django_blocknote.exceptions import BlockRangeError
+from django_blocknote.render import parse_blocks
+from django_blocknote.render.cache import RenderLRU
+
+logger = structlog.get_logger(__name__)
+
+TOKEN_SALT = "django_blocknote.block_ranges"
+
+_lru: RenderLRU | None = None
+_lru_lock = threading.Lock()
+
+
+class BlockIndex(NamedTuple):
+    """The serialized top-level blocks of a document."""
+
+    digest: str
+    # The JSON of each block, joined by commas
+    text: str
+    # Where each block starts in `text`
+    starts: list[int]
+
+    @property
+    def total(self) -> int:
+        return len(self.starts)
+
+    def slice(self, start: int, end: int) -> str:
+        """The JSON array of blocks `start` to `end`, within the index."""
+        if start >= end:
+            return "[]"
+        stop = self.starts[end] - 1 if end < self.total else len(self.text)
+        return f"[{self.text[self.starts[start] : stop]}]"
+
+
+class BlockRange(NamedTuple):
+    """A range of top-level blocks of a document."""
+
+    # The JSON array of the blocks
+    blocks: str
+    start: int
+    end: int
+    total: int
+
+
+def get_block_index_cache_key(digest: str) -> str:
+    """Generate cache key for the block index of a document."""
+    return f"djbn_block_index_{digest}"
+
+
+def get_document_cache_key(model: str, pk: Any, field: str) -> str:
+    """Generate cache key for the block index digest of a stored document."""
+    reference = f"{model}:{pk}:{field}"
+    reference_hash = hashlib.md5(reference.encode(), usedforsecurity=False)
+    return f"djbn_block_index_document_{reference_hash.hexdigest()}"
+
+
+def _get_lru() -> RenderLRU:
+    global _lru  # noqa: PLW0603
+    if _lru is None:
+        with _lru_lock:
+            if _lru is None:
+                _lru = RenderLRU(settings.DJ_BN_BLOCK_INDEX_MAX_BYTES)
+    return _lru
+
+
+def build_block_index(content: Any) -> BlockIndex:
+    """Serializes the top-level blocks of a document into a block index."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    pieces = [encoder.encode(block) for block in parse_blocks(content)]
+
+    starts = []
+    position = 0
+    for piece in pieces:
+        starts.append(position)
+        position += len(piece) + 1
+
+    text = ",".join(pieces)
+    digest = hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+    return BlockIndex(digest=digest, text=text, starts=starts)
+
+
+def get_cached_block_index(digest: str) -> BlockIndex | None:
+    """The block index with the given digest, if either cache tier has it."""
+    cache_key = get_block_index_cache_key(digest)
+    lru = _get_lru()
+    index = lru.get(cache_key)
+    if index is None:
+        index = caches[settings.DJ_BN_RENDER_CACHE_ALIAS].get(cache_key)
+        if index is not None:
+            lru.set(cache_key, index, _get_index_size(index))
+    return index
+
+
+def cache_block_index(index: BlockIndex, reference: dict[str, Any]) -> None:
+    """Caches a block index in both tiers, as the index of a document.
+
+    Args:
+        index: The block index.
+        reference: The `model`, `pk` and `field` of the document.
+    """
+    cache_key = get_block_index_cache_key(index.digest)
+    shared_cache = caches[settings.DJ_BN_RENDER_CACHE_ALIAS]
+    timeout = settings.DJ_BN_BLOCK_INDEX_TIMEOUT
+    shared_cache.set(cache_key, index, timeout)
+    shared_cache.set(
+        get_document_cache_key(
+            reference["model"],
+            reference["pk"],
+            reference["field"],
+        ),
+        index.digest,
+        timeout,
+    )
+    _get_lru().set(cache_key, index, _get_index_size(index))
+
+
+def get_document_block_index(
+    instance,
+    field_name: str,
+    content: Any,
+) -> BlockIndex:
+    """The block index of a saved document, only built when not cached.
+
+    Args:
+        instance: The saved model instance holding the document.
+        field_name: The name of its `BlockNoteField`.
+        content: The document, as held by the instance.
+
+    Returns:
+        The block index.
+    """
+    reference = {
+        "model": instance._meta.label_lower,  # noqa: SLF001
+        "pk": instance.pk,
+        "field": field_name,
+    }
+    digest = caches[settings.DJ_BN_RENDER_CACHE_ALIAS].get(
+        get_document_cache_key(**reference),
+    )
+    if digest is not None and (index := get_cached_block_index(digest)):
+        return index
+
+    index = build_block_index(content)
+    cache_block_index(index, reference)
+    return index
+
+
+def forget_block_indexes_on_save(sender, instance, raw=False, **kwargs):
+    """Forget the block indexes of a saved or deleted instance.
+
+    Connected for each model with a `BlockNoteField` by the field itself.
+    """
+    if raw:
+        return
+
+    from django_blocknote.models.fields import BlockNoteField
+
+    shared_cache = caches[settings.DJ_BN_RENDER_CACHE_ALIAS]
+    document_keys = [
+        get_document_cache_key(
+            sender._meta.label_lower,  # noqa: SLF001
+            instance.pk,
+            field.name,
+        )
+        for field in sender._meta.concrete_fields  # noqa: SLF001
+        if isinstance(field, BlockNoteField)
+    ]
+    if not document_keys:
+        return
+
+    # Indexes are shared by documents with the same blocks, those are
+    # rebuilt from the database on their next range
+    index_keys = [
+        get_block_index_cache_key(digest)
+        for digest in shared_cache.get_many(document_keys).values()
+    ]
+    lru = _get_lru()
+    for index_key in index_keys:
+        lru.delete(index_key)
+    shared_cache.delete_many(document_keys + index_keys)
+
+
+def _get_index_size(index: BlockIndex) -> int:
+    # The text, and roughly the start offsets
+    return len(index.text) + 8 * index.total
+
+
+def make_block_range_token(instance, field_name: str, digest: str) -> str:
+    """A signed reference to a document, for the `block_range` view."""
+    return signing.dumps(
+        {
+            "model": instance._meta.label_lower,  # noqa: SLF001
+            "pk": instance.pk,
+            "field": field_name,
+            "digest": digest,
+        },
+        salt=TOKEN_SALT,
+        compress=True,
+    )
+
+
+def _load_block_index(reference: dict[str, Any]) -> BlockIndex:
+    """Rebuild the block index of a document from the database.
+
+    Raises:
+        BlockRangeError: If the document is deleted, or has changed since
+            the token was made.
+    """
+    from django_blocknote.models.fields import BlockNoteField
+
+    try:
+        model = apps.get_model(reference["model"])
+        field = model._meta.get_field(reference["field"])  # noqa: SLF001
+    except (LookupError, KeyError) as e:
+        msg = "Document not found"
+        raise BlockRangeError(msg, code="NOT_FOUND", status=404) from e
+
+    if not isinstance(field, BlockNoteField):
+        msg = "Document not found"
+        raise BlockRangeError(msg, code="NOT_FOUND", status=404)
+
+    values = list(
+        model._default_manager.filter(pk=reference["pk"]).values_list(  # noqa: SLF001
+            field.attname,
+            flat=True,
+        )[:1],
+    )
+    if not values:
+        msg = "Document deleted"
+        raise BlockRangeError(msg, code="DELETED", status=410)
+
+    index = build_block_index(field.to_python(values[0]))
+    cache_block_index(index, reference)
+    if index.digest != reference["digest"]:
+        logger.info(
+            event="load_block_index",
+            msg="Document changed since the viewer was rendered",
+            data={"model": reference["model"], "pk": reference["pk"]},
+        )
+        msg = "Document changed, reload the page to see the rest"
+        raise BlockRangeError(msg, code="CHANGED", status=409)
+    return index
+
+
+def get_block_range(token: str, start: int, count: int) -> BlockRange:
+    """A range of top-level blocks of a document.
+
+    Args:
+        token: The signed document reference from the viewer.
+        start: The index of the first block.
+        count: The number of blocks, at most `DJ_BN_BLOCK_RANGE_MAX`.
+
+    Returns:
+        The range, clamped to the blocks of the document.
+
+    Raises:
+        BlockRangeError: If the token is invalid or expired, or the document
+            is deleted or has changed.
+    """
+    try:
+        reference = signing.loads(
+            token,
+            salt=TOKEN_SALT,
+            max_age=settings.DJ_BN_BLOCK_RANGE_TOKEN_MAX_AGE,
+        )
+    except signing.SignatureExpired as e:
+        msg = "Document reference expired, reload the page to see the rest"
+        raise BlockRangeError(msg, code="EXPIRED", status=410) from e
+    except signing.BadSignature as e:
+        msg = "Invalid document reference"
+        raise BlockRangeError(msg, code="INVALID_TOKEN", status=404) from e
+
+    # The cached index is only current while the document still points at it
+    current_digest = caches[settings.DJ_BN_RENDER_CACHE_ALIAS].get(
+        get_document_cache_key(
+            reference["model"],
+            reference["pk"],
+            reference["field"],
+        ),
+    )
+    index = None
+    if current_digest == reference["digest"]:
+        index = get_cached_block_index(reference["digest"])
+    if index is None:
+        index = _load_block_index(reference)
+
+    start = min(max(0, start), index.total)
+    end = min(start + max(0, min(count, settings.DJ_BN_BLOCK_RANGE_MAX)), index.total)
+    return BlockRange(index.slice(start, end), start, end, index.total)
+
+
+@receiver(setting_changed)
+def reset_block_indexes_on_setting_changed(sender, setting, **kwargs):
+    """Size a new in-process cache when its limit changes."""
+    global _lru  # noqa: PLW0603
+    if setting == "DJ_BN_BLOCK_INDEX_MAX_BYTES":
+        with _lru_lock:
+            _lru = None
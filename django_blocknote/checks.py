@@ -0,0 +1,87 @@
+"""Django BlockNote system checks"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from PIL import features
+
+from django_blocknote.helpers import get_storage_class
+from django_blocknote.image.encoder import ENCODER_PRESETS
+from django_blocknote.image.variants import VARIANT_FORMATS
+
+
+@register(Tags.compatibility)
+def check_image_upload_settings(app_configs, **kwargs):
+    """Validates the image upload settings resolved by the component registry."""
+    errors = []
+
+    try:
+        get_storage_class()
+    except ImproperlyConfigured:
+        errors.append(
+            Error(
+                "The image storage class can't be imported.",
+                hint=(
+                    "Set DJ_BN_IMAGE_STORAGE, DEFAULT_FILE_STORAGE or "
+                    "STORAGES['default'] to an importable storage class."
+                ),
+                id="django_blocknote.E001",
+            ),
+        )
+
+    dotted_path_settings = [
+        ("DJ_BN_IMAGE_FORMATTER", settings.DJ_BN_IMAGE_FORMATTER),
+        ("DJ_BN_IMAGE_URL_HANDLER", settings.DJ_BN_IMAGE_URL_HANDLER),
+        ("DJ_BN_THEME_RESOLVER", settings.DJ_BN_THEME_RESOLVER),
+        ("DJ_BN_UPLOAD_CLIENT_KEY", settings.DJ_BN_UPLOAD_CLIENT_KEY),
+    ]
+    if settings.DJ_BN_IMAGE_ENCODER_POLICY not in ("adaptive", "legacy"):
+        dotted_path_settings.append(
+            ("DJ_BN_IMAGE_ENCODER_POLICY", settings.DJ_BN_IMAGE_ENCODER_POLICY),
+        )
+
+    for setting_name, dotted_path in dotted_path_settings:
+        if not dotted_path:
+            continue
+        try:
+            import_string(dotted_path)
+        except ImportError:
+            errors.append(
+                Error(
+                    f"{setting_name} '{dotted_path}' can't be imported.",
+                    hint=f"Set {setting_name} to the dotted path of a callable.",
+                    id="django_blocknote.E002",
+                ),
+            )
+
+    if settings.DJ_BN_IMAGE_ENCODER_PRESET not in ENCODER_PRESETS:
+        errors.append(
+            Error(
+                f"DJ_BN_IMAGE_ENCODER_PRESET "
+                f"'{settings.DJ_BN_IMAGE_ENCODER_PRESET}' is not a preset.",
+                hint=f"Choose one of {sorted(ENCODER_PRESETS)}.",
+                id="django_blocknote.E003",
+            ),
+        )
+
+    for variant_format in settings.DJ_BN_IMAGE_VARIANTS:
+        if variant_format not in VARIANT_FORMATS:
+            errors.append(
+                Error(
+                    f"DJ_BN_IMAGE_VARIANTS format '{variant_format}' is not known.",
+                    hint=f"Choose from {sorted(VARIANT_FORMATS)}.",
+                    id="django_blocknote.E004",
+                ),
+            )
+        elif not features.check(variant_format):
+            errors.append(
+                Warning(
+                    f"Pillow can't write DJ_BN_IMAGE_VARIANTS format "
+                    f"'{variant_format}', those variants will be skipped.",
+                    hint="Install a Pillow build with support for the format.",
+                    id="django_blocknote.W001",
+                ),
+            )
+
+    return errors
@@ -12,3 +12,40 @@ class InvalidImageTypeError(Exception):
     def __init__(self, message, image_type=None):
         super().__init__(message)
         self.image_type = image_type
+
+
+class ImageTooLargeError(Exception):
+    """Raised when an image exceeds the configured size, pixel or frame budget."""
+
+    def __init__(self, message, image_type=None):
+        super().__init__(message)
+        self.image_type = image_type
+
+
+class ChunkedUploadError(Exception):
+    """Raised when a chunked upload request can't be applied."""
+
+    def __init__(self, message, code="INVALID", status=400, offset=None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+        self.offset = offset
+
+
+class UploadRejectedError(Exception):
+    """Raised when an upload is turned away by admission control."""
+
+    def __init__(self, message, code="BUSY", retry_after=1, status=503):
+        super().__init__(message)
+        self.code = code
+        self.retry_after = retry_after
+        self.status = status
+
+
+class BlockRangeError(Exception):
+    """Raised when a range of document blocks can't be served."""
+
+    def __init__(self, message, code="INVALID", status=400):
+        super().__init__(message)
+        self.code = code
+        self.status = status
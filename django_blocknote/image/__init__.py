@@ -1,19 +1,105 @@
+from .admission import (
+    admit_upload,
+    check_upload_rate,
+    get_upload_identity,
+    upload_slot,
+)
+from .chunked import (
+    append_chunk,
+    count_open_chunked_uploads,
+    finalize_chunked_upload,
+    get_chunked_upload,
+    remove_chunked_upload,
+    start_chunked_upload,
+)
+from .components import (
+    get_image_formatter,
+    get_image_storage,
+    get_image_url_handler,
+    reset_components,
+)
+from .dedup import (
+    compute_image_digest,
+    find_existing_image,
+    get_dedup_owner,
+    is_valid_digest,
+)
+from .encoder import (
+    adaptive_policy,
+    classify_image,
+    legacy_policy,
+)
 from .remove import (
+    aprocess_image_urls,
+    atrigger_cleanup_if_needed,
     process_image_urls,
     trigger_cleanup_if_needed,
 )
+from .timing import (
+    has_permission_to_read_metrics,
+    render_prometheus_metrics,
+    timed_stage,
+    upload_stage_timed,
+)
 from .upload import (
     convert_image_to_webp,
     handle_uploaded_image,
     has_permission_to_upload_images,
+    image_precheck,
     image_verify,
+    process_uploaded_image,
+)
+from .variants import (
+    choose_image_variant,
+    create_image_variants,
+    delete_image_variants,
+    get_available_variants,
+    get_negotiated_image_url,
+    is_upload_name,
+    resolve_negotiated_image_url,
 )
 
 __all__ = [
+    "adaptive_policy",
+    "admit_upload",
+    "append_chunk",
+    "aprocess_image_urls",
+    "atrigger_cleanup_if_needed",
+    "check_upload_rate",
+    "choose_image_variant",
+    "classify_image",
+    "compute_image_digest",
     "convert_image_to_webp",
+    "count_open_chunked_uploads",
+    "create_image_variants",
+    "delete_image_variants",
+    "finalize_chunked_upload",
+    "find_existing_image",
+    "get_available_variants",
+    "get_chunked_upload",
+    "get_dedup_owner",
+    "get_image_formatter",
+    "get_image_storage",
+    "get_image_url_handler",
+    "get_negotiated_image_url",
+    "get_upload_identity",
     "handle_uploaded_image",
+    "has_permission_to_read_metrics",
     "has_permission_to_upload_images",
+    "image_precheck",
     "image_verify",
+    "is_upload_name",
+    "is_valid_digest",
+    "legacy_policy",
     "process_image_urls",
+    "process_uploaded_image",
+    "remove_chunked_upload",
+    "render_prometheus_metrics",
+    "reset_components",
+    "resolve_negotiated_image_url",
+    "start_chunked_upload",
+    "timed_stage",
     "trigger_cleanup_if_needed",
+    "upload_slot",
+    "upload_stage_timed",
 ]
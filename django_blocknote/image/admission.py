@@ -0,0 +1,170 @@
+"""Admission control for image processing.
+
+Two limits keep bursts of uploads from pinning every core:
+
+- A process-wide semaphore allows at most `DJ_BN_UPLOAD_MAX_CONCURRENT`
+  images to be processed at once. Further uploads queue for up to
+  `DJ_BN_UPLOAD_QUEUE_TIMEOUT` seconds before being rejected.
+- With `DJ_BN_UPLOAD_RATE` set, a token bucket per user (or per client for
+  anonymous uploads), kept in the cache, allows bursts of
+  `DJ_BN_UPLOAD_BURST` uploads refilled at `DJ_BN_UPLOAD_RATE` uploads a
+  minute. Clients are told apart by `REMOTE_ADDR`, which behind a reverse
+  proxy is the proxy's address. Set `DJ_BN_UPLOAD_CLIENT_KEY` to the dotted
+  path of a callable taking the request and returning the client's key,
+  e.g. from `X-Forwarded-For` as set by your proxy.
+
+The rate is charged per request, so a batch upload costs one token however
+many files it holds. Rejected uploads raise `UploadRejectedError`, which the
+views turn into a 429 (over the rate) or 503 (no slot free) response with a
+`Retry-After` header.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_blocknote.exceptions import UploadRejectedError
+
+logger = structlog.get_logger(__name__)
+
+_semaphore: threading.BoundedSemaphore | None = None
+_semaphore_lock = threading.Lock()
+
+
+def get_rate_cache_key(identity: str) -> str:
+    """Generate cache key for the token bucket of an uploader."""
+    return f"djbn_upload_rate_{identity}"
+
+
+def get_upload_identity(request) -> str:
+    """The key uploads are rate limited by, the user or the client.
+
+    Anonymous clients are keyed by `DJ_BN_UPLOAD_CLIENT_KEY`, or their address.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user_{user.pk}"
+    if settings.DJ_BN_UPLOAD_CLIENT_KEY:
+        client_key = import_string(settings.DJ_BN_UPLOAD_CLIENT_KEY)
+        return f"client_{client_key(request)}"
+    return f"addr_{request.META.get('REMOTE_ADDR', 'unknown')}"
+
+
+def check_upload_rate(request, cost: int = 1) -> None:
+    """Takes `cost` tokens from the uploader's bucket.
+
+    The read and write of the bucket aren't atomic, so concurrent requests
+    from one uploader can occasionally slip an extra upload through.
+
+    Raises:
+        UploadRejectedError: If the bucket doesn't hold enough tokens.
+    """
+    rate = settings.DJ_BN_UPLOAD_RATE
+    if not rate:
+        return
+
+    burst = settings.DJ_BN_UPLOAD_BURST
+    refill_per_second = rate / 60
+    cache_key = get_rate_cache_key(get_upload_identity(request))
+
+    now = time.time()
+    tokens, updated = cache.get(cache_key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * refill_per_second)
+
+    if tokens < cost:
+        retry_after = math.ceil((cost - tokens) / refill_per_second)
+        logger.info(
+            event="upload_rate_limited",
+            msg="Upload rejected by rate limit",
+            data={"cache_key": cache_key, "retry_after": retry_after},
+        )
+        raise UploadRejectedError(
+            "Too many uploads, please wait before trying again.",
+            code="THROTTLED",
+            retry_after=retry_after,
+            status=429,
+        )
+
+    # Keep the bucket until it would have refilled anyway
+    cache.set(
+        cache_key,
+        (tokens - cost, now),
+        math.ceil(burst / refill_per_second),
+    )
+
+
+def _get_semaphore() -> threading.BoundedSemaphore:
+    global _semaphore  # noqa: PLW0603
+    if _semaphore is None:
+        with _semaphore_lock:
+            if _semaphore is None:
+                _semaphore = threading.BoundedSemaphore(
+                    settings.DJ_BN_UPLOAD_MAX_CONCURRENT,
+                )
+    return _semaphore
+
+
+@contextmanager
+def upload_slot() -> Iterator[None]:
+    """Holds one of the process's image processing slots.
+
+    Raises:
+        UploadRejectedError: If no slot frees up within the queue timeout.
+    """
+    semaphore = _get_semaphore()
+    timeout = settings.DJ_BN_UPLOAD_QUEUE_TIMEOUT
+    if not semaphore.acquire(timeout=timeout):
+        logger.info(
+            event="upload_slot_timeout",
+            msg="Upload rejected, no processing slot free",
+            data={"timeout": timeout},
+        )
+        raise UploadRejectedError(
+            "The server is busy processing images, please try again shortly.",
+            code="BUSY",
+            retry_after=max(1, math.ceil(timeout)),
+        )
+
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+@contextmanager
+def admit_upload(request, *, charge: bool = True) -> Iterator[None]:
+    """Admits one image upload for processing, see the module docstring.
+
+    Args:
+        request: The upload request.
+        charge: Whether to charge the uploader's rate, False for the files
+            of a batch the request was already charged for.
+
+    Raises:
+        UploadRejectedError: If the upload is over the uploader's rate, or
+            the process is too busy.
+    """
+    if charge:
+        check_upload_rate(request)
+    with upload_slot():
+        yield
+
+
+@receiver(setting_changed)
+def reset_semaphore_on_setting_changed(sender, setting, **kwargs):
+    """Size a new semaphore when the concurrency limit changes."""
+    global _semaphore  # noqa: PLW0603
+    if setting == "DJ_BN_UPLOAD_MAX_CONCURRENT":
+        with _semaphore_lock:
+            _semaphore = None
@@ -0,0 +1,446 @@
+"""Benchmarks of the image upload pipeline, see the `blocknote_benchmark` command.
+
+A deterministic corpus of photos, screenshots, alpha PNGs, animated GIFs and
+a huge photo is generated from fixed seeds, so results are comparable
+between runs and machines. Each pipeline function is timed over a number of
+repeats, in a forked process per case where available, so the peak RSS of
+one case isn't hidden by an earlier, larger one.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import django
+import PIL
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, override_settings
+from PIL import Image, ImageDraw, features
+
+from django_blocknote.image.encoder import _determine_quality
+from django_blocknote.image.timing import upload_stage_timed
+from django_blocknote.image.upload import (
+    convert_image_to_webp,
+    handle_uploaded_image,
+    image_verify,
+)
+
+# Bump when the generated corpus changes, results of different versions
+# aren't comparable
+CORPUS_VERSION = 1
+
+RESULTS_VERSION = 1
+
+ENCODER_POLICIES = ("legacy", "adaptive")
+
+# Time differences below this are noise, whatever the relative change
+MIN_TIME_DELTA = 0.005
+
+
+def _make_photo(rng: random.Random, size: tuple[int, int]) -> Image.Image:
+    """Soft gradients, overlapping shapes and sensor-like noise."""
+    width, height = size
+    img = Image.merge(
+        "RGB",
+        [
+            Image.linear_gradient("L").resize(size),
+            Image.radial_gradient("L").resize(size),
+            Image.linear_gradient("L").rotate(90).resize(size),
+        ],
+    )
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(width // 20, width // 4)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+        )
+    noise = Image.frombytes("L", size, rng.randbytes(width * height))
+    return Image.blend(img, Image.merge("RGB", [noise] * 3), 0.15)
+
+
+def _make_screenshot(rng: random.Random) -> Image.Image:
+    """Flat panels, lines of text and a few accent colours."""
+    img = Image.new("RGB", (1920, 1080), (250, 250, 250))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 1920, 56), fill=(32, 33, 36))
+    draw.rectangle((0, 56, 280, 1080), fill=(241, 243, 244))
+    for row in range(60):
+        y = 80 + row * 16
+        words = " ".join(
+            "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6))
+            for _ in range(rng.randrange(4, 16))
+        )
+        draw.text((320, y), words, fill=(60, 64, 67))
+        draw.text((24, y), words[:24], fill=(95, 99, 104))
+    for _ in range(8):
+        x, y = rng.randrange(320, 1700), rng.randrange(80, 980)
+        draw.rounded_rectangle(
+            (x, y, x + 160, y + 40),
+            radius=8,
+            fill=(26, 115, 232),
+        )
+    return img
+
+
+def _make_alpha(rng: random.Random) -> Image.Image:
+    """Shapes with soft edges on a transparent background."""
+    img = Image.new("RGBA", (1024, 1024), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for _ in range(25):
+        x, y = rng.randrange(1024), rng.randrange(1024)
+        radius = rng.randrange(40, 200)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=(
+                rng.randrange(256),
+                rng.randrange(256),
+                rng.randrange(256),
+                rng.randrange(64, 256),
+            ),
+        )
+    return img
+
+
+def _make_animation(rng: random.Random) -> list[Image.Image]:
+    """A sprite moving over a static background, with a few still frames."""
+    background = _make_photo(rng, (480, 320)).quantize(64).convert("RGB")
+    frames = []
+    for index in range(40):
+        frame = background.copy()
+        step = min(index, 30)
+        ImageDraw.Draw(frame).rectangle(
+            (20 + step * 12, 120, 80 + step * 12, 180),
+            fill=(220, 40, 40),
+        )
+        frames.append(frame)
+    return frames
+
+
+def _save_animation(path: Path) -> None:
+    frames = _make_animation(random.Random(4))
+    frames[0].save(
+        path,
+        save_all=True,
+        append_images=frames[1:],
+        duration=40,
+        loop=0,
+    )
+
+
+def build_corpus(corpus_dir: Path) -> dict[str, Path]:
+    """Generates the benchmark corpus, reusing files already generated.
+
+    Returns:
+        The corpus files by case name.
+    """
+    corpus_dir = corpus_dir / f"v{CORPUS_VERSION}"
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+
+    def save(name: str, make: Callable[[Path], None]) -> Path:
+        path = corpus_dir / name
+        if not path.exists():
+            make(path)
+        return path
+
+    return {
+        "photo": save(
+            "photo.jpg",
+            lambda path: _make_photo(random.Random(1), (2400, 1600)).save(
+                path,
+                quality=90,
+            ),
+        ),
+        "screenshot": save(
+            "screenshot.png",
+            lambda path: _make_screenshot(random.Random(2)).save(path),
+        ),
+        "alpha": save(
+            "alpha.png",
+            lambda path: _make_alpha(random.Random(3)).save(path),
+        ),
+        "animation": save("animation.gif", _save_animation),
+        "huge": save(
+            "huge.jpg",
+            lambda path: _make_photo(random.Random(5), (1750, 1250))
+            .resize((7000, 5000), Image.Resampling.BICUBIC)
+            .save(path, quality=85),
+        ),
+    }
+
+
+def _upload(path: Path) -> SimpleUploadedFile:
+    with Image.open(path) as img:
+        content_type = Image.MIME.get(img.format, "")
+    return SimpleUploadedFile(path.name, path.read_bytes(), content_type)
+
+
+def _bench_verify(path: Path, **kwargs) -> int | None:
+    image_verify(_upload(path))
+    return None
+
+
+def _bench_convert(path: Path, policy: str, **kwargs) -> int:
+    with override_settings(DJ_BN_IMAGE_ENCODER_POLICY=policy):
+        _, stream = convert_image_to_webp(_upload(path))
+    with stream:
+        return stream.seek(0, 2)
+
+
+def _bench_determine_quality(path: Path, **kwargs) -> int | None:
+    size = path.stat().st_size
+    for _ in range(10_000):
+        _determine_quality(size)
+    return None
+
+
+def _bench_handle(path: Path, media_root: str, **kwargs) -> int | None:
+    saved = {}
+
+    def on_stage(sender, stage, bytes_out, **kwargs):
+        if stage == "save":
+            saved["bytes"] = bytes_out
+
+    request = RequestFactory().post("/", {"file": _upload(path)})
+    upload_stage_timed.connect(on_stage)
+    try:
+        with override_settings(
+            DJ_BN_IMAGE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=media_root,
+            DJ_BN_IMAGE_DEDUP=False,
+            DJ_BN_IMAGE_URL_HANDLER="",
+        ):
+            handle_uploaded_image(request)
+    finally:
+        upload_stage_timed.disconnect(on_stage)
+    return saved.get("bytes")
+
+
+BENCHMARKS: dict[str, tuple[Callable[..., int | None], dict[str, Any]]] = {
+    "image_verify": (_bench_verify, {}),
+    **{
+        f"convert_image_to_webp[{policy}]": (_bench_convert, {"policy": policy})
+        for policy in ENCODER_POLICIES
+    },
+    "_determine_quality[x10000]": (_bench_determine_quality, {}),
+    "handle_uploaded_image": (_bench_handle, {}),
+}
+
+
+def _peak_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _measure(
+    func: Callable[..., int | None],
+    path: Path,
+    repeat: int,
+    kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    timings = []
+    output_bytes = None
+    try:
+        # Warm up, so lazy imports and caches aren't timed
+        func(path, **kwargs)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output_bytes = func(path, **kwargs)
+            timings.append(time.perf_counter() - started)
+    except Exception as e:  # noqa: BLE001
+        return {"error": f"{type(e).__name__}: {e}", "peak_rss_kb": _peak_rss_kb()}
+
+    return {
+        "wall_time": {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+        },
+        "output_bytes": output_bytes,
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def _measure_in_child(connection, *args) -> None:
+    connection.send(_measure(*args))
+    connection.close()
+
+
+def _measure_isolated(*args) -> dict[str, Any]:
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return _measure(*args)
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_in_child, args=(sender, *args))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": f"Benchmark process exited with {process.exitcode}"}
+    process.join()
+    return result
+
+
+def run_benchmarks(
+    corpus_dir: Path,
+    repeat: int = 3,
+    cases: list[str] | None = None,
+    benchmarks: list[str] | None = None,
+    *,
+    isolate: bool = True,
+    progress: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Runs the benchmarks over the corpus.
+
+    Args:
+        corpus_dir: Where the corpus is generated and kept between runs.
+        repeat: How many times each benchmark is run, for the timings.
+        cases: The corpus cases to run, all by default.
+        benchmarks: The benchmarks to run, all by default.
+        isolate: Run each case in a forked process, for a per-case peak RSS.
+        progress: Called with a description of each benchmark as it starts.
+
+    Returns:
+        The results, ready to be written as JSON.
+    """
+    corpus = build_corpus(corpus_dir)
+    measure = _measure_isolated if isolate else _measure
+    results = []
+
+    with tempfile.TemporaryDirectory() as media_root:
+        for case, path in corpus.items():
+            if cases and case not in cases:
+                continue
+            for name, (func, kwargs) in BENCHMARKS.items():
+                if benchmarks and name not in benchmarks:
+                    continue
+                if progress:
+                    progress(f"{case}: {name}")
+                results.append(
+                    {
+                        "case": case,
+                        "benchmark": name,
+                        "input_bytes": path.stat().st_size,
+                        "repeat": repeat,
+                        **measure(
+                            func,
+                            path,
+                            repeat,
+                            {**kwargs, "media_root": media_root},
+                        ),
+                    },
+                )
+
+    return {
+        "version": RESULTS_VERSION,
+        "corpus_version": CORPUS_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "webp": features.check("webp"),
+            "avif": features.check("avif"),
+        },
+        "results": results,
+    }
+
+
+def compare_results(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    time_tolerance: float = 0.25,
+    size_tolerance: float = 0.05,
+) -> list[dict[str, Any]]:
+    """Compares results with a baseline run.
+
+    Args:
+        results: The results of `run_benchmarks`.
+        baseline: Earlier results to compare with.
+        time_tolerance: The allowed relative increase of the median time.
+        size_tolerance: The allowed relative increase of the output size.
+
+    Returns:
+        The regressions found, each with the case, benchmark, metric, and
+        the baseline and current values. Benchmarks that newly fail are
+        regressions too.
+    """
+    if baseline.get("corpus_version") != results["corpus_version"]:
+        msg = "The baseline was run on a different corpus version"
+        raise ValueError(msg)
+
+    previous = {
+        (result["case"], result["benchmark"]): result
+        for result in baseline.get("results", [])
+    }
+    regressions = []
+    for result in results["results"]:
+        key = (result["case"], result["benchmark"])
+        before = previous.get(key)
+        if before is None:
+            continue
+
+        if "error" in result and "error" not in before:
+            regressions.append(
+                {
+                    "case": key[0],
+                    "benchmark": key[1],
+                    "metric": "error",
+                    "baseline": None,
+                    "current": result["error"],
+                },
+            )
+            continue
+        if "error" in result or "error" in before:
+            continue
+
+        checks = [
+            (
+                "wall_time.median",
+                before["wall_time"]["median"],
+                result["wall_time"]["median"],
+                time_tolerance,
+                MIN_TIME_DELTA,
+            ),
+            (
+                "output_bytes",
+                before["output_bytes"],
+                result["output_bytes"],
+                size_tolerance,
+                0,
+            ),
+        ]
+        regressions.extend(
+            {
+                "case": key[0],
+                "benchmark": key[1],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+            }
+            for metric, old, new, tolerance, min_delta in checks
+            if old
+            and new is not None
+            and new > old * (1 + tolerance)
+            and new - old > min_delta
+        )
+
+    return regressions
@@ -0,0 +1,324 @@
+"""Resumable chunked image uploads.
+
+Chunks are appended to a part file in `DJ_BN_CHUNKED_UPLOAD_DIR`, keyed by
+upload id, next to a small JSON sidecar with the upload details. The offset
+of an upload is the size of its part file, so an interrupted client asks for
+the offset and carries on from there. Once complete, the part file is handed
+to the normal verify and convert pipeline as an uploaded file.
+
+The directory must be shared by all processes serving uploads. Appends to
+an upload are serialised with an exclusive lock on its lock file, so a
+retried chunk racing the original is appended once, and the other gets an
+offset mismatch.
+
+Each uploader may have at most `DJ_BN_CHUNKED_UPLOAD_MAX_OPEN` uploads in
+progress, so part files can't fill the disk.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import structlog
+from django.conf import settings
+from django.core.files import locks
+from django.core.files.uploadedfile import UploadedFile
+
+from django_blocknote.exceptions import ChunkedUploadError
+
+logger = structlog.get_logger(__name__)
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Size of the blocks a chunk is copied from the request in
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+def get_upload_dir() -> Path:
+    """The directory holding in-progress chunked uploads, created on demand."""
+    upload_dir = Path(settings.DJ_BN_CHUNKED_UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    return upload_dir
+
+
+def start_chunked_upload(
+    filename: str,
+    size: int,
+    content_type: str = "",
+    user=None,
+    identity: str | None = None,
+) -> dict[str, Any]:
+    """Starts a chunked upload.
+
+    Args:
+        filename: The name of the file being uploaded.
+        size: The total size of the file in bytes.
+        content_type: The MIME type reported by the client.
+        user: The user starting the upload, only they may continue it.
+        identity: The uploader its open uploads are counted by, from
+            `get_upload_identity`.
+
+    Returns:
+        A dict with the `upload_id`, the current `offset` (0), the total
+        `size` and the maximum `chunk_size`.
+
+    Raises:
+        ChunkedUploadError: If the details are invalid, the file too large,
+            or the uploader has too many uploads in progress.
+    """
+    if not isinstance(filename, str) or not filename.strip():
+        raise ChunkedUploadError("A filename is required")
+    if not isinstance(size, int) or size <= 0:
+        raise ChunkedUploadError("The size must be a positive number of bytes")
+
+    max_file_size = settings.DJ_BN_MAX_FILE_SIZE
+    if max_file_size and size > max_file_size:
+        raise ChunkedUploadError(
+            f"This image file is too large ({size} bytes), "
+            f"the maximum is {max_file_size} bytes.",
+            code="TOO_LARGE",
+            status=413,
+        )
+
+    cleanup_expired_chunked_uploads()
+
+    # Not atomic, concurrent starts can occasionally open one more upload
+    max_open = settings.DJ_BN_CHUNKED_UPLOAD_MAX_OPEN
+    if max_open and count_open_chunked_uploads(identity) >= max_open:
+        logger.info(
+            event="start_chunked_upload",
+            msg="Chunked upload rejected, too many in progress",
+            data={"identity": identity, "max_open": max_open},
+        )
+        raise ChunkedUploadError(
+            f"At most {max_open} uploads may be in progress at once, "
+            "finish or abort one first.",
+            code="TOO_MANY_UPLOADS",
+            status=429,
+        )
+
+    upload_id = uuid.uuid4().hex
+    metadata = {
+        "filename": Path(filename).name,
+        "size": size,
+        "content_type": content_type or "",
+        "user_id": getattr(user, "pk", None),
+        "identity": identity,
+        "created": time.time(),
+    }
+    upload_dir = get_upload_dir()
+    (upload_dir / f"{upload_id}.part").touch()
+    (upload_dir / f"{upload_id}.json").write_text(json.dumps(metadata))
+
+    logger.debug(
+        event="start_chunked_upload",
+        msg="Started chunked upload",
+        data={"upload_id": upload_id, "size": size},
+    )
+    return {
+        "upload_id": upload_id,
+        "offset": 0,
+        "size": size,
+        "chunk_size": settings.DJ_BN_CHUNKED_UPLOAD_CHUNK_SIZE,
+    }
+
+
+def count_open_chunked_uploads(identity: str | None) -> int:
+    """The number of uploads in progress started by the uploader `identity`."""
+    count = 0
+    for metadata_path in get_upload_dir().glob("*.json"):
+        if not UPLOAD_ID_PATTERN.match(metadata_path.stem):
+            continue
+        try:
+            metadata = json.loads(metadata_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if metadata.get("identity") == identity:
+            count += 1
+    return count
+
+
+def get_chunked_upload(upload_id: str, user=None) -> dict[str, Any]:
+    """The details of an upload, with its current `offset`.
+
+    Raises:
+        ChunkedUploadError: If the upload doesn't exist or isn't the user's.
+    """
+    metadata_path, part_path = _get_paths(upload_id)
+    try:
+        metadata = json.loads(metadata_path.read_text())
+        offset = part_path.stat().st_size
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        raise ChunkedUploadError(
+            "Upload not found",
+            code="NOT_FOUND",
+            status=404,
+        ) from e
+
+    if metadata["user_id"] != getattr(user, "pk", None):
+        raise ChunkedUploadError("Upload not found", code="NOT_FOUND", status=404)
+
+    return {"upload_id": upload_id, "offset": offset, **metadata}
+
+
+def append_chunk(upload_id: str, offset: int, stream, user=None) -> int:
+    """Appends a chunk to an upload.
+
+    Args:
+        upload_id: The id returned when the upload was started.
+        offset: Where the chunk starts, which must be the current offset.
+        stream: A file-like object to read the chunk from, e.g. the request.
+        user: The user continuing the upload.
+
+    Returns:
+        The new offset.
+
+    Raises:
+        ChunkedUploadError: On an offset mismatch (409, with the current
+            offset), or a chunk larger than the chunk size or the file.
+    """
+    upload = get_chunked_upload(upload_id, user)
+    _check_offset(offset, upload["offset"])
+
+    limit = min(
+        settings.DJ_BN_CHUNKED_UPLOAD_CHUNK_SIZE,
+        upload["size"] - upload["offset"],
+    )
+    # Read the chunk before locking, the client may be slow to send it
+    with tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+    ) as chunk:
+        written = 0
+        while block := stream.read(COPY_BLOCK_SIZE):
+            written += len(block)
+            if written > limit:
+                raise ChunkedUploadError(
+                    f"Chunks may be at most {limit} bytes here",
+                    code="CHUNK_TOO_LARGE",
+                    status=413,
+                    offset=offset,
+                )
+            chunk.write(block)
+        chunk.seek(0)
+
+        metadata_path, part_path = _get_paths(upload_id)
+        with _upload_lock(upload_id):
+            if not metadata_path.exists():
+                # Aborted while the chunk was read
+                raise ChunkedUploadError(
+                    "Upload not found",
+                    code="NOT_FOUND",
+                    status=404,
+                )
+            with part_path.open("ab") as part_file:
+                # Another request may have appended this chunk meanwhile
+                _check_offset(offset, part_file.tell())
+                shutil.copyfileobj(chunk, part_file, COPY_BLOCK_SIZE)
+
+    return offset + written
+
+
+def _check_offset(offset: int, current_offset: int) -> None:
+    if offset != current_offset:
+        raise ChunkedUploadError(
+            "Offset does not match the upload",
+            code="OFFSET_MISMATCH",
+            status=409,
+            offset=current_offset,
+        )
+
+
+@contextmanager
+def _upload_lock(upload_id: str) -> Iterator[None]:
+    """Holds the exclusive lock of an upload, across threads and processes."""
+    lock_path = get_upload_dir() / f"{upload_id}.lock"
+    with lock_path.open("a") as lock_file:
+        # flock on POSIX, so it's held per open file, not per process
+        locks.lock(lock_file, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(lock_file)
+
+
+def finalize_chunked_upload(upload_id: str, user=None) -> UploadedFile:
+    """Turns a complete upload into an uploaded file for processing.
+
+    The caller should call `remove_chunked_upload` once done with the file.
+
+    Raises:
+        ChunkedUploadError: If the upload isn't complete.
+    """
+    upload = get_chunked_upload(upload_id, user)
+    if upload["offset"] != upload["size"]:
+        raise ChunkedUploadError(
+            "Upload is not complete",
+            code="INCOMPLETE",
+            status=409,
+            offset=upload["offset"],
+        )
+
+    _, part_path = _get_paths(upload_id)
+    return UploadedFile(
+        file=part_path.open("rb"),
+        name=upload["filename"],
+        content_type=upload["content_type"],
+        size=upload["size"],
+    )
+
+
+def remove_chunked_upload(upload_id: str) -> None:
+    """Deletes the part file, details and lock file of an upload."""
+    metadata_path, part_path = _get_paths(upload_id)
+    for path in (metadata_path, part_path, part_path.with_suffix(".lock")):
+        path.unlink(missing_ok=True)
+
+
+def cleanup_expired_chunked_uploads() -> int:
+    """Deletes uploads not touched for `DJ_BN_CHUNKED_UPLOAD_EXPIRY` seconds.
+
+    Returns:
+        The number of uploads removed.
+    """
+    expires_before = time.time() - settings.DJ_BN_CHUNKED_UPLOAD_EXPIRY
+    removed = 0
+    for metadata_path in get_upload_dir().glob("*.json"):
+        if not UPLOAD_ID_PATTERN.match(metadata_path.stem):
+            continue
+        part_path = metadata_path.with_suffix(".part")
+        try:
+            last_touched = max(
+                metadata_path.stat().st_mtime,
+                part_path.stat().st_mtime if part_path.exists() else 0,
+            )
+        except FileNotFoundError:
+            continue
+        if last_touched < expires_before:
+            remove_chunked_upload(metadata_path.stem)
+            removed += 1
+
+    if removed:
+        logger.info(
+            event="cleanup_expired_chunked_uploads",
+            msg="Removed expired chunked uploads",
+            data={"count": removed},
+        )
+    return removed
+
+
+def _get_paths(upload_id: str) -> tuple[Path, Path]:
+    if not isinstance(upload_id, str) or not UPLOAD_ID_PATTERN.match(upload_id):
+        raise ChunkedUploadError("Upload not found", code="NOT_FOUND", status=404)
+
+    upload_dir = get_upload_dir()
+    return upload_dir / f"{upload_id}.json", upload_dir / f"{upload_id}.part"
+
@@ -0,0 +1,127 @@
+"""Resolved storage, formatter and handler components for image uploads.
+
+Each component is imported, and the storage instantiated, once per process
+rather than on every upload. Storage backends such as S3 then keep their
+clients and connection pools between requests. The registry is filled when
+the app is ready and reset whenever one of its settings changes, e.g. with
+`override_settings` in tests.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import Any
+
+import structlog
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_blocknote.helpers import get_storage_class
+
+logger = structlog.get_logger(__name__)
+
+# Settings the resolved components depend on
+COMPONENT_SETTINGS = frozenset(
+    {
+        "DJ_BN_IMAGE_STORAGE",
+        "DEFAULT_FILE_STORAGE",
+        "STORAGES",
+        "DJ_BN_IMAGE_FORMATTER",
+        "DJ_BN_IMAGE_URL_HANDLER",
+        "DJ_BN_IMAGE_ENCODER_POLICY",
+    },
+)
+
+DEFAULT_IMAGE_FORMATTER = "django_blocknote.image.convert_image_to_webp"
+
+_components: dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def _resolve(name: str, factory: Callable[[], Any]) -> Any:
+    try:
+        return _components[name]
+    except KeyError:
+        pass
+
+    with _lock:
+        if name not in _components:
+            _components[name] = factory()
+            logger.debug(
+                event="resolve_component",
+                msg="Resolved image upload component",
+                data={"component": name},
+            )
+        return _components[name]
+
+
+def get_image_storage():
+    """The storage instance images are saved to, see `get_storage_class`.
+
+    Raises:
+        ImproperlyConfigured: If no valid storage class is configured.
+    """
+    return _resolve("storage", get_storage_class)
+
+
+def get_image_formatter() -> Callable:
+    """The `DJ_BN_IMAGE_FORMATTER` callable, WebP conversion by default."""
+    return _resolve(
+        "formatter",
+        lambda: import_string(
+            settings.DJ_BN_IMAGE_FORMATTER or DEFAULT_IMAGE_FORMATTER,
+        ),
+    )
+
+
+def get_image_url_handler() -> Callable | None:
+    """The `DJ_BN_IMAGE_URL_HANDLER` callable, or None if not set."""
+    return _resolve(
+        "url_handler",
+        lambda: (
+            import_string(settings.DJ_BN_IMAGE_URL_HANDLER)
+            if settings.DJ_BN_IMAGE_URL_HANDLER
+            else None
+        ),
+    )
+
+
+def get_custom_encoder_policy() -> Callable:
+    """The policy callable named by a dotted `DJ_BN_IMAGE_ENCODER_POLICY`."""
+    return _resolve(
+        "encoder_policy",
+        lambda: import_string(settings.DJ_BN_IMAGE_ENCODER_POLICY),
+    )
+
+
+def load_components() -> None:
+    """Resolves all components up front, called when the app is ready.
+
+    Failures are logged rather than raised, the system checks report them.
+    """
+    for loader in (get_image_storage, get_image_formatter, get_image_url_handler):
+        try:
+            loader()
+        except (ImproperlyConfigured, ImportError):
+            logger.exception(
+                event="load_components_error",
+                msg="Unable to resolve image upload component",
+                data={"component": loader.__name__},
+            )
+
+
+def reset_components() -> None:
+    """Drops all resolved components, they are resolved again on next use."""
+    with _lock:
+        _components.clear()
+
+
+@receiver(setting_changed)
+def reset_components_on_setting_changed(sender, setting, **kwargs):
+    """Reset the registry when a setting a component depends on changes."""
+    if setting in COMPONENT_SETTINGS:
+        reset_components()
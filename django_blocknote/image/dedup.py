@@ -0,0 +1,237 @@
+"""Content-hash lookups for already stored images.
+
+Digests are remembered per uploader, so a user can only be handed back, or
+learn of, images they uploaded themselves. Anonymous uploads are never
+deduplicated.
+
+Each time a stored image is handed out again, its `SharedImage` row in
+the database counts one more use. The unused image cleanup releases a use
+instead of deleting the file while any are left, as another of the
+uploader's documents may still show it. Uses are counted by the path of
+the image's URL, which the cleanup also has, whatever the storage.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F
+
+from django_blocknote.image.components import get_image_storage
+
+logger = structlog.get_logger(__name__)
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_dedup_enabled() -> bool:
+    """Whether uploads are looked up by content hash before processing."""
+    return bool(getattr(settings, "DJ_BN_IMAGE_DEDUP", False))
+
+
+def is_valid_digest(digest: Any) -> bool:
+    """Checks a value is a lowercase hex encoded SHA-256 digest."""
+    return isinstance(digest, str) and bool(SHA256_PATTERN.match(digest))
+
+
+def get_digest_cache_key(digest: str, size: int, owner: Any) -> str:
+    """Generate cache key for a stored image digest of an uploader."""
+    return f"djbn_image_digest_{owner}_{digest}_{size}"
+
+
+def get_image_path(url: str) -> str:
+    """The decoded path of an image URL, shared images are counted by it."""
+    return unquote(urlsplit(url).path)
+
+
+def get_dedup_owner(request) -> Any:
+    """The key digests of the request's uploads are remembered under.
+
+    Returns:
+        The primary key of the authenticated user, or None.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+def share_image(url: str) -> None:
+    """Counts one more use of a stored image handed out again."""
+    # Import here to avoid loading models before the app registry is ready
+    from django_blocknote.models import SharedImage
+
+    shared, created = SharedImage.objects.get_or_create(
+        image_path=get_image_path(url),
+        defaults={"uses": 1},
+    )
+    if not created:
+        SharedImage.objects.filter(pk=shared.pk).update(uses=F("uses") + 1)
+
+
+def release_shared_image(url: str) -> bool:
+    """Releases one use of a shared image, if it has any left.
+
+    Returns:
+        True if the image is still used elsewhere and must be kept.
+    """
+    # Import here to avoid loading models before the app registry is ready
+    from django_blocknote.models import SharedImage
+
+    with transaction.atomic():
+        shared = (
+            SharedImage.objects.select_for_update()
+            .filter(image_path=get_image_path(url))
+            .first()
+        )
+        if shared is None:
+            return False
+        if shared.uses > 1:
+            SharedImage.objects.filter(pk=shared.pk).update(uses=F("uses") - 1)
+        else:
+            shared.delete()
+    return True
+
+
+def compute_image_digest(uploaded_file) -> str:
+    """Computes the SHA-256 hex digest of an uploaded file.
+
+    The file is read in chunks so large uploads that Django has spooled to
+    disk are not pulled into memory. The file position is reset afterwards
+    so the file can be verified and converted as normal.
+
+    Args:
+        uploaded_file: A Django ``UploadedFile``.
+
+    Returns:
+        The lowercase hex digest of the original file bytes.
+    """
+    sha256 = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        sha256.update(chunk)
+    uploaded_file.seek(0)
+    return sha256.hexdigest()
+
+
+def find_existing_image(
+    digest: str,
+    size: int,
+    owner: Any = None,
+) -> dict[str, Any] | None:
+    """Looks up a previously stored image by the digest of its original bytes.
+
+    A hit is only returned when the stored file still exists and is not in
+    the middle of being removed. Any pending removal of the file is cancelled
+    instead, otherwise one more use of the file is counted, as the image is
+    about to be referenced again.
+
+    Args:
+        digest: SHA-256 hex digest of the original upload.
+        size: Size of the original upload in bytes.
+        owner: The uploader, from `get_dedup_owner`. None never hits.
+
+    Returns:
+        The stored record (at least ``url`` and ``name``) or None on a miss.
+    """
+    if owner is None or not is_dedup_enabled() or not is_valid_digest(digest):
+        return None
+
+    cache_key = get_digest_cache_key(digest, size, owner)
+    record = cache.get(cache_key)
+    if record is None:
+        return None
+
+    try:
+        storage = get_image_storage()
+        file_exists = storage.exists(record["name"])
+    except (ImproperlyConfigured, KeyError):
+        logger.exception(
+            event="find_existing_image_error",
+            msg="Unable to check stored image for digest",
+            data={"cache_key": cache_key},
+        )
+        return None
+
+    revived_count = _revive_pending_removal(record["url"]) if file_exists else None
+    if revived_count is None:
+        cache.delete(cache_key)
+        logger.debug(
+            event="find_existing_image_stale",
+            msg="Stored image for digest is gone or being removed",
+            data={"cache_key": cache_key, "url": record["url"]},
+        )
+        return None
+
+    # A cancelled removal gives the reference back, nothing new to count
+    if not revived_count:
+        share_image(record["url"])
+    logger.debug(
+        event="find_existing_image_hit",
+        msg="Found stored image for digest",
+        data={"cache_key": cache_key, "url": record["url"]},
+    )
+    return record
+
+
+def remember_image(  # noqa: PLR0913
+    digest: str,
+    size: int,
+    name: str,
+    url: str,
+    owner: Any = None,
+    **extra,
+) -> None:
+    """Records where the image with the given original digest was stored.
+
+    Args:
+        digest: SHA-256 hex digest of the original upload.
+        size: Size of the original upload in bytes.
+        name: The storage name the image was saved under.
+        url: The public URL of the stored image.
+        owner: The uploader, from `get_dedup_owner`. None is not remembered.
+        **extra: Any additional details to return on a later hit.
+    """
+    if owner is None or not is_dedup_enabled() or not is_valid_digest(digest):
+        return
+
+    timeout = getattr(settings, "DJ_BN_IMAGE_DEDUP_TIMEOUT", None)
+    cache.set(
+        get_digest_cache_key(digest, size, owner),
+        {"name": name, "url": url, **extra},
+        timeout,
+    )
+
+
+def _revive_pending_removal(url: str) -> int | None:
+    """Cancels a queued removal of an image that is being reused.
+
+    Returns:
+        The number of removals cancelled, or None if the image has already
+        been claimed for deletion, in which case it can't be reused.
+    """
+    # Import here to avoid loading models before the app registry is ready
+    from django_blocknote.models import UnusedImageURLS
+
+    pending = UnusedImageURLS.objects.filter(
+        image_url__endswith=url,
+        deleted__isnull=True,
+    )
+    if pending.filter(processing__isnull=False).exists():
+        return None
+
+    revived_count, _ = pending.delete()
+    if revived_count:
+        logger.info(
+            event="image_removal_cancelled",
+            msg="Cancelled pending removal of a reused image",
+            data={"url": url, "count": revived_count},
+        )
+    return revived_count
@@ -0,0 +1,317 @@
+"""WebP encoder selection for uploaded images."""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any
+
+import structlog
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from django_blocknote.image.components import get_custom_encoder_policy
+from django_blocknote.image.info import record_image_info
+from django_blocknote.image.timing import annotate_stage
+
+logger = structlog.get_logger(__name__)
+
+# Image classes used by the adaptive policy
+PHOTO = "photo"
+SCREENSHOT = "screenshot"
+ALPHA = "alpha"
+ANIMATION = "animation"
+
+# Image.info keys holding metadata, dropped before encoding
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "icc_profile", "photoshop")
+
+# Speed presets: WebP `method` (0 fast - 6 small), lossless effort (0-100)
+# and AVIF `speed` (10 fast - 0 small)
+ENCODER_PRESETS: dict[str, dict[str, int]] = {
+    "fast": {"method": 2, "lossless_effort": 25, "avif_speed": 8},
+    "balanced": {"method": 4, "lossless_effort": 50, "avif_speed": 6},
+    "small": {"method": 6, "lossless_effort": 80, "avif_speed": 4},
+}
+
+
+def open_output_stream() -> IO[bytes]:
+    """Opens a stream for encoded output.
+
+    The stream stays in memory up to `DJ_BN_IMAGE_SPOOL_MAX_SIZE` bytes and
+    rolls over to a temporary file on disk beyond that.
+    """
+    return SpooledTemporaryFile(  # noqa: SIM115
+        max_size=settings.DJ_BN_IMAGE_SPOOL_MAX_SIZE,
+    )
+
+
+def prepare_image(img: Image.Image) -> dict[str, Any]:
+    """Applies the EXIF orientation and strips metadata, in place.
+
+    Phone photos store their rotation as an EXIF tag. Applying it to the
+    pixels means the encoded image is upright without any metadata, and
+    viewers never need to rotate it. EXIF, XMP and other metadata blocks are
+    dropped. The ICC profile is kept only with `DJ_BN_IMAGE_KEEP_ICC_PROFILE`.
+
+    Args:
+        img: The opened still image.
+
+    Returns:
+        Save options carrying the metadata that is kept.
+    """
+    ImageOps.exif_transpose(img, in_place=True)
+
+    icc_profile = img.info.get("icc_profile")
+    for key in METADATA_KEYS:
+        img.info.pop(key, None)
+
+    if icc_profile and settings.DJ_BN_IMAGE_KEEP_ICC_PROFILE:
+        return {"icc_profile": icc_profile}
+    return {}
+
+
+def classify_image(img: Image.Image) -> str:
+    """Classifies an image to choose how it is encoded.
+
+    Args:
+        img: The opened image.
+
+    Returns:
+        One of `ANIMATION`, `ALPHA` (has visible transparency), `SCREENSHOT`
+        (at most `DJ_BN_SCREENSHOT_MAX_COLORS` distinct colours) or `PHOTO`.
+    """
+    if getattr(img, "is_animated", False):
+        return ANIMATION
+
+    if _has_transparency(img):
+        return ALPHA
+
+    max_colors = settings.DJ_BN_SCREENSHOT_MAX_COLORS
+    # getcolors gives up and returns None as soon as max_colors is exceeded
+    sample = img if img.mode in ("RGB", "L", "P") else img.convert("RGB")
+    if sample.getcolors(maxcolors=max_colors) is not None:
+        return SCREENSHOT
+
+    return PHOTO
+
+
+def legacy_policy(img: Image.Image, image_size: int) -> dict[str, Any]:
+    """Lossy encoding at a quality chosen by the original file size."""
+    return {
+        "mode": "RGB",
+        "quality": _determine_quality(image_size),
+        "method": 6,
+    }
+
+
+def adaptive_policy(img: Image.Image, image_size: int) -> dict[str, Any]:
+    """Chooses lossless, near-lossless or lossy encoding by image class.
+
+    Screenshots and other flat graphics are encoded losslessly, which is
+    both smaller and sharper for them. Images with transparency keep their
+    alpha channel and are encoded near-losslessly. Photos and animations are
+    encoded lossy at `DJ_BN_IMAGE_QUALITY`.
+
+    Pillow does not expose libwebp's near-lossless preprocessing, so
+    near-lossless is lossy encoding at `DJ_BN_IMAGE_NEAR_LOSSLESS_QUALITY`
+    with a lossless alpha channel.
+    """
+    preset = ENCODER_PRESETS[settings.DJ_BN_IMAGE_ENCODER_PRESET]
+    image_class = classify_image(img)
+
+    match image_class:
+        case "screenshot":
+            options = {
+                "mode": "RGB",
+                "lossless": True,
+                "quality": preset["lossless_effort"],
+                "method": preset["method"],
+            }
+        case "alpha":
+            options = {
+                "mode": "RGBA",
+                "quality": settings.DJ_BN_IMAGE_NEAR_LOSSLESS_QUALITY,
+                "alpha_quality": 100,
+                "method": preset["method"],
+            }
+        case _:
+            options = {
+                "mode": "RGB",
+                "quality": settings.DJ_BN_IMAGE_QUALITY,
+                "method": preset["method"],
+            }
+
+    logger.debug(
+        event="adaptive_policy",
+        msg="Chose encoder options",
+        data={
+            "image_class": image_class,
+            "options": options,
+        },
+    )
+    return options
+
+
+def get_encoder_options(img: Image.Image, image_size: int) -> dict[str, Any]:
+    """Gets the WebP save options for an image from the configured policy.
+
+    `DJ_BN_IMAGE_ENCODER_POLICY` is "adaptive", "legacy" or the dotted path
+    to a callable with the same signature as `adaptive_policy`. Policies
+    return Pillow WebP save options, plus an optional `mode` the image is
+    converted to before encoding (default "RGB").
+
+    Args:
+        img: The opened image.
+        image_size: The size of the original upload in bytes.
+
+    Returns:
+        A dict of encoder options.
+    """
+    match settings.DJ_BN_IMAGE_ENCODER_POLICY:
+        case "adaptive":
+            policy = adaptive_policy
+        case "legacy":
+            policy = legacy_policy
+        case _:
+            policy = get_custom_encoder_policy()
+
+    return policy(img, image_size)
+
+
+def encode_webp(img: Image.Image, image_size: int) -> IO[bytes]:
+    """Encodes a still image to WebP using the configured encoder policy.
+
+    The image is first turned upright and stripped of metadata, see
+    `prepare_image`. Its dimensions and placeholder are recorded for the
+    upload response while it is decoded.
+
+    With `DJ_BN_IMAGE_ENCODER_CANDIDATES` enabled, lossless and
+    near-lossless images are also encoded the other way. The smaller result
+    is kept. The second encode only runs when it is expected to finish within
+    `DJ_BN_IMAGE_ENCODER_TIME_BUDGET` seconds, judging by the first.
+
+    Args:
+        img: The opened image.
+        image_size: The size of the original upload in bytes.
+
+    Returns:
+        The encoded image stream, positioned at the start. The caller is
+        responsible for closing the stream.
+    """
+    metadata = prepare_image(img)
+    record_image_info(img)
+    options = {**get_encoder_options(img, image_size), **metadata}
+    mode = options.pop("mode", "RGB")
+    if img.mode != mode:
+        img = img.convert(mode)
+
+    started = time.perf_counter()
+    image_stream = _encode_candidate(img, options)
+    elapsed = time.perf_counter() - started
+
+    alternative = _alternative_options(options)
+    if (
+        alternative is None
+        or not settings.DJ_BN_IMAGE_ENCODER_CANDIDATES
+        or elapsed * 2 > settings.DJ_BN_IMAGE_ENCODER_TIME_BUDGET
+    ):
+        annotate_stage(**describe_encoder_options(options))
+        return image_stream
+
+    candidate_stream = _encode_candidate(img, alternative)
+    primary_size = image_stream.seek(0, 2)
+    candidate_size = candidate_stream.seek(0, 2)
+    logger.debug(
+        event="encode_webp_candidates",
+        msg="Compared encoder candidates",
+        data={
+            "primary_size": primary_size,
+            "candidate_size": candidate_size,
+            "lossless": options.get("lossless", False),
+        },
+    )
+
+    if candidate_size < primary_size:
+        image_stream, candidate_stream = candidate_stream, image_stream
+        options = alternative
+    annotate_stage(candidates=2, **describe_encoder_options(options))
+    candidate_stream.close()
+    image_stream.seek(0)
+    return image_stream
+
+
+def describe_encoder_options(options: dict[str, Any]) -> dict[str, Any]:
+    """The encoder choices worth reporting in the upload timings."""
+    return {
+        "quality": options.get("quality"),
+        "lossless": options.get("lossless", False),
+        "method": options.get("method"),
+    }
+
+
+def _encode_candidate(img: Image.Image, options: dict[str, Any]) -> IO[bytes]:
+    image_stream = open_output_stream()
+    img.save(image_stream, format="WEBP", **options)
+    image_stream.seek(0)
+    return image_stream
+
+
+def _alternative_options(options: dict[str, Any]) -> dict[str, Any] | None:
+    """The other encoding worth trying for lossless and near-lossless images.
+
+    Plain lossy (photo) encoding has no alternative, lossless encodes of
+    photos are always larger.
+    """
+    near_lossless_quality = settings.DJ_BN_IMAGE_NEAR_LOSSLESS_QUALITY
+
+    if options.get("lossless"):
+        return {
+            **options,
+            "lossless": False,
+            "quality": near_lossless_quality,
+            "alpha_quality": 100,
+        }
+
+    if options.get("quality", 0) >= near_lossless_quality:
+        preset = ENCODER_PRESETS[settings.DJ_BN_IMAGE_ENCODER_PRESET]
+        return {
+            **options,
+            "lossless": True,
+            "quality": preset["lossless_effort"],
+        }
+
+    return None
+
+
+def _has_transparency(img: Image.Image) -> bool:
+    if img.mode == "P":
+        return "transparency" in img.info
+    if img.mode not in ("RGBA", "LA", "PA"):
+        return False
+    alpha_min, _ = img.getchannel("A").getextrema()
+    return alpha_min < 255
+
+
+def _determine_quality(image_size: int) -> int:
+    """Determines the optimal WebP image quality level based on file size.
+
+    This function uses a binary search algorithm (`bisect`) to efficiently
+    find the appropriate quality level based on pre-defined file size thresholds.
+
+    Args:
+        image_size: The size of the original image in bytes.
+
+    Returns:
+        The recommended quality level for WebP compression (1-100). Lower
+        values mean smaller file size but potentially lower visual quality.
+    """
+
+    # File size thresholds (in bytes) and corresponding quality levels
+    thresholds = [500_000, 1_000_000, 2_000_000, 10_000_000]
+    qualities = [30, 20, 10, 5, 3]  # 3 is the default for sizes over 10 MB
+
+    # Find the index where image_size would be inserted to maintain sorted order
+    index = bisect(thresholds, image_size)
+    # Return the corresponding quality level
+    return qualities[index]
@@ -0,0 +1,111 @@
+"""Dimensions and placeholders of uploaded images, for shift-free layout."""
+
+from __future__ import annotations
+
+import base64
+from contextvars import ContextVar
+from io import BytesIO
+from typing import Any
+
+import structlog
+from django.conf import settings
+from PIL import ExifTags, Image
+
+logger = structlog.get_logger(__name__)
+
+# Set by the encoder while the image is decoded, read back by the upload
+_image_info: ContextVar[dict[str, Any] | None] = ContextVar(
+    "djbn_image_info",
+    default=None,
+)
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def make_placeholder(img: Image.Image) -> str:
+    """Encodes a tiny WebP version of an image as a data URI.
+
+    The placeholder fits within `DJ_BN_IMAGE_PLACEHOLDER_SIZE` pixels, and
+    is typically 100-200 bytes. It is meant to be scaled up with a blur
+    while the image itself loads.
+
+    Args:
+        img: The decoded, upright image.
+
+    Returns:
+        A `data:image/webp;base64,...` URI.
+    """
+    max_size = settings.DJ_BN_IMAGE_PLACEHOLDER_SIZE
+    width, height = img.size
+    scale = max_size / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+    # Resize first so only the tiny image is converted
+    thumbnail = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    has_alpha = "A" in thumbnail.getbands() or "transparency" in thumbnail.info
+    thumbnail = thumbnail.convert("RGBA" if has_alpha else "RGB")
+
+    stream = BytesIO()
+    thumbnail.save(stream, format="WEBP", quality=30)
+    encoded = base64.b64encode(stream.getvalue()).decode("ascii")
+    return f"data:image/webp;base64,{encoded}"
+
+
+def describe_image(img: Image.Image) -> dict[str, Any]:
+    """The width, height and, if enabled, the placeholder of a decoded image."""
+    width, height = img.size
+    info: dict[str, Any] = {"width": width, "height": height}
+    if settings.DJ_BN_IMAGE_PLACEHOLDER:
+        info["placeholder"] = make_placeholder(img)
+    return info
+
+
+def record_image_info(img: Image.Image) -> None:
+    """Records the details of the image being converted for this upload.
+
+    Called by the encoder while the image is decoded, so placeholders cost
+    no extra decode.
+    """
+    _image_info.set(describe_image(img))
+
+
+def pop_image_info() -> dict[str, Any] | None:
+    """Returns and clears the details recorded for the current upload."""
+    info = _image_info.get()
+    _image_info.set(None)
+    return info
+
+
+def read_image_info(image_file) -> dict[str, Any]:
+    """Reads the displayed width and height of an image from its headers.
+
+    Used when the image was not converted by the encoder, for example with
+    `DJ_BN_FORMAT_IMAGE` off or a custom formatter. No pixel data is decoded,
+    so there is no placeholder.
+
+    Args:
+        image_file: The uploaded image file.
+
+    Returns:
+        A dict with `width` and `height`, or an empty dict if the headers
+        can't be read.
+    """
+    try:
+        image_file.seek(0)
+        # Not closed, which would also close the upload
+        img = Image.open(image_file)
+        width, height = img.size
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+        image_file.seek(0)
+    except (OSError, SyntaxError, ValueError):
+        logger.exception(
+            event="read_image_info",
+            msg="Unable to read image dimensions",
+            data={},
+        )
+        return {}
+
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    return {"width": width, "height": height}
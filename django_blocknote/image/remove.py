@@ -11,6 +11,11 @@ from django.db import (
 )
 from django.utils import timezone
 from django_blocknote.models import UnusedImageURLS
+from django_blocknote.image.dedup import release_shared_image
+from django_blocknote.image.variants import (
+    delete_image_variants,
+    resolve_negotiated_image_url,
+)
 import urllib.parse
 import uuid
 
@@ -31,66 +36,106 @@ def process_image_urls(image_urls: list[Any], user=None) -> dict[str, Any]:
         # Validate and clean URLs
         validation_result = validate_image_urls(image_urls)
         if not validation_result["valid_urls"]:
-            return {
-                "success": False,
-                "error": {
-                    "message": "No valid image URLs found",
-                    "code": "NO_VALID_URLS",
-                    "details": {
-                        "total_provided": len(image_urls),
-                        "validation_errors": validation_result["errors"],
-                    },
-                },
-                "status_code": 400,
-            }
-        valid_urls = validation_result["valid_urls"]
-        validation_warnings = validation_result["errors"]
+            return _no_valid_urls_result(image_urls, validation_result)
 
         # Save URLs to database - pass the user
-        save_result = save_urls_to_database(valid_urls, user)
+        save_result = save_urls_to_database(validation_result["valid_urls"], user)
 
-        # Build success response
-        response_data = {
-            "success": {
-                "message": "Image URLs processed successfully",
-                "total_provided": len(image_urls),
-                "valid_urls": len(valid_urls),
-                "created_count": save_result["created_count"],
-                "duplicate_count": save_result["duplicate_count"],
-                "processing_time": save_result["processing_time"],
-            },
-        }
+        return _processed_urls_result(image_urls, validation_result, save_result)
 
-        # Add warnings if any validation issues occurred
-        if validation_warnings:
-            response_data["success"]["warnings"] = validation_warnings
-            response_data["success"]["warning_count"] = len(validation_warnings)
+    except Exception as e:
+        return _processing_error_result(e)
 
-        if save_result["errors"]:
-            response_data["success"]["save_errors"] = save_result["errors"]
-            response_data["success"]["save_error_count"] = len(save_result["errors"])
 
-        return {  # noqa: TRY300
-            "success": True,
-            "data": response_data,
-            "status_code": 201,  # Created
-        }
+async def aprocess_image_urls(image_urls: list[Any], user=None) -> dict[str, Any]:
+    """
+    Async version of `process_image_urls`, using the async ORM.
+    """
+    try:
+        validation_result = validate_image_urls(image_urls)
+        if not validation_result["valid_urls"]:
+            return _no_valid_urls_result(image_urls, validation_result)
 
-    except Exception as e:
-        logger.exception(
-            event="process_image_urls_error",
-            msg="Error in process_image_urls",
-            data={"error": str(e)},
+        save_result = await asave_urls_to_database(
+            validation_result["valid_urls"],
+            user,
         )
-        return {
-            "success": False,
-            "error": {
-                "message": "Failed to process image URLs",
-                "code": "PROCESSING_ERROR",
-                "details": str(e),
+
+        return _processed_urls_result(image_urls, validation_result, save_result)
+
+    except Exception as e:
+        return _processing_error_result(e)
+
+
+def _no_valid_urls_result(
+    image_urls: list[Any],
+    validation_result: dict[str, list],
+) -> dict[str, Any]:
+    return {
+        "success": False,
+        "error": {
+            "message": "No valid image URLs found",
+            "code": "NO_VALID_URLS",
+            "details": {
+                "total_provided": len(image_urls),
+                "validation_errors": validation_result["errors"],
             },
-            "status_code": 500,
-        }
+        },
+        "status_code": 400,
+    }
+
+
+def _processed_urls_result(
+    image_urls: list[Any],
+    validation_result: dict[str, list],
+    save_result: dict[str, Any],
+) -> dict[str, Any]:
+    valid_urls = validation_result["valid_urls"]
+    validation_warnings = validation_result["errors"]
+
+    # Build success response
+    response_data = {
+        "success": {
+            "message": "Image URLs processed successfully",
+            "total_provided": len(image_urls),
+            "valid_urls": len(valid_urls),
+            "created_count": save_result["created_count"],
+            "duplicate_count": save_result["duplicate_count"],
+            "processing_time": save_result["processing_time"],
+        },
+    }
+
+    # Add warnings if any validation issues occurred
+    if validation_warnings:
+        response_data["success"]["warnings"] = validation_warnings
+        response_data["success"]["warning_count"] = len(validation_warnings)
+
+    if save_result["errors"]:
+        response_data["success"]["save_errors"] = save_result["errors"]
+        response_data["success"]["save_error_count"] = len(save_result["errors"])
+
+    return {
+        "success": True,
+        "data": response_data,
+        "status_code": 201,  # Created
+    }
+
+
+def _processing_error_result(error: Exception) -> dict[str, Any]:
+    logger.exception(
+        event="process_image_urls_error",
+        msg="Error in process_image_urls",
+        data={"error": str(error)},
+    )
+    return {
+        "success": False,
+        "error": {
+            "message": "Failed to process image URLs",
+            "code": "PROCESSING_ERROR",
+            "details": str(error),
+        },
+        "status_code": 500,
+    }
 
 
 def validate_image_urls(image_urls: list[Any]) -> dict[str, list]:
@@ -123,6 +168,9 @@ def validate_image_urls(image_urls: list[Any]) -> dict[str, list]:
                 errors.append(f"Index {i}: Failed to decode URL - {decode_error!s}")
                 continue
 
+            # URLs of the variant serving view point at a stored image
+            decoded_url = resolve_negotiated_image_url(decoded_url, default_storage)
+
             # Check if it's a valid media URL (using decoded version)
             if not is_valid_media_url(decoded_url):
                 errors.append(f"Index {i}: Invalid media URL format")
@@ -283,42 +331,95 @@ def save_urls_to_database(valid_urls: list[str], user=None) -> dict[str, Any]:
         if new_urls:
             created_count = bulk_create_url_records(new_urls, errors, user)
 
-        end_time = timezone.now()
-        processing_time = (end_time - start_time).total_seconds()
+        return _save_result(
+            valid_urls,
+            new_urls,
+            existing_urls,
+            created_count,
+            errors,
+            start_time,
+            user,
+        )
 
-        logger.info(
-            event="database_save_completed",
-            msg="Database save completed",
-            data={
-                "total_urls": len(valid_urls),
-                "new_urls": len(new_urls),
-                "created_count": created_count,
-                "duplicate_count": len(existing_urls),
-                "error_count": len(errors),
-                "processing_time": processing_time,
-                "user_id": user.id if user else None,
-            },
+    except Exception as e:
+        return _save_error_result(e)
+
+
+async def asave_urls_to_database(valid_urls: list[str], user=None) -> dict[str, Any]:
+    """
+    Async version of `save_urls_to_database`.
+    """
+    start_time = timezone.now()
+
+    try:
+        existing_urls = await aget_existing_urls(valid_urls)
+        new_urls = [url for url in valid_urls if url not in existing_urls]
+
+        created_count = 0
+        errors = []
+
+        if new_urls:
+            created_count = await abulk_create_url_records(new_urls, errors, user)
+
+        return _save_result(
+            valid_urls,
+            new_urls,
+            existing_urls,
+            created_count,
+            errors,
+            start_time,
+            user,
         )
 
-        return {
+    except Exception as e:
+        return _save_error_result(e)
+
+
+def _save_result(  # noqa: PLR0913
+    valid_urls: list[str],
+    new_urls: list[str],
+    existing_urls: set,
+    created_count: int,
+    errors: list[str],
+    start_time,
+    user=None,
+) -> dict[str, Any]:
+    processing_time = (timezone.now() - start_time).total_seconds()
+
+    logger.info(
+        event="database_save_completed",
+        msg="Database save completed",
+        data={
+            "total_urls": len(valid_urls),
+            "new_urls": len(new_urls),
             "created_count": created_count,
             "duplicate_count": len(existing_urls),
-            "errors": errors,
-            "processing_time": round(processing_time, 3),
-        }
+            "error_count": len(errors),
+            "processing_time": processing_time,
+            "user_id": user.id if user else None,
+        },
+    )
 
-    except Exception as e:
-        logger.exception(
-            event="database_save_error",
-            msg="Error saving URLs to database",
-            data={"error": str(e)},
-        )
-        return {
-            "created_count": 0,
-            "duplicate_count": 0,
-            "errors": [f"Database error: {e!s}"],
-            "processing_time": 0,
-        }
+    return {
+        "created_count": created_count,
+        "duplicate_count": len(existing_urls),
+        "errors": errors,
+        "processing_time": round(processing_time, 3),
+    }
+
+
+def _save_error_result(error: Exception) -> dict[str, Any]:
+    logger.exception(
+        event="database_save_error",
+        msg="Error saving URLs to database",
+        data={"error": str(error)},
+    )
+    return {
+        "created_count": 0,
+        "duplicate_count": 0,
+        "errors": [f"Database error: {error!s}"],
+        "processing_time": 0,
+    }
 
 
 def get_existing_urls(urls: list[str]) -> set:
@@ -346,6 +447,28 @@ def get_existing_urls(urls: list[str]) -> set:
         return set()
 
 
+async def aget_existing_urls(urls: list[str]) -> set:
+    """
+    Async version of `get_existing_urls`.
+    """
+    try:
+        return {
+            url
+            async for url in UnusedImageURLS.objects.filter(
+                image_url__in=urls,
+                deleted__isnull=True,
+            ).values_list("image_url", flat=True)
+        }
+
+    except Exception:
+        logger.exception(
+            event="existing_urls_check_error",
+            msg="Error checking existing URLs",
+            data={},
+        )
+        return set()
+
+
 def bulk_create_url_records(urls: list[str], errors: list[str], user=None) -> int:
     """
     Bulk create URL records in database.
@@ -395,6 +518,50 @@ def bulk_create_url_records(urls: list[str], errors: list[str], user=None) -> in
         return 0
 
 
+async def abulk_create_url_records(
+    urls: list[str],
+    errors: list[str],
+    user=None,
+) -> int:
+    """
+    Async version of `bulk_create_url_records`.
+
+    Transactions aren't available to async code, so each batch is its own
+    insert. Conflicts are ignored either way, so a partial save is harmless.
+    """
+    try:
+        instances = [UnusedImageURLS(image_url=url, user=user) for url in urls]
+        batch_size = getattr(settings, "DJ_BN_BULK_CREATE_BATCH_SIZE", 50)
+
+        created_instances = await UnusedImageURLS.objects.abulk_create(
+            instances,
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        created_count = len(created_instances)
+
+        logger.debug(
+            event="bulk_create_completed",
+            msg="Bulk create completed",
+            data={
+                "requested_count": len(urls),
+                "created_count": created_count,
+                "batch_size": batch_size,
+                "user_id": user.id if user else None,
+            },
+        )
+
+        return created_count  # noqa: TRY300
+
+    except Exception as e:
+        error_msg = f"Bulk create failed: {e!s}"
+        errors.append(error_msg)
+        logger.exception(
+            event="bulk_create_error", msg="Bulk create error", data={"error": str(e)}
+        )
+        return 0
+
+
 def trigger_cleanup_if_needed() -> None:
     """
     Check if cleanup is needed and trigger background cleanup if threshold reached.
@@ -405,41 +572,34 @@ def trigger_cleanup_if_needed() -> None:
         if not getattr(settings, "DJ_BN_IMAGE_DELETION", False):
             return
 
-        # Get threshold setting
-        threshold = getattr(settings, "DJ_BN_BULK_DELETE_BATCH_SIZE", 20)
-
         # Quick count check (fast query) - only count truly pending ones
         pending_count = UnusedImageURLS.objects.filter(
             deleted__isnull=True,
             processing__isnull=True,  # Not currently being processed
         ).count()
 
-        logger.debug(
-            event="cleanup_threshold_check",
-            msg="Cleanup threshold check",
-            data={
-                "pending_count": pending_count,
-                "threshold": threshold,
-                "cleanup_needed": pending_count >= threshold,
-            },
+        _start_cleanup_if_needed(pending_count)
+
+    except Exception:
+        logger.exception(
+            event="cleanup_trigger_error", msg="Error in cleanup trigger", data={}
         )
 
-        if pending_count >= threshold:
-            # Trigger async cleanup
-            logger.info(
-                event="triggering_async_cleanup",
-                msg="Triggering async cleanup",
-                data={"pending_count": pending_count, "threshold": threshold},
-            )
 
-            # Start cleanup in background thread
-            cleanup_thread = threading.Thread(
-                target=_background_cleanup_batch,
-                args=(threshold,),
-                name="ImageCleanup",
-                daemon=True,
-            )
-            cleanup_thread.start()
+async def atrigger_cleanup_if_needed() -> None:
+    """
+    Async version of `trigger_cleanup_if_needed`.
+    """
+    try:
+        if not getattr(settings, "DJ_BN_IMAGE_DELETION", False):
+            return
+
+        pending_count = await UnusedImageURLS.objects.filter(
+            deleted__isnull=True,
+            processing__isnull=True,
+        ).acount()
+
+        _start_cleanup_if_needed(pending_count)
 
     except Exception:
         logger.exception(
@@ -447,6 +607,38 @@ def trigger_cleanup_if_needed() -> None:
         )
 
 
+def _start_cleanup_if_needed(pending_count: int) -> None:
+    # Get threshold setting
+    threshold = getattr(settings, "DJ_BN_BULK_DELETE_BATCH_SIZE", 20)
+
+    logger.debug(
+        event="cleanup_threshold_check",
+        msg="Cleanup threshold check",
+        data={
+            "pending_count": pending_count,
+            "threshold": threshold,
+            "cleanup_needed": pending_count >= threshold,
+        },
+    )
+
+    if pending_count >= threshold:
+        # Trigger async cleanup
+        logger.info(
+            event="triggering_async_cleanup",
+            msg="Triggering async cleanup",
+            data={"pending_count": pending_count, "threshold": threshold},
+        )
+
+        # Start cleanup in background thread
+        cleanup_thread = threading.Thread(
+            target=_background_cleanup_batch,
+            args=(threshold,),
+            name="ImageCleanup",
+            daemon=True,
+        )
+        cleanup_thread.start()
+
+
 def _background_cleanup_batch(batch_size: int) -> None:
     """
     Background cleanup function that implements claim-and-process pattern.
@@ -760,6 +952,8 @@ def _process_url_deletions(
 def _delete_single_file(image_url: str) -> dict[str, Any]:
     """
     Delete a single file from storage.
+    Files shared by deduplicated uploads release one use instead, and are
+    kept while other documents may still show them.
     Returns:
         Dict with success status, error message, and file info
     """
@@ -768,6 +962,14 @@ def _delete_single_file(image_url: str) -> dict[str, Any]:
         file_path = get_media_file_path(image_url)
         file_size = None
 
+        if release_shared_image(image_url):
+            logger.info(
+                event="shared_file_kept",
+                msg="File is still used by deduplicated uploads, not deleting",
+                data={"image_url": image_url, "file_path": str(file_path)},
+            )
+            return {"success": True, "kept": True, "file_path": str(file_path)}
+
         # Check if file exists and get size
         if default_storage.exists(str(file_path)):
             try:
@@ -775,8 +977,9 @@ def _delete_single_file(image_url: str) -> dict[str, Any]:
             except Exception:
                 pass  # Size not critical, continue with deletion
 
-            # Delete the file
+            # Delete the file and any format variants stored next to it
             default_storage.delete(str(file_path))
+            delete_image_variants(default_storage, str(file_path))
             return {
                 "success": True,
                 "file_size": file_size,
@@ -0,0 +1,242 @@
+"""Per-stage timings of the image upload pipeline.
+
+Each stage of an upload (type guess, verify, digest, encode, save and
+variants) is wrapped in `timed_stage`. When a stage ends, its duration, the
+bytes it read and wrote, and any details such as the chosen quality are
+sent with the `upload_stage_timed` signal:
+
+    from django.dispatch import receiver
+    from django_blocknote.image import upload_stage_timed
+
+    @receiver(upload_stage_timed)
+    def log_slow_stage(sender, stage, duration, **kwargs):
+        ...
+
+With `DJ_BN_UPLOAD_METRICS` enabled, the timings are also collected in
+process memory and exposed in the Prometheus text format by the
+`upload_metrics` view. The view is for staff users, and for scrapers sending
+`Authorization: Bearer <DJ_BN_UPLOAD_METRICS_TOKEN>` when a token is set.
+"""
+
+from __future__ import annotations
+
+import hmac
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+from django.conf import settings
+from django.dispatch import Signal, receiver
+
+logger = structlog.get_logger(__name__)
+
+# Sent with stage, duration, bytes_in, bytes_out, failed and details
+upload_stage_timed = Signal()
+
+# Upper bounds of the duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current_stage: ContextVar[dict[str, Any] | None] = ContextVar(
+    "djbn_upload_stage",
+    default=None,
+)
+
+
+@contextmanager
+def timed_stage(stage: str, bytes_in: int | None = None) -> Iterator[dict]:
+    """Times a stage of the upload pipeline.
+
+    Args:
+        stage: The name of the stage.
+        bytes_in: The number of bytes the stage reads, if known.
+
+    Yields:
+        The stage record, set `bytes_out` on it once known.
+    """
+    record: dict[str, Any] = {
+        "stage": stage,
+        "bytes_in": bytes_in,
+        "bytes_out": None,
+        "failed": False,
+        "details": {},
+    }
+    token = _current_stage.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["failed"] = True
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - started
+        _current_stage.reset(token)
+        logger.debug(
+            event="upload_stage_timed",
+            msg="Upload stage finished",
+            data=record,
+        )
+        # A failing receiver must not fail the upload, or hide its error
+        for receiver, response in upload_stage_timed.send_robust(
+            sender=timed_stage,
+            **record,
+        ):
+            if isinstance(response, Exception):
+                logger.error(
+                    event="upload_stage_receiver_error",
+                    msg="Upload stage receiver failed",
+                    data={
+                        "stage": stage,
+                        "receiver": getattr(receiver, "__qualname__", repr(receiver)),
+                        "error": str(response),
+                    },
+                    exc_info=response,
+                )
+
+
+def annotate_stage(**details: Any) -> None:
+    """Adds details, such as the chosen quality, to the current stage."""
+    record = _current_stage.get()
+    if record is not None:
+        record["details"].update(details)
+
+
+class StageMetrics:
+    """Duration histograms and byte counters per stage, for Prometheus."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[str, dict[str, Any]] = {}
+
+    def observe(self, stage: str, duration: float, **record: Any) -> None:
+        with self._lock:
+            metrics = self._stages.setdefault(
+                stage,
+                {
+                    "buckets": [0] * len(DURATION_BUCKETS),
+                    "count": 0,
+                    "sum": 0.0,
+                    "failed": 0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                    "quality_sum": 0,
+                    "quality_count": 0,
+                },
+            )
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    metrics["buckets"][index] += 1
+            metrics["count"] += 1
+            metrics["sum"] += duration
+            metrics["failed"] += int(record.get("failed", False))
+            metrics["bytes_in"] += record.get("bytes_in") or 0
+            metrics["bytes_out"] += record.get("bytes_out") or 0
+            quality = record.get("details", {}).get("quality")
+            if quality is not None:
+                metrics["quality_sum"] += quality
+                metrics["quality_count"] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            stages = {
+                stage: {**metrics, "buckets": list(metrics["buckets"])}
+                for stage, metrics in sorted(self._stages.items())
+            }
+
+        lines = [
+            "# HELP djbn_upload_stage_duration_seconds Duration of upload stages.",
+            "# TYPE djbn_upload_stage_duration_seconds histogram",
+        ]
+        for stage, metrics in stages.items():
+            for bound, count in zip(DURATION_BUCKETS, metrics["buckets"]):
+                lines.append(
+                    f'djbn_upload_stage_duration_seconds_bucket{{stage="{stage}",'
+                    f'le="{bound}"}} {count}',
+                )
+            lines.extend(
+                [
+                    f'djbn_upload_stage_duration_seconds_bucket{{stage="{stage}",'
+                    f'le="+Inf"}} {metrics["count"]}',
+                    f'djbn_upload_stage_duration_seconds_sum{{stage="{stage}"}} '
+                    f"{metrics['sum']}",
+                    f'djbn_upload_stage_duration_seconds_count{{stage="{stage}"}} '
+                    f"{metrics['count']}",
+                ],
+            )
+
+        counters = [
+            ("failed", "djbn_upload_stage_failures_total", "Failed upload stages."),
+            ("bytes_in", "djbn_upload_stage_bytes_in_total", "Bytes read by stages."),
+            (
+                "bytes_out",
+                "djbn_upload_stage_bytes_out_total",
+                "Bytes written by stages.",
+            ),
+        ]
+        for key, name, help_text in counters:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+            lines.extend(
+                f'{name}{{stage="{stage}"}} {metrics[key]}'
+                for stage, metrics in stages.items()
+            )
+
+        lines.extend(
+            [
+                "# HELP djbn_upload_encode_quality Chosen encoder qualities.",
+                "# TYPE djbn_upload_encode_quality summary",
+            ],
+        )
+        for stage, metrics in stages.items():
+            if metrics["quality_count"]:
+                lines.extend(
+                    [
+                        f'djbn_upload_encode_quality_sum{{stage="{stage}"}} '
+                        f"{metrics['quality_sum']}",
+                        f'djbn_upload_encode_quality_count{{stage="{stage}"}} '
+                        f"{metrics['quality_count']}",
+                    ],
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics()
+
+
+def render_prometheus_metrics() -> str:
+    """The collected upload metrics in the Prometheus text format."""
+    return stage_metrics.render()
+
+
+def has_permission_to_read_metrics(request) -> bool:
+    """Checks the request may read the upload metrics.
+
+    Staff users may, and so may requests bearing the
+    `DJ_BN_UPLOAD_METRICS_TOKEN`, if one is set.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+
+    token = settings.DJ_BN_UPLOAD_METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    return bool(
+        token
+        and scheme.lower() == "bearer"
+        and hmac.compare_digest(credentials.strip().encode(), token.encode()),
+    )
+
+
+@receiver(upload_stage_timed)
+def collect_stage_metrics(sender, stage, duration, **kwargs):
+    """Collect stage timings for the exporter, if `DJ_BN_UPLOAD_METRICS`."""
+    if settings.DJ_BN_UPLOAD_METRICS:
+        stage_metrics.observe(stage, duration, **kwargs)
@@ -2,89 +2,305 @@
 
 from __future__ import annotations
 
-from bisect import bisect
-from io import BytesIO
-from pathlib import Path
+import warnings
+from pathlib import Path, PurePosixPath
+from typing import IO, Any
 
 import filetype
 import structlog
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.files.uploadedfile import UploadedFile
-from django.utils.module_loading import (
-    import_string,
-)
 from PIL import (
     Image,
+    ImageChops,
     ImageSequence,
     UnidentifiedImageError,
 )
 
 from django_blocknote.exceptions import (
+    ImageTooLargeError,
     InvalidImageTypeError,
     PillowImageError,
 )
-from django_blocknote.helpers import get_storage_class
+from django_blocknote.image.components import (
+    get_image_formatter,
+    get_image_storage,
+    get_image_url_handler,
+)
+from django_blocknote.image.dedup import (
+    compute_image_digest,
+    find_existing_image,
+    get_dedup_owner,
+    is_dedup_enabled,
+    remember_image,
+)
+from django_blocknote.image.encoder import (
+    describe_encoder_options,
+    encode_webp,
+    get_encoder_options,
+    open_output_stream,
+)
+from django_blocknote.image.info import (
+    pop_image_info,
+    read_image_info,
+    record_image_info,
+)
+from django_blocknote.image.timing import annotate_stage, timed_stage
+from django_blocknote.image.variants import (
+    create_image_variants,
+    get_negotiated_image_url,
+)
 
 logger = structlog.get_logger(__name__)
 
 
-def convert_image_to_webp(uploaded_file: UploadedFile) -> tuple[str, BytesIO]:
+def convert_image_to_webp(uploaded_file: UploadedFile) -> tuple[str, IO[bytes]]:
     """
     Converts an uploaded  validated image to WEBP format.
 
+    Encoder options come from the policy set by `DJ_BN_IMAGE_ENCODER_POLICY`.
+    Still images are rotated upright from their EXIF orientation and stored
+    without metadata.
+    The encoded output is written to a spooled temporary file, which stays in
+    memory up to `DJ_BN_IMAGE_SPOOL_MAX_SIZE` bytes and rolls over to disk
+    beyond that. Peak memory per upload is then bounded by the decoded bitmap
+    plus the spool threshold, however large the encoded image is.
+
     Returns:
         A tuple containing the original filename with a .webp extension and
-        the BytesIO stream of the converted image.
+        the file-like stream of the converted image, positioned at the start.
+        The caller is responsible for closing the stream.
     """
 
-    with uploaded_file.open("rb") as image_file:
-        img = Image.open(image_file)
+    # The upload is left open for format variants, which are encoded from it
+    # once the image is saved. Django closes it when the request finishes.
+    image_file = uploaded_file.open("rb")
+    img = Image.open(image_file)
 
-        # Handle multi-frame images (like GIFs or animated WebPs)
-        if getattr(img, "is_animated", False):
-            for i, frame in enumerate(ImageSequence.Iterator(img)):
-                if getattr(frame, "mode", None) != "RGB":
-                    img.seek(i)
-                    img.paste(frame.convert("RGB"))
+    # Handle multi-frame images (like GIFs or animated WebPs)
+    if getattr(img, "is_animated", False) and _within_animation_budget(img):
+        options = get_encoder_options(img, uploaded_file.size)
+        options.pop("mode", None)
+        annotate_stage(animated=True, **describe_encoder_options(options))
+        image_stream = open_output_stream()
+        _save_animated_webp(img, image_stream, **options)
 
-        # Handle single-frame images (like JPEG, PNG)
-        elif getattr(img, "mode", None) != "RGB":
-            img = img.convert("RGB")
+    # Handle single-frame images (like JPEG, PNG), and animations over
+    # budget, which are reduced to their first frame
+    else:
+        image_stream = encode_webp(img, uploaded_file.size)
 
-        image_stream = BytesIO()
-        quality = _determine_quality(uploaded_file.size)
-        img.save(image_stream, format="WEBP", quality=quality, method=6)
-        image_stream.seek(0)
+    # Release the decoded bitmap before the output is streamed to storage.
+    # Not img.close(), which would also close the upload.
+    del img
+    image_stream.seek(0)
+    image_file.seek(0)
 
-        filename = Path(uploaded_file.name)
-        webp_filename = filename.with_suffix(".webp")
+    filename = Path(uploaded_file.name)
+    webp_filename = filename.with_suffix(".webp")
 
-        return str(webp_filename), image_stream
+    return str(webp_filename), image_stream
 
 
-def _determine_quality(image_size: int) -> int:
-    """Determines the optimal WebP image quality level based on file size.
+def _within_animation_budget(img: Image.Image) -> bool:
+    """Checks whether an animation is small enough to be kept animated.
 
-    This function uses a binary search algorithm (`bisect`) to efficiently
-    find the appropriate quality level based on pre-defined file size thresholds.
+    Only the image headers are used, so no frames are decoded.
+
+    Budgets (from settings):
+        DJ_BN_ANIMATION_MAX_FRAMES: Maximum number of frames.
+        DJ_BN_ANIMATION_MAX_PIXELS: Maximum width * height summed over all
+            frames.
 
     Args:
-        image_size: The size of the original image in bytes.
+        img: The opened animated image.
 
     Returns:
-        The recommended quality level for WebP compression (1-100). Lower
-        values mean smaller file size but potentially lower visual quality.
+        True if the animation should be transcoded as an animation, False if
+        it should be reduced to a still of its first frame.
+    """
+    max_frames = settings.DJ_BN_ANIMATION_MAX_FRAMES
+    max_pixels = settings.DJ_BN_ANIMATION_MAX_PIXELS
+
+    n_frames = getattr(img, "n_frames", 1)
+    width, height = img.size
+    total_pixels = width * height * n_frames
+
+    within_budget = not (
+        (max_frames and n_frames > max_frames)
+        or (max_pixels and total_pixels > max_pixels)
+    )
+    if not within_budget:
+        logger.debug(
+            event="animation_over_budget",
+            msg="Animation is over budget, keeping the first frame only",
+            data={
+                "frames": n_frames,
+                "total_pixels": total_pixels,
+                "max_frames": max_frames,
+                "max_pixels": max_pixels,
+            },
+        )
+    return within_budget
+
+
+def _save_animated_webp(img: Image.Image, stream: IO[bytes], **options) -> None:
+    """Transcodes an animated image to an animated WebP.
+
+    Frames are decoded once, in order. A frame identical to the one before it
+    is dropped and its duration added to the previous frame, so static holds
+    cost nothing. The WebP animation encoder stores each remaining frame as
+    the sub-rectangle that changed from the previous one.
+
+    Args:
+        img: The opened animated image (GIF, WebP, APNG...).
+        stream: Where the animated WebP is written.
+        **options: Pillow WebP save options from the encoder policy.
     """
+    frames: list[Image.Image] = []
+    durations: list[int] = []
+    previous = None
+
+    for frame in ImageSequence.Iterator(img):
+        # Loaded first, WebP frames only set their duration once loaded
+        current = frame.convert("RGBA")
+        # GIF frames of 0 ms are shown for 100 ms by browsers
+        duration = frame.info.get("duration") or 100
+
+        if previous is not None and not ImageChops.difference(
+            previous,
+            current,
+        ).getbbox(alpha_only=False):
+            durations[-1] += duration
+            current.close()
+            continue
+
+        frames.append(current)
+        durations.append(duration)
+        previous = current
+
+    record_image_info(frames[0])
 
-    # File size thresholds (in bytes) and corresponding quality levels
-    thresholds = [500_000, 1_000_000, 2_000_000, 10_000_000]
-    qualities = [30, 20, 10, 5, 3]  # 3 is the default for sizes over 10 MB
+    logger.debug(
+        event="save_animated_webp",
+        msg="Transcoding animation",
+        data={
+            "source_frames": getattr(img, "n_frames", 1),
+            "kept_frames": len(frames),
+        },
+    )
+
+    try:
+        frames[0].save(
+            stream,
+            format="WEBP",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=img.info.get("loop", 0),
+            **options,
+        )
+    finally:
+        for frame in frames:
+            frame.close()
 
-    # Find the index where image_size would be inserted to maintain sorted order
-    index = bisect(thresholds, image_size)
-    # Return the corresponding quality level
-    return qualities[index]
+
+def image_precheck(image) -> dict[str, Any]:
+    """Checks an image against the configured budgets using only its headers.
+
+    Runs before any pixel data is decoded, so oversized or hostile images are
+    rejected cheaply. Pillow opens images lazily, reading just enough of the
+    file to learn the dimensions, mode and frame count.
+
+    Budgets (from settings):
+        DJ_BN_MAX_FILE_SIZE: Maximum upload size in bytes.
+        DJ_BN_MAX_PIXELS: Maximum width * height of a single frame.
+        DJ_BN_MAX_FRAMES: Maximum number of frames in an animated image.
+
+    Args:
+        image: The uploaded image file.
+
+    Returns:
+        A dict with the image `width`, `height`, `frames` and `mode`.
+
+    Raises:
+        ImageTooLargeError: If the image exceeds any of the budgets.
+        PillowImageError: If the image headers can't be read.
+    """
+    max_file_size = settings.DJ_BN_MAX_FILE_SIZE
+    max_pixels = settings.DJ_BN_MAX_PIXELS
+    max_frames = settings.DJ_BN_MAX_FRAMES
+
+    if max_file_size and image.size > max_file_size:
+        error_msg = (
+            f"This image file is too large ({image.size} bytes), "
+            f"the maximum is {max_file_size} bytes."
+        )
+        logger.error(error_msg)
+        raise ImageTooLargeError(error_msg)
+
+    try:
+        # Pillow warns (or raises) on its own pixel limit, our budget applies.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(image) as img:
+                width, height = img.size
+                mode = img.mode
+                frames = getattr(img, "n_frames", 1)
+
+    except Image.DecompressionBombError as e:
+        error_msg = "This image file is corrupted or too large to use."
+        logger.exception(
+            event="precheck_image_file",
+            msg=error_msg,
+        )
+        raise ImageTooLargeError(error_msg) from e
+
+    except (OSError, SyntaxError, ValueError) as e:
+        error_msg = "This image file is corrupted."
+        logger.exception(
+            event="precheck_image_file",
+            msg=error_msg,
+        )
+        raise PillowImageError(error_msg, e) from e
+
+    finally:
+        image.seek(0)
+
+    if max_pixels and width * height > max_pixels:
+        error_msg = (
+            f"This image is too large ({width}x{height} pixels), "
+            f"the maximum is {max_pixels} pixels."
+        )
+        logger.error(error_msg)
+        raise ImageTooLargeError(error_msg)
+
+    if max_frames and frames > max_frames:
+        error_msg = (
+            f"This image has too many frames ({frames}), "
+            f"the maximum is {max_frames} frames."
+        )
+        logger.error(error_msg)
+        raise ImageTooLargeError(error_msg)
+
+    logger.debug(
+        event="precheck_image_file",
+        msg="Image is within the configured budgets",
+        data={
+            "width": width,
+            "height": height,
+            "frames": frames,
+            "mode": mode,
+        },
+    )
+
+    return {
+        "width": width,
+        "height": height,
+        "frames": frames,
+        "mode": mode,
+    }
 
 
 def image_verify(image):
@@ -92,14 +308,16 @@ def image_verify(image):
 
     Validates an image file and ensures it falls within the permitted image
     types. The function checks for potential corruption, decompression bombs,
-    and unsupported file formats.
+    and unsupported file formats. Size budgets are checked from the image
+    headers (see `image_precheck`) before the file is verified.
 
     Args:
-        image: The image file to verify. An image file-like object or a filename.
+        image: The uploaded image file to verify.
 
     Raises:
         PillowImageError: If the image is corrupt, too large, or cannot be verified.
         InvalidImageTypeError: If the image has an unsupported file type.
+        ImageTooLargeError: If the image exceeds the size, pixel or frame budget.
     """
     logger.debug(
         event="verify_image_file",
@@ -112,7 +330,8 @@ def image_verify(image):
     permitted_image_types = settings.DJ_BN_PERMITTED_IMAGE_TYPES
 
     # filetype checks the file, not just the extension.
-    kind = filetype.guess(image)
+    with timed_stage("guess"):
+        kind = filetype.guess(image)
 
     match kind:
         case None:
@@ -128,6 +347,8 @@ def image_verify(image):
         logger.error(error_msg)
         raise InvalidImageTypeError(error_msg)
 
+    image_precheck(image)
+
     try:
         logger.debug(
             event="verify_image_file",
@@ -138,7 +359,8 @@ def image_verify(image):
             },
         )
 
-        Image.open(image).verify()
+        with timed_stage("verify", bytes_in=image.size):
+            Image.open(image).verify()
 
         logger.debug(
             event="verify_image_file",
@@ -170,7 +392,9 @@ def image_verify(image):
 def handle_uploaded_image(request):
     """Handles an uploaded image, saving it to storage and returning its URL.
 
-    Leverages a custom URL handler if specified in Django settings.
+    Leverages a custom URL handler if specified in Django settings. When
+    `DJ_BN_IMAGE_DEDUP` is enabled, an upload whose content is already stored
+    returns the existing URL without being converted or saved again.
 
     Args:
         request: The Django request object containing the uploaded file.
@@ -179,10 +403,53 @@ def handle_uploaded_image(request):
     Returns:
         str: The URL where the uploaded image is stored
     """
-    image = request.FILES.get("file", None)
+    return process_uploaded_image(request)["url"]
+
+
+def process_uploaded_image(request, image=None) -> dict[str, Any]:
+    """Handles an uploaded image, returning its URL and layout details.
+
+    As `handle_uploaded_image`, but also returns the `width` and `height` of
+    the image as displayed, and a tiny `placeholder` data URI when the image
+    was converted. These let the editor and viewer reserve space for the
+    image before it loads.
+
+    Args:
+        request: The Django request object containing the uploaded file.
+                Available in `request.FILES["file"]`
+        image: The uploaded file to process, when it is not
+                `request.FILES["file"]`, e.g. one file of a batch.
+
+    Returns:
+        A dict with the image `url`, and `width`, `height` and `placeholder`
+        when known.
+    """
+    if image is None:
+        image = request.FILES.get("file", None)
+    original_image = image
+    pop_image_info()
+
+    original_size = image.size
+    digest = ""
+    dedup_owner = get_dedup_owner(request)
+    if dedup_owner is not None and is_dedup_enabled():
+        with timed_stage("digest", bytes_in=original_size):
+            digest = compute_image_digest(image)
+    if digest and (
+        existing := find_existing_image(digest, original_size, dedup_owner)
+    ):
+        logger.debug(
+            event="handle_uploaded_image_dedup_hit",
+            msg="Image content already stored, reusing URL",
+            data={
+                "digest": digest,
+                "image_url": existing["url"],
+            },
+        )
+        return {key: value for key, value in existing.items() if key != "name"}
 
     try:
-        storage = get_storage_class()
+        storage = get_image_storage()
     except ImproperlyConfigured as e:
         logger.exception(
             event="handle_uploaded_image_storage_error",
@@ -191,76 +458,104 @@ def handle_uploaded_image(request):
                 "error": str(e),
             },
         )
-        return "A valid storage system has not been configured"
-
-    # Get image formatter
-    match getattr(settings, "DJ_BN_IMAGE_FORMATTER", ""):
-        case "":
-            convert_image = convert_image_to_webp
-        case formatter_path:
-            convert_image = import_string(formatter_path)
-
-    # Get URL handler
-    match getattr(settings, "DJ_BN_IMAGE_URL_HANDLER", ""):
-        case "":
-            get_image_url_and_optionally_save = None
-        case handler_path:
-            get_image_url_and_optionally_save = import_string(handler_path)
+        return {"url": "A valid storage system has not been configured"}
+
+    # Image formatter and URL handler, resolved once per process
+    convert_image = get_image_formatter()
+    get_image_url_and_optionally_save = get_image_url_handler()
 
     # Process image formatting
     match (settings.DJ_BN_FORMAT_IMAGE, convert_image):
         case (True, formatter) if formatter:
-            file_name, image = formatter(image)
+            with timed_stage("encode", bytes_in=original_size) as stage:
+                file_name, image = formatter(image)
+                stage["bytes_out"] = _get_stream_size(image)
             logger.debug(
                 event="handle_uploaded_image_formatted",
                 msg="Image converted using custom formatter",
                 data={
-                    "original_name": request.FILES.get("file").name,
+                    "original_name": original_image.name,
                     "new_name": file_name,
                 },
             )
         case _:
             file_name = image.name
 
-    # Handle URL generation and optional saving
-    match get_image_url_and_optionally_save:
-        case None:
-            img_saved = False
-            image_url = file_name
-        case handler:
-            image_url, img_saved = handler(request, file_name, image)
-            logger.debug(
-                event="handle_uploaded_image_custom_handler",
-                msg="Used custom URL handler",
-                data={
-                    "image_url": image_url,
-                    "img_saved": img_saved,
-                },
-            )
+    # Recorded by the encoder, otherwise read from the original's headers
+    image_info = pop_image_info() or read_image_info(original_image)
 
-    # Save to storage if not already saved
-    match img_saved:
-        case False:
-            filename = storage.save(name=image_url, content=image)
-            image_url = storage.url(filename)
-            logger.debug(
-                event="handle_uploaded_image_saved",
-                msg="Image saved to storage",
-                data={
-                    "filename": filename,
-                    "image_url": image_url,
-                },
-            )
-        case True:
-            logger.debug(
-                event="handle_uploaded_image_already_saved",
-                msg="Image already saved by custom handler",
-                data={
-                    "image_url": image_url,
-                },
-            )
-
-    return image_url
+    try:
+        # Handle URL generation and optional saving
+        match get_image_url_and_optionally_save:
+            case None:
+                img_saved = False
+                image_url = str(PurePosixPath(settings.DJ_BN_UPLOAD_PATH, file_name))
+            case handler:
+                image_url, img_saved = handler(request, file_name, image)
+                logger.debug(
+                    event="handle_uploaded_image_custom_handler",
+                    msg="Used custom URL handler",
+                    data={
+                        "image_url": image_url,
+                        "img_saved": img_saved,
+                    },
+                )
+
+        # Save to storage if not already saved
+        match img_saved:
+            case False:
+                image_size = _get_stream_size(image)
+                with timed_stage("save", bytes_in=image_size) as stage:
+                    filename = storage.save(name=image_url, content=image)
+                    stage["bytes_out"] = image_size
+                if settings.DJ_BN_IMAGE_VARIANTS:
+                    with timed_stage("variants", bytes_in=original_size):
+                        _create_variants_on_upload(storage, filename, original_image)
+                if settings.DJ_BN_IMAGE_NEGOTIATE_URLS:
+                    image_url = get_negotiated_image_url(filename)
+                else:
+                    image_url = storage.url(filename)
+                if digest:
+                    remember_image(
+                        digest,
+                        original_size,
+                        filename,
+                        image_url,
+                        owner=dedup_owner,
+                        **image_info,
+                    )
+                logger.debug(
+                    event="handle_uploaded_image_saved",
+                    msg="Image saved to storage",
+                    data={
+                        "filename": filename,
+                        "image_url": image_url,
+                    },
+                )
+            case True:
+                logger.debug(
+                    event="handle_uploaded_image_already_saved",
+                    msg="Image already saved by custom handler",
+                    data={
+                        "image_url": image_url,
+                    },
+                )
+
+    finally:
+        # Converted streams may have rolled over to a temporary file on disk
+        if image is not original_image:
+            image.close()
+
+    return {"url": image_url, **image_info}
+
+
+def _get_stream_size(stream) -> int:
+    """The size of an uploaded file or converted stream, left at the start."""
+    size = getattr(stream, "size", None)
+    if size is None:
+        size = stream.seek(0, 2)
+        stream.seek(0)
+    return size
 
 
 def has_permission_to_upload_images(request) -> bool:
@@ -288,3 +583,25 @@ def has_permission_to_upload_images(request) -> bool:
         has_perms = False
 
     return has_perms
+
+
+def _create_variants_on_upload(storage, filename: str, original_image) -> None:
+    """Stores the configured format variants of a newly saved image.
+
+    Variants are encoded from the original upload rather than the converted
+    image. A failure is logged and never fails the upload, the variant is
+    then left to be created lazily or not at all.
+    """
+    if settings.DJ_BN_IMAGE_VARIANTS_LAZY:
+        return
+
+    try:
+        create_image_variants(storage, filename, source=original_image)
+    except Exception:
+        logger.exception(
+            event="handle_uploaded_image_variants_error",
+            msg="Failed to create image variants",
+            data={
+                "filename": filename,
+            },
+        )
@@ -0,0 +1,274 @@
+"""Alternative format variants of stored images, chosen by the Accept header."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import PurePosixPath
+from typing import Any
+from urllib.parse import urlsplit
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve, reverse
+from PIL import Image, features
+
+from django_blocknote.exceptions import UploadRejectedError
+from django_blocknote.image.admission import upload_slot
+from django_blocknote.image.encoder import (
+    ENCODER_PRESETS,
+    open_output_stream,
+    prepare_image,
+)
+
+logger = structlog.get_logger(__name__)
+
+# Variant format: (Pillow format, MIME type, file suffix)
+VARIANT_FORMATS: dict[str, tuple[str, str, str]] = {
+    "avif": ("AVIF", "image/avif", ".avif"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+}
+
+
+def get_variant_formats() -> list[str]:
+    """The configured variant formats this Pillow build is able to write."""
+    formats = []
+    for variant_format in settings.DJ_BN_IMAGE_VARIANTS:
+        if variant_format not in VARIANT_FORMATS:
+            logger.warning(
+                event="get_variant_formats",
+                msg="Unknown image variant format",
+                data={"format": variant_format},
+            )
+        elif not features.check(variant_format):
+            logger.warning(
+                event="get_variant_formats",
+                msg="Pillow was built without support for image variant format",
+                data={"format": variant_format},
+            )
+        else:
+            formats.append(variant_format)
+    return formats
+
+
+def get_variant_name(name: str, variant_format: str) -> str:
+    """The storage name of a variant, stored next to the original image."""
+    _, _, suffix = VARIANT_FORMATS[variant_format]
+    return str(PurePosixPath(name).with_suffix(suffix))
+
+
+def get_variants_cache_key(name: str) -> str:
+    """Generate cache key for the variants available for a stored image."""
+    name_hash = hashlib.md5(name.encode(), usedforsecurity=False).hexdigest()
+    return f"djbn_image_variants_{name_hash}"
+
+
+def create_image_variants(storage, name: str, source=None) -> list[str]:
+    """Encodes and stores the configured variant formats of an image.
+
+    Variants already in storage, and those in the same format as the stored
+    image, are skipped. Animated images are left as they are.
+
+    Args:
+        storage: The storage the image was saved to.
+        name: The storage name of the image.
+        source: The file to encode from, ideally the original upload to
+            avoid a second generation of lossy encoding. Defaults to the
+            stored image.
+
+    Returns:
+        The variant formats now available for the image.
+    """
+    available = []
+    pending = []
+    for variant_format in get_variant_formats():
+        variant_name = get_variant_name(name, variant_format)
+        if variant_name == name or storage.exists(variant_name):
+            available.append(variant_format)
+        else:
+            pending.append(variant_format)
+
+    if pending:
+        image_file = source if source is not None else storage.open(name, "rb")
+        try:
+            image_file.seek(0)
+            with Image.open(image_file) as img:
+                if getattr(img, "is_animated", False):
+                    logger.debug(
+                        event="create_image_variants",
+                        msg="Skipping variants of an animated image",
+                        data={"name": name},
+                    )
+                    pending = []
+                else:
+                    metadata = prepare_image(img)
+
+                for variant_format in pending:
+                    _save_variant(storage, img, name, variant_format, metadata)
+                    available.append(variant_format)
+        finally:
+            if source is None:
+                image_file.close()
+            else:
+                image_file.seek(0)
+
+    cache.set(get_variants_cache_key(name), available, None)
+    logger.debug(
+        event="create_image_variants",
+        msg="Image variants available",
+        data={"name": name, "variants": available},
+    )
+    return available
+
+
+def get_available_variants(storage, name: str) -> list[str]:
+    """The variant formats stored for an image.
+
+    Known variants are cached. With `DJ_BN_IMAGE_VARIANTS_LAZY` enabled,
+    missing variants are created on first use, in one of the upload
+    processing slots. When none is free the stored variants are returned,
+    and the rest are left for a later request.
+    """
+    available = cache.get(get_variants_cache_key(name))
+    if available is not None:
+        return available
+
+    if settings.DJ_BN_IMAGE_VARIANTS_LAZY:
+        try:
+            with upload_slot():
+                return create_image_variants(storage, name)
+        except UploadRejectedError:
+            return [
+                variant_format
+                for variant_format in get_variant_formats()
+                if storage.exists(get_variant_name(name, variant_format))
+            ]
+
+    available = [
+        variant_format
+        for variant_format in get_variant_formats()
+        if storage.exists(get_variant_name(name, variant_format))
+    ]
+    cache.set(get_variants_cache_key(name), available, None)
+    return available
+
+
+def delete_image_variants(storage, name: str) -> None:
+    """Deletes any stored variants of an image."""
+    for variant_format in VARIANT_FORMATS:
+        variant_name = get_variant_name(name, variant_format)
+        if variant_name != name and storage.exists(variant_name):
+            storage.delete(variant_name)
+    cache.delete(get_variants_cache_key(name))
+
+
+def parse_accept(accept: str) -> dict[str, float]:
+    """Parses an Accept header into a mapping of media type to quality."""
+    accepted = {}
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[media_type.lower()] = quality
+    return accepted
+
+
+def choose_image_variant(name: str, accept: str, available: list[str]) -> str:
+    """Chooses the storage name to serve for an image.
+
+    Variants are preferred in `DJ_BN_IMAGE_VARIANTS` order, but only when
+    the client names their MIME type explicitly. Wildcards like `image/*`
+    are also sent by browsers that can't decode newer formats. Otherwise the
+    stored image is served.
+
+    Args:
+        name: The storage name of the image.
+        accept: The request Accept header.
+        available: The variant formats stored for the image.
+
+    Returns:
+        The storage name of the chosen variant or original.
+    """
+    accepted = parse_accept(accept)
+    for variant_format in settings.DJ_BN_IMAGE_VARIANTS:
+        _, mime_type, _ = VARIANT_FORMATS.get(variant_format, (None, None, None))
+        if variant_format in available and accepted.get(mime_type, 0) > 0:
+            return get_variant_name(name, variant_format)
+    return name
+
+
+def is_upload_name(name: str) -> bool:
+    """Whether a storage name is of an image stored by the upload views.
+
+    Uploads are stored under `DJ_BN_UPLOAD_PATH`, and only names there are
+    served by the `serve_image` view.
+    """
+    path = PurePosixPath(name)
+    if path.is_absolute() or ".." in path.parts:
+        return False
+    upload_path = PurePosixPath(settings.DJ_BN_UPLOAD_PATH)
+    return path != upload_path and path.is_relative_to(upload_path)
+
+
+def get_negotiated_image_url(name: str) -> str:
+    """The URL of the view that serves the best variant of an image."""
+    return reverse("django_blocknote:serve_image", kwargs={"name": name})
+
+
+def resolve_negotiated_image_url(url: str, storage) -> str:
+    """Maps a URL of the variant serving view back to the stored image URL.
+
+    Other URLs are returned unchanged.
+    """
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        return url
+
+    if match.view_name != "django_blocknote:serve_image":
+        return url
+    return storage.url(match.kwargs["name"])
+
+
+def _save_variant(
+    storage,
+    img: Image.Image,
+    name: str,
+    variant_format: str,
+    metadata: dict[str, Any],
+) -> None:
+    pil_format, _, _ = VARIANT_FORMATS[variant_format]
+    preset = ENCODER_PRESETS[settings.DJ_BN_IMAGE_ENCODER_PRESET]
+    options: dict[str, Any]
+
+    match variant_format:
+        case "avif":
+            options = {
+                "quality": settings.DJ_BN_IMAGE_AVIF_QUALITY,
+                "speed": preset["avif_speed"],
+            }
+        case _:
+            options = {
+                "quality": settings.DJ_BN_IMAGE_QUALITY,
+                "method": preset["method"],
+            }
+
+    has_alpha = "A" in img.getbands() or "transparency" in img.info
+    mode = "RGBA" if has_alpha else "RGB"
+    variant = img if img.mode == mode else img.convert(mode)
+
+    image_stream = open_output_stream()
+    try:
+        variant.save(image_stream, format=pil_format, **options, **metadata)
+        image_stream.seek(0)
+        storage.save(name=get_variant_name(name, variant_format), content=image_stream)
+    finally:
+        image_stream.close()
@@ -0,0 +1,134 @@
+"""Benchmark the image upload pipeline against a synthetic corpus."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_blocknote.image.benchmark import (
+    BENCHMARKS,
+    compare_results,
+    run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark image verification, conversion and upload handling on a "
+        "deterministic synthetic corpus. Writes JSON results, and compares "
+        "them with a baseline to catch regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Write the results as JSON to this file.",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            help="Compare with results from an earlier run, failing on regressions.",
+        )
+        parser.add_argument(
+            "--corpus-dir",
+            type=Path,
+            default=Path(tempfile.gettempdir()) / "django_blocknote_benchmark",
+            help="Where the corpus is generated and kept between runs.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Times each benchmark is run (default: 3).",
+        )
+        parser.add_argument(
+            "--case",
+            action="append",
+            dest="cases",
+            choices=["photo", "screenshot", "alpha", "animation", "huge"],
+            help="Only run this corpus case, can be repeated.",
+        )
+        parser.add_argument(
+            "--benchmark",
+            action="append",
+            dest="benchmarks",
+            choices=sorted(BENCHMARKS),
+            help="Only run this benchmark, can be repeated.",
+        )
+        parser.add_argument(
+            "--time-tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative increase of the median time (default: 0.25).",
+        )
+        parser.add_argument(
+            "--size-tolerance",
+            type=float,
+            default=0.05,
+            help="Allowed relative increase of the output size (default: 0.05).",
+        )
+        parser.add_argument(
+            "--no-isolate",
+            action="store_false",
+            dest="isolate",
+            help="Run in this process rather than a forked process per case.",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            msg = "--repeat must be at least 1"
+            raise CommandError(msg)
+
+        results = run_benchmarks(
+            options["corpus_dir"],
+            repeat=options["repeat"],
+            cases=options["cases"],
+            benchmarks=options["benchmarks"],
+            isolate=options["isolate"],
+            progress=lambda name: self.stderr.write(f"Running {name}"),
+        )
+
+        for result in results["results"]:
+            label = f"{result['case']:<11} {result['benchmark']:<36}"
+            if "error" in result:
+                self.stdout.write(self.style.ERROR(f"{label} {result['error']}"))
+                continue
+            output = result["output_bytes"]
+            self.stdout.write(
+                f"{label} {result['wall_time']['median'] * 1000:9.1f} ms"
+                f" {result['peak_rss_kb'] or 0:>9} KiB RSS"
+                f" {'' if output is None else f'{output:>10} B out'}",
+            )
+
+        if options["output"]:
+            options["output"].write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"]:
+            try:
+                baseline = json.loads(options["baseline"].read_text())
+                regressions = compare_results(
+                    results,
+                    baseline,
+                    time_tolerance=options["time_tolerance"],
+                    size_tolerance=options["size_tolerance"],
+                )
+            except (OSError, ValueError) as e:
+                msg = f"Unable to compare with the baseline: {e}"
+                raise CommandError(msg) from e
+
+            for regression in regressions:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"Regression in {regression['case']} "
+                        f"{regression['benchmark']} {regression['metric']}: "
+                        f"{regression['baseline']} -> {regression['current']}",
+                    ),
+                )
+            if regressions:
+                msg = f"{len(regressions)} regression(s) against the baseline"
+                raise CommandError(msg)
+
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
@@ -0,0 +1,55 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_blocknote", "0003_documenttemplate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SharedImage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "image_path",
+                    models.CharField(
+                        help_text="The path of the image's url.",
+                        max_length=500,
+                        unique=True,
+                        verbose_name="Image Path",
+                    ),
+                ),
+                (
+                    "uses",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of uploads reusing the image, besides the first.",
+                        verbose_name="Uses",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="The date and time when this record was created.",
+                        verbose_name="Created",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Django BlockNote Shared Image",
+                "verbose_name_plural": "Django BlockNote Shared Images",
+            },
+        ),
+    ]
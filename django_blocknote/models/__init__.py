@@ -1,9 +1,11 @@
 from .models import (
     DocumentTemplate,
+    SharedImage,
     UnusedImageURLS,
 )
 
 __all__ = [
     "DocumentTemplate",
+    "SharedImage",
     "UnusedImageURLS",
 ]
@@ -1,10 +1,14 @@
 import json
 from typing import Any
 
+from django.apps import apps
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 
+from django_blocknote.block_ranges import forget_block_indexes_on_save
+from django_blocknote.render.cache import warm_render_cache_on_save
 from django_blocknote.widgets import BlockNoteWidget
 
 
@@ -39,6 +43,23 @@ class BlockNoteField(models.JSONField):
         kwargs.setdefault("encoder", DjangoJSONEncoder)
         super().__init__(*args, **kwargs)
 
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        # Historical models built by migrations are never saved by the app
+        if not cls._meta.abstract and cls._meta.apps is apps:
+            # One receiver per model, however many BlockNote fields it has
+            post_save.connect(
+                warm_render_cache_on_save,
+                sender=cls,
+                dispatch_uid=f"djbn_warm_render_cache_{cls._meta.label_lower}",
+            )
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    forget_block_indexes_on_save,
+                    sender=cls,
+                    dispatch_uid=f"djbn_forget_block_indexes_{cls._meta.label_lower}",
+                )
+
     def formfield(self, **kwargs):
         kwargs["widget"] = BlockNoteWidget(
             editor_config=self.editor_config,
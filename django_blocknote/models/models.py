@@ -7,6 +7,12 @@ from django.core.cache import cache
 from django.db import models
 from django.utils.translation import pgettext_lazy as _
 
+from django_blocknote.request_cache import (
+    forget_for_request,
+    memoize_for_request,
+    remember_for_request,
+)
+
 from .fields import BlockNoteField
 
 User = get_user_model()
@@ -143,6 +149,59 @@ class UnusedImageURLS(models.Model):
         return str(self.image_url)
 
 
+class SharedImage(models.Model):
+    """Stored images handed out again by deduplicated uploads"""
+
+    image_path = models.CharField(
+        max_length=500,
+        unique=True,
+        verbose_name=_(
+            "Verbose name",
+            "Image Path",
+        ),
+        help_text=_(
+            "Help text",
+            "The path of the image's url.",
+        ),
+    )
+    uses = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_(
+            "Verbose name",
+            "Uses",
+        ),
+        help_text=_(
+            "Help text",
+            "Number of uploads reusing the image, besides the first.",
+        ),
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_(
+            "Verbose name",
+            "Created",
+        ),
+        help_text=_(
+            "Help text",
+            "The date and time when this record was created.",
+        ),
+    )
+
+    class Meta:
+        verbose_name = _(
+            "Verbose name",
+            "Django BlockNote Shared Image",
+        )
+        verbose_name_plural = _(
+            "Verbose name",
+            "Django BlockNote Shared Images",
+        )
+        app_label = "django_blocknote"
+
+    def __str__(self):
+        return f"{self.image_path} ({self.uses})"
+
+
 class DocumentTemplate(models.Model):
     ICON_CHOICES = [
         # General Document Types
@@ -380,7 +439,19 @@ class DocumentTemplate(models.Model):
 
     @classmethod
     def get_cached_templates(cls, user):
-        """Get user templates from cache, fallback to DB"""
+        """
+        Get user templates from cache, fallback to DB
+
+        Memoized for the request with RequestCacheMiddleware, so pages with
+        several editors make one cache lookup per user.
+        """
+        return memoize_for_request(
+            cls.get_cache_key(user.id),
+            lambda: cls._get_cached_templates(user),
+        )
+
+    @classmethod
+    def _get_cached_templates(cls, user):
         cache_key = cls.get_cache_key(user.id)
         templates = cache.get(cache_key)
 
@@ -479,6 +550,7 @@ class DocumentTemplate(models.Model):
             # Use configurable cache timeout
             timeout = cls.get_cache_timeout()
             cache.set(cache_key, templates, timeout)
+            remember_for_request(cache_key, templates)
 
             logger.info(
                 event="template_cache_refreshed",
@@ -513,6 +585,7 @@ class DocumentTemplate(models.Model):
 
         try:
             cache.delete(cache_key)
+            forget_for_request(cache_key)
 
             logger.info(
                 event="template_cache_invalidated",
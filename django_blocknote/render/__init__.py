@@ -0,0 +1,43 @@
+from .cache import (
+    clear_render_cache,
+    get_render_cache_key,
+    render_cached,
+    render_document,
+    warm_render_cache,
+)
+from .renderer import (
+    RENDERER_VERSION,
+    block_attrs,
+    get_block_renderer,
+    iter_render_blocks,
+    iter_render_chunks,
+    parse_blocks,
+    register_block_renderer,
+    render_blocks,
+    render_inline,
+    safe_url,
+)
+from .streaming import (
+    iter_render_document,
+    streaming_render_response,
+)
+
+__all__ = [
+    "RENDERER_VERSION",
+    "block_attrs",
+    "clear_render_cache",
+    "get_block_renderer",
+    "get_render_cache_key",
+    "iter_render_blocks",
+    "iter_render_chunks",
+    "iter_render_document",
+    "parse_blocks",
+    "register_block_renderer",
+    "render_blocks",
+    "render_cached",
+    "render_document",
+    "render_inline",
+    "safe_url",
+    "streaming_render_response",
+    "warm_render_cache",
+]
@@ -0,0 +1,229 @@
+"""Cached server-side renders of BlockNote documents.
+
+Renders are keyed by a hash of the document's blocks, the renderer version
+and the render options, so edited documents get a new key and stale HTML is
+never served. Lookups go through two tiers:
+
+1. An in-process LRU holding up to `DJ_BN_RENDER_CACHE_MAX_BYTES` of HTML.
+2. The Django cache named by `DJ_BN_RENDER_CACHE_ALIAS`, shared by all
+   processes, where renders are kept for `DJ_BN_RENDER_CACHE_TIMEOUT`.
+
+Documents are rendered into the cache on their first view. With
+`DJ_BN_RENDER_CACHE_WARM_ON_SAVE`, models with a `BlockNoteField` fill the
+cache when saved instead, so the first visitor of an edited document is
+served cached HTML too, at the cost of a render on every save.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.html import escape
+
+from .renderer import RENDERER_VERSION, parse_blocks, render_blocks
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_CSS_CLASS = "blocknote-rendered"
+
+# Settings the in-process cache depends on
+RENDER_CACHE_SETTINGS = frozenset(
+    {
+        "DJ_BN_RENDER_CACHE",
+        "DJ_BN_RENDER_CACHE_ALIAS",
+        "DJ_BN_RENDER_CACHE_MAX_BYTES",
+    },
+)
+
+
+class RenderLRU:
+    """A thread-safe LRU of rendered HTML, bounded by its size in bytes.
+
+    Sizes are counted in characters, which matches bytes for the mostly
+    ASCII markup of rendered documents. Other values are kept with the size
+    given for them.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, html: Any, size: int | None = None) -> None:
+        size = len(key) + (len(html) if size is None else size)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (html, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_lru: RenderLRU | None = None
+_lru_lock = threading.Lock()
+
+
+def _get_lru() -> RenderLRU:
+    global _lru  # noqa: PLW0603
+    if _lru is None:
+        with _lru_lock:
+            if _lru is None:
+                _lru = RenderLRU(settings.DJ_BN_RENDER_CACHE_MAX_BYTES)
+    return _lru
+
+
+def get_render_cache_key(blocks: list, **options: Any) -> str:
+    """Generate cache key for the render of blocks with the given options."""
+    payload = json.dumps(
+        [RENDERER_VERSION, blocks, options],
+        cls=DjangoJSONEncoder,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    digest = hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+    return f"djbn_render_{digest}"
+
+
+def render_document(blocks: list, css_class: str = DEFAULT_CSS_CLASS) -> str:
+    """Renders blocks to HTML, wrapped in a div of `css_class` if given."""
+    html = render_blocks(blocks)
+    if not css_class:
+        return html
+    return f'<div class="{escape(css_class)}">{html}</div>'
+
+
+def render_cached(content: Any, css_class: str = DEFAULT_CSS_CLASS) -> str:
+    """Renders a document to HTML, through the render cache.
+
+    Args:
+        content: The block list, or its JSON, as stored in a `BlockNoteField`.
+        css_class: The class of the wrapping div, empty for no wrapper.
+
+    Returns:
+        The HTML of the document, see `render_document`.
+    """
+    blocks = parse_blocks(content)
+    if not settings.DJ_BN_RENDER_CACHE or not blocks:
+        return render_document(blocks, css_class)
+
+    cache_key = get_render_cache_key(blocks, css_class=css_class)
+    lru = _get_lru()
+
+    html = lru.get(cache_key)
+    if html is not None:
+        return html
+
+    shared_cache = caches[settings.DJ_BN_RENDER_CACHE_ALIAS]
+    html = shared_cache.get(cache_key)
+    if html is None:
+        html = render_document(blocks, css_class)
+        shared_cache.set(cache_key, html, settings.DJ_BN_RENDER_CACHE_TIMEOUT)
+        logger.debug(
+            event="render_cached",
+            msg="Rendered document into the render cache",
+            data={"cache_key": cache_key, "size": len(html)},
+        )
+
+    lru.set(cache_key, html)
+    return html
+
+
+def warm_render_cache(content: Any, css_class: str = DEFAULT_CSS_CLASS) -> None:
+    """Renders a document into both cache tiers, replacing any cached render."""
+    blocks = parse_blocks(content)
+    if not settings.DJ_BN_RENDER_CACHE or not blocks:
+        return
+
+    cache_key = get_render_cache_key(blocks, css_class=css_class)
+    html = render_document(blocks, css_class)
+    caches[settings.DJ_BN_RENDER_CACHE_ALIAS].set(
+        cache_key,
+        html,
+        settings.DJ_BN_RENDER_CACHE_TIMEOUT,
+    )
+    _get_lru().set(cache_key, html)
+
+
+def warm_render_cache_on_save(sender, instance, raw=False, **kwargs):
+    """Render the `BlockNoteField` values of a saved instance into the cache.
+
+    Connected for each model with a `BlockNoteField` by the field itself.
+    """
+    if (
+        raw
+        or not settings.DJ_BN_RENDER_CACHE
+        or not settings.DJ_BN_RENDER_CACHE_WARM_ON_SAVE
+    ):
+        # Fixture loading, caching disabled, or rendered on first view
+        return
+
+    from django_blocknote.models.fields import BlockNoteField
+
+    for field in sender._meta.concrete_fields:  # noqa: SLF001
+        if not isinstance(field, BlockNoteField):
+            continue
+        try:
+            warm_render_cache(field.value_from_object(instance))
+        except Exception:
+            # A cold cache must never fail the save
+            logger.exception(
+                event="warm_render_cache_on_save",
+                msg="Failed to render document into the render cache",
+                data={"model": sender._meta.label, "field": field.name},  # noqa: SLF001
+            )
+
+
+def clear_render_cache() -> None:
+    """Empties the in-process tier, the shared cache expires on its own."""
+    if _lru is not None:
+        _lru.clear()
+
+
+@receiver(setting_changed)
+def reset_render_cache_on_setting_changed(sender, setting, **kwargs):
+    """Size a new in-process cache when the render cache settings change."""
+    global _lru  # noqa: PLW0603
+    if setting in RENDER_CACHE_SETTINGS:
+        with _lru_lock:
+            _lru = None
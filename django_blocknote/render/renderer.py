@@ -0,0 +1,532 @@
+"""Server-side HTML rendering of BlockNote documents.
+
+Turns the block JSON stored in a `BlockNoteField` into semantic HTML, so
+readonly pages, emails and crawlers get the content without loading the
+editor bundle:
+
+    from django_blocknote.render import render_blocks
+
+    html = render_blocks(article.content)
+
+Blocks are rendered by functions registered per block type. A renderer
+returns the HTML that opens and closes the block, and nested blocks are
+rendered between the two. Consecutive list items are grouped into a single
+`ul` or `ol`. Custom blocks register their own renderer:
+
+    from django_blocknote.render import register_block_renderer, render_inline
+
+    @register_block_renderer("alert")
+    def render_alert(block):
+        return f'<div role="alert">{render_inline(block.get("content"))}</div>', ""
+
+The document is walked iteratively, so deeply nested documents can't hit
+the recursion limit.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from collections.abc import Callable, Iterable, Iterator
+from html import escape
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Bump when the generated HTML changes, so cached renders are discarded
+RENDERER_VERSION = 2
+
+# URL schemes links and media may use, anything else is dropped
+SAFE_URL_SCHEMES = frozenset({"", "http", "https", "mailto", "tel"})
+
+# Block alignments rendered as `text-align`, anything else is dropped
+TEXT_ALIGNMENTS = frozenset({"center", "right", "justify"})
+
+# Characters of HTML yielded at once when streaming a render
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Marks the end of a list of sibling blocks
+_END = object()
+
+# Inline styles rendered as elements, in nesting order
+STYLE_TAGS = (
+    ("bold", "strong"),
+    ("italic", "em"),
+    ("underline", "u"),
+    ("strike", "s"),
+    ("code", "code"),
+)
+
+BlockRenderFunc = Callable[[dict[str, Any]], tuple[str, str]]
+
+
+class BlockRenderer(NamedTuple):
+    """A registered block renderer and how its blocks nest."""
+
+    render: BlockRenderFunc
+    # Consecutive blocks with the same list tag and class share one list
+    list_tag: str | None = None
+    list_class: str | None = None
+    # Whether nested blocks go straight inside the block, rather than in
+    # a `bn-block-children` wrapper after it
+    nest_children: bool = False
+
+
+_block_renderers: dict[str, BlockRenderer] = {}
+
+
+def register_block_renderer(
+    block_type: str,
+    *,
+    list_tag: str | None = None,
+    list_class: str | None = None,
+    nest_children: bool | None = None,
+) -> Callable[[BlockRenderFunc], BlockRenderFunc]:
+    """Registers the renderer of a block type, replacing any existing one.
+
+    Args:
+        block_type: The BlockNote block type, e.g. `"paragraph"`.
+        list_tag: `"ul"` or `"ol"` to group consecutive blocks into a list.
+        list_class: The class of that list element.
+        nest_children: Render nested blocks inside the block. Defaults to
+            True for list items.
+
+    Returns:
+        A decorator registering a function that takes the block and returns
+        the HTML opening and closing it.
+    """
+
+    def decorator(func: BlockRenderFunc) -> BlockRenderFunc:
+        _block_renderers[block_type] = BlockRenderer(
+            render=func,
+            list_tag=list_tag,
+            list_class=list_class,
+            nest_children=bool(list_tag) if nest_children is None else nest_children,
+        )
+        return func
+
+    return decorator
+
+
+def get_block_renderer(block_type: str) -> BlockRenderer:
+    """The renderer of a block type, unknown types render as a generic block."""
+    return _block_renderers.get(block_type) or _default_renderer
+
+
+def safe_url(url: Any) -> str:
+    """The URL if its scheme is safe to link to, otherwise an empty string."""
+    if not isinstance(url, str):
+        return ""
+    url = url.strip()
+    try:
+        scheme = urlsplit(url).scheme.lower()
+    except ValueError:
+        return ""
+    return url if scheme in SAFE_URL_SCHEMES else ""
+
+
+def block_attrs(block: dict[str, Any], class_name: str | None = None) -> str:
+    """The HTML attributes for the colour and alignment props of a block.
+
+    Returns:
+        The attributes with a leading space, or an empty string.
+    """
+    props = _block_props(block)
+    attrs = []
+    if class_name:
+        attrs.append(f' class="{class_name}"')
+
+    text_color = props.get("textColor")
+    if text_color and text_color != "default":
+        attrs.append(f' data-text-color="{escape(str(text_color))}"')
+    background_color = props.get("backgroundColor")
+    if background_color and background_color != "default":
+        attrs.append(f' data-background-color="{escape(str(background_color))}"')
+    alignment = props.get("textAlignment")
+    if isinstance(alignment, str) and alignment in TEXT_ALIGNMENTS:
+        attrs.append(f' style="text-align: {alignment}"')
+
+    return "".join(attrs)
+
+
+def _render_text(item: dict[str, Any]) -> str:
+    html = escape(str(item.get("text", ""))).replace("\n", "<br>")
+    if not html:
+        return ""
+
+    styles = item.get("styles") or {}
+    if not styles:
+        return html
+
+    for style, tag in reversed(STYLE_TAGS):
+        if styles.get(style):
+            html = f"<{tag}>{html}</{tag}>"
+
+    color_attrs = []
+    text_color = styles.get("textColor")
+    if text_color and text_color != "default":
+        color_attrs.append(f' data-text-color="{escape(str(text_color))}"')
+    background_color = styles.get("backgroundColor")
+    if background_color and background_color != "default":
+        color_attrs.append(f' data-background-color="{escape(str(background_color))}"')
+    if color_attrs:
+        html = f"<span{''.join(color_attrs)}>{html}</span>"
+
+    return html
+
+
+def render_inline(content: Any) -> str:
+    """Renders the inline content of a block: styled text and links."""
+    if isinstance(content, str):
+        return escape(content)
+    if not isinstance(content, list):
+        return ""
+
+    parts = []
+    for item in content:
+        if not isinstance(item, dict):
+            continue
+        match item.get("type"):
+            case "text":
+                parts.append(_render_text(item))
+            case "link":
+                text = render_inline(item.get("content"))
+                href = safe_url(item.get("href"))
+                if href:
+                    parts.append(f'<a href="{escape(href)}">{text}</a>')
+                else:
+                    parts.append(text)
+            case _:
+                # Custom inline content, keep whatever text it carries
+                if "text" in item:
+                    parts.append(_render_text(item))
+                elif "content" in item:
+                    parts.append(render_inline(item["content"]))
+    return "".join(parts)
+
+
+def _block_props(block: dict[str, Any]) -> dict[str, Any]:
+    props = block.get("props")
+    return props if isinstance(props, dict) else {}
+
+
+@register_block_renderer("paragraph")
+def render_paragraph(block):
+    return f"<p{block_attrs(block)}>{render_inline(block.get('content'))}</p>", ""
+
+
+@register_block_renderer("heading")
+def render_heading(block):
+    props = _block_props(block)
+    try:
+        level = min(max(int(props.get("level", 1)), 1), 6)
+    except (TypeError, ValueError):
+        level = 1
+    heading = (
+        f"<h{level}{block_attrs(block)}>"
+        f"{render_inline(block.get('content'))}</h{level}>"
+    )
+    if props.get("isToggleable"):
+        return f'<details class="bn-toggle"><summary>{heading}</summary>', "</details>"
+    return heading, ""
+
+
+@register_block_renderer("quote")
+def render_quote(block):
+    return (
+        f"<blockquote{block_attrs(block)}>"
+        f"{render_inline(block.get('content'))}</blockquote>"
+    ), ""
+
+
+@register_block_renderer("bulletListItem", list_tag="ul")
+def render_bullet_list_item(block):
+    return f"<li{block_attrs(block)}>{render_inline(block.get('content'))}", "</li>"
+
+
+@register_block_renderer("numberedListItem", list_tag="ol")
+def render_numbered_list_item(block):
+    return f"<li{block_attrs(block)}>{render_inline(block.get('content'))}", "</li>"
+
+
+@register_block_renderer("checkListItem", list_tag="ul", list_class="bn-check-list")
+def render_check_list_item(block):
+    checked = bool(_block_props(block).get("checked"))
+    return (
+        f"<li{block_attrs(block)}>"
+        f'<input type="checkbox" disabled{" checked" if checked else ""}> '
+        f"{render_inline(block.get('content'))}"
+    ), "</li>"
+
+
+@register_block_renderer("toggleListItem", nest_children=True)
+def render_toggle_list_item(block):
+    return (
+        f'<details{block_attrs(block, "bn-toggle")}>'
+        f"<summary>{render_inline(block.get('content'))}</summary>"
+    ), "</details>"
+
+
+@register_block_renderer("codeBlock")
+def render_code_block(block):
+    language = _block_props(block).get("language")
+    code_attrs = f' class="language-{escape(str(language))}"' if language else ""
+    # Code is preformatted, newlines stay as they are
+    code = "".join(
+        escape(str(item.get("text", "")))
+        for item in block.get("content") or []
+        if isinstance(item, dict)
+    )
+    return f"<pre{block_attrs(block)}><code{code_attrs}>{code}</code></pre>", ""
+
+
+def _render_table_cell(cell: Any, tag: str) -> str:
+    if isinstance(cell, dict) and cell.get("type") == "tableCell":
+        props = _block_props(cell)
+        attrs = [block_attrs(cell)]
+        for span in ("colspan", "rowspan"):
+            try:
+                value = int(props.get(span, 1))
+            except (TypeError, ValueError):
+                value = 1
+            if value > 1:
+                attrs.append(f' {span}="{value}"')
+        return f"<{tag}{''.join(attrs)}>{render_inline(cell.get('content'))}</{tag}>"
+    return f"<{tag}>{render_inline(cell)}</{tag}>"
+
+
+def _render_table_rows(rows: list, tag: str) -> str:
+    html = []
+    for row in rows:
+        cells = row.get("cells", []) if isinstance(row, dict) else []
+        html.append("<tr>")
+        html.extend(_render_table_cell(cell, tag) for cell in cells)
+        html.append("</tr>")
+    return "".join(html)
+
+
+@register_block_renderer("table")
+def render_table(block):
+    content = block.get("content")
+    if not isinstance(content, dict):
+        content = {}
+    rows = content.get("rows") or []
+    header_rows = content.get("headerRows") or 0
+
+    html = [f"<table{block_attrs(block)}>"]
+    if rows[:header_rows]:
+        html.append(f"<thead>{_render_table_rows(rows[:header_rows], 'th')}</thead>")
+    if rows[header_rows:]:
+        html.append(f"<tbody>{_render_table_rows(rows[header_rows:], 'td')}</tbody>")
+    html.append("</table>")
+    return "".join(html), ""
+
+
+def _render_caption(props: dict[str, Any]) -> str:
+    caption = props.get("caption")
+    return f"<figcaption>{escape(str(caption))}</figcaption>" if caption else ""
+
+
+@register_block_renderer("image")
+def render_image(block):
+    props = _block_props(block)
+    url = safe_url(props.get("url"))
+    if not url:
+        return "", ""
+
+    alt = props.get("caption") or props.get("name") or ""
+    width = props.get("previewWidth")
+    width_attr = ""
+    if (
+        isinstance(width, int | float)
+        and not isinstance(width, bool)
+        and math.isfinite(width)
+        and int(width) > 0
+    ):
+        width_attr = f' width="{int(width)}"'
+    return (
+        f"<figure{block_attrs(block)}>"
+        f'<img src="{escape(url)}" alt="{escape(str(alt))}"{width_attr} '
+        'loading="lazy" decoding="async">'
+        f"{_render_caption(props)}</figure>"
+    ), ""
+
+
+def _render_media(block: dict[str, Any], tag: str) -> tuple[str, str]:
+    props = _block_props(block)
+    url = safe_url(props.get("url"))
+    if not url:
+        return "", ""
+    return (
+        f"<figure{block_attrs(block)}>"
+        f'<{tag} src="{escape(url)}" controls preload="metadata"></{tag}>'
+        f"{_render_caption(props)}</figure>"
+    ), ""
+
+
+@register_block_renderer("video")
+def render_video(block):
+    return _render_media(block, "video")
+
+
+@register_block_renderer("audio")
+def render_audio(block):
+    return _render_media(block, "audio")
+
+
+@register_block_renderer("file")
+def render_file(block):
+    props = _block_props(block)
+    url = safe_url(props.get("url"))
+    if not url:
+        return "", ""
+    name = props.get("name") or url
+    return (
+        f"<p{block_attrs(block, 'bn-file')}>"
+        f'<a href="{escape(url)}">{escape(str(name))}</a></p>'
+        f"{_render_caption(props)}"
+    ), ""
+
+
+@register_block_renderer("divider")
+def render_divider(block):
+    return "<hr>", ""
+
+
+@register_block_renderer("pageBreak")
+def render_page_break(block):
+    return '<hr class="bn-page-break">', ""
+
+
+def _render_unknown(block):
+    block_type = escape(str(block.get("type", "")))
+    content = block.get("content")
+    inner = render_inline(content) if isinstance(content, list | str) else ""
+    return f'<div{block_attrs(block, "bn-block")} data-type="{block_type}">{inner}', (
+        "</div>"
+    )
+
+
+_default_renderer = BlockRenderer(render=_render_unknown, nest_children=True)
+
+
+def _list_open_tag(renderer: BlockRenderer, block: dict[str, Any]) -> str:
+    attrs = f' class="{renderer.list_class}"' if renderer.list_class else ""
+    if renderer.list_tag == "ol":
+        start = _block_props(block).get("start")
+        if isinstance(start, int) and start != 1:
+            attrs += f' start="{start}"'
+    return f"<{renderer.list_tag}{attrs}>"
+
+
+def _walk_blocks(blocks: Iterable[Any]) -> Iterator[str | None]:
+    """Renders blocks to HTML fragments, and None after each top-level block.
+
+    Each frame of the stack holds the remaining sibling blocks, the HTML
+    closing their parent, and the list the siblings are currently in.
+    """
+    stack: list[list[Any]] = [[iter(blocks), "", None]]
+
+    while stack:
+        frame = stack[-1]
+        siblings, parent_end, open_list = frame
+        block = next(siblings, _END)
+
+        if block is _END:
+            if open_list is not None:
+                yield f"</{open_list[0]}>"
+            yield parent_end
+            stack.pop()
+            if len(stack) == 1:
+                yield None
+            continue
+
+        if not isinstance(block, dict):
+            continue
+
+        renderer = get_block_renderer(block.get("type", ""))
+        list_key = (
+            (renderer.list_tag, renderer.list_class) if renderer.list_tag else None
+        )
+        if list_key != open_list:
+            if open_list is not None:
+                yield f"</{open_list[0]}>"
+            if list_key is not None:
+                yield _list_open_tag(renderer, block)
+            frame[2] = list_key
+
+        start, end = renderer.render(block)
+        yield start
+
+        children = block.get("children")
+        if children and isinstance(children, list):
+            if renderer.nest_children:
+                stack.append([iter(children), end, None])
+            else:
+                yield '<div class="bn-block-children">'
+                stack.append([iter(children), "</div>" + end, None])
+        else:
+            yield end
+            if len(stack) == 1:
+                yield None
+
+
+def iter_render_blocks(blocks: Iterable[Any]) -> Iterator[str]:
+    """Renders blocks to HTML, yielding it in fragments."""
+    return (fragment for fragment in _walk_blocks(blocks) if fragment is not None)
+
+
+def iter_render_chunks(
+    blocks: Iterable[Any],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Renders blocks to HTML, yielding it per top-level block.
+
+    Small top-level blocks are joined until there's at least `chunk_size`
+    characters of HTML, so a response isn't written a paragraph at a time.
+    Only one chunk is held in memory, whatever the size of the document.
+    """
+    buffer: list[str] = []
+    size = 0
+    for fragment in _walk_blocks(blocks):
+        if fragment is None:
+            if buffer and size >= chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+        elif fragment:
+            buffer.append(fragment)
+            size += len(fragment)
+    if buffer:
+        yield "".join(buffer)
+
+
+def parse_blocks(content: Any) -> list:
+    """The block list of a field value, which may still be a JSON string."""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content) if content else []
+        except (json.JSONDecodeError, TypeError):
+            logger.warning(
+                event="parse_blocks",
+                msg="Content is not valid JSON, rendering nothing",
+                data={"length": len(content)},
+            )
+            return []
+    return content if isinstance(content, list) else []
+
+
+def render_blocks(content: Any) -> str:
+    """Renders a BlockNote document to HTML.
+
+    Args:
+        content: The block list, or its JSON, as stored in a `BlockNoteField`.
+
+    Returns:
+        The HTML of the document. The caller marks it safe, all text and
+        attributes are escaped here.
+    """
+    return "".join(iter_render_blocks(parse_blocks(content)))
@@ -0,0 +1,64 @@
+"""Streaming server-side renders, for documents too large to build at once.
+
+The HTML is yielded per top-level block, so the first bytes reach the
+browser before the rest of the document is rendered and only one chunk is
+held in memory:
+
+    from django_blocknote.render import streaming_render_response
+
+    def article(request, pk):
+        article = get_object_or_404(Article, pk=pk)
+        return streaming_render_response(article.content)
+
+Unlike `render_cached`, streamed renders aren't cached.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+from django.http import StreamingHttpResponse
+from django.utils.html import escape
+
+from .cache import DEFAULT_CSS_CLASS
+from .renderer import STREAM_CHUNK_SIZE, iter_render_chunks, parse_blocks
+
+
+def iter_render_document(
+    content: Any,
+    css_class: str = DEFAULT_CSS_CLASS,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Renders a document to HTML in chunks, see `render_document`.
+
+    Args:
+        content: The block list, or its JSON, as stored in a `BlockNoteField`.
+        css_class: The class of the wrapping div, empty for no wrapper.
+        chunk_size: The least characters of HTML yielded at once.
+
+    Yields:
+        The HTML, per top-level block or group of small blocks.
+    """
+    if css_class:
+        yield f'<div class="{escape(css_class)}">'
+    yield from iter_render_chunks(parse_blocks(content), chunk_size)
+    if css_class:
+        yield "</div>"
+
+
+def streaming_render_response(
+    content: Any,
+    css_class: str = DEFAULT_CSS_CLASS,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    **kwargs: Any,
+) -> StreamingHttpResponse:
+    """A response streaming the HTML of a document.
+
+    Extra keyword arguments are passed to `StreamingHttpResponse`.
+    """
+    kwargs.setdefault("content_type", "text/html; charset=utf-8")
+    return StreamingHttpResponse(
+        iter_render_document(content, css_class, chunk_size),
+        **kwargs,
+    )
@@ -0,0 +1,99 @@
+"""Per-request memoization of per-user editor data.
+
+Pages with several BlockNote widgets or viewers look up the same user's
+document templates and theme once per widget. With the middleware
+installed, each lookup is made once per request:
+
+    MIDDLEWARE = [
+        ...
+        "django_blocknote.request_cache.RequestCacheMiddleware",
+    ]
+
+Outside a request, or without the middleware, nothing is memoized. Code
+rendering widgets elsewhere, e.g. in a task, can open a scope with
+`request_cache()`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+T = TypeVar("T")
+
+_request_cache: ContextVar[dict[Hashable, Any] | None] = ContextVar(
+    "djbn_request_cache",
+    default=None,
+)
+
+
+@contextmanager
+def request_cache() -> Iterator[dict[Hashable, Any]]:
+    """Memoizes per-user data until the block exits.
+
+    Yields:
+        The memoized values, by key.
+    """
+    token = _request_cache.set({})
+    try:
+        yield _request_cache.get()
+    finally:
+        _request_cache.reset(token)
+
+
+def memoize_for_request(key: Hashable, factory: Callable[[], T]) -> T:
+    """The value of `key` for this request, made by `factory` on first use.
+
+    Args:
+        key: The key of the value, e.g. `("templates", user.pk)`.
+        factory: Makes the value.
+
+    Returns:
+        The memoized value, or a fresh one outside a `request_cache()`.
+    """
+    memo = _request_cache.get()
+    if memo is None:
+        return factory()
+    if key not in memo:
+        memo[key] = factory()
+    return memo[key]
+
+
+def remember_for_request(key: Hashable, value: Any) -> None:
+    """Replaces the memoized value of `key`, e.g. after refreshing it."""
+    memo = _request_cache.get()
+    if memo is not None:
+        memo[key] = value
+
+
+def forget_for_request(key: Hashable) -> None:
+    """Drops the memoized value of `key`, so the next use makes it again."""
+    memo = _request_cache.get()
+    if memo is not None:
+        memo.pop(key, None)
+
+
+class RequestCacheMiddleware:
+    """Opens a `request_cache()` for each request, sync or async."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_cache():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_cache():
+            return await self.get_response(request)
@@ -1,15 +1,20 @@
-import json
 import uuid
 
 from django import template
 from django.conf import settings
 from django.contrib.staticfiles import finders
-from django.core.exceptions import ObjectDoesNotExist
-from django.core.serializers.json import DjangoJSONEncoder
 from django.templatetags.static import static
 from django.utils.safestring import mark_safe
 
 from django_blocknote.assets import get_vite_asset
+from django_blocknote.render import render_cached
+from django_blocknote.themes import get_user_theme  # noqa: F401
+from django_blocknote.viewers import (
+    VIEWER_FIELD_NAME,
+    get_viewer_config,
+    iter_render_viewers,
+    render_paginated_viewer,
+)
 from django_blocknote.widgets import BlockNoteWidget
 
 register = template.Library()
@@ -593,59 +598,6 @@ def blocknote_asset_debug():
     return mark_safe(html)
 
 
-def get_user_theme(user):
-    """
-    Robust user theme detection supporting multiple patterns:
-    - user.profile.theme (field or property)
-    - user.userprofile.theme (field or property)
-    - user.preferences.theme (field or property)
-    - user.theme_preference (direct field)
-    """
-    if not user or not user.is_authenticated:
-        return None
-
-    # List of possible theme attribute paths to check
-    theme_paths = [
-        ("profile", "theme"),
-        ("userprofile", "theme"),
-        ("preferences", "theme"),
-        ("user_preferences", "theme"),
-        ("settings", "theme"),
-    ]
-
-    # Check each possible path
-    for relation_name, theme_attr in theme_paths:
-        try:
-            # Check if user has the relation
-            if hasattr(user, relation_name):
-                relation_obj = getattr(user, relation_name, None)
-                # Handle case where relation exists but is None
-                if relation_obj is None:
-                    continue
-                # Check if the relation object has the theme attribute
-                if hasattr(relation_obj, theme_attr):
-                    theme_value = getattr(relation_obj, theme_attr, None)
-                    # Validate theme value
-                    if theme_value and theme_value in ["light", "dark", "auto"]:
-                        return theme_value
-        except (AttributeError, ObjectDoesNotExist, TypeError):
-            # Continue to next path if this one fails
-            continue
-
-    # Check for direct theme attributes on user
-    direct_theme_attrs = ["theme", "theme_preference", "ui_theme", "color_scheme"]
-    for attr_name in direct_theme_attrs:
-        try:
-            if hasattr(user, attr_name):
-                theme_value = getattr(user, attr_name, None)
-                if theme_value and theme_value in ["light", "dark", "auto"]:
-                    return theme_value
-        except (AttributeError, TypeError):
-            continue
-
-    return None
-
-
 @register.simple_tag(takes_context=True)
 def blocknote_viewer(
     context,
@@ -653,55 +605,113 @@ def blocknote_viewer(
     container_id=None,
     css_class="blocknote-viewer",
     theme=None,
+    hydrate="eager",
 ):
     """
     Simple viewer that uses BlockNoteWidget in readonly mode
+    Usage:
+        {% blocknote_viewer article.content %}
+        {% blocknote_viewer article.content hydrate="visible" %}
+
+    With hydrate "visible", "idle" or "interaction" the content is rendered
+    on the server and the viewer mounts lazily, see BlockNoteWidget.
     """
-    # Get viewer config from settings
-    viewer_config = getattr(
-        settings,
-        "DJ_BN_VIEWER_CONFIG",
-        {
-            "theme": "light",
-            "animations": True,
-        },
-    )
-    # Handle if it's accidentally a tuple
-    if isinstance(viewer_config, tuple):
-        viewer_config = viewer_config[0].copy()
-    else:
-        viewer_config = viewer_config.copy()
+    user = context.get("user") if context else None
+    viewer_config = get_viewer_config(user, theme)
 
-    # Theme priority: explicit > user preference > setting default
-    if theme:
-        # Explicit override has highest priority
-        viewer_config["theme"] = theme
-    else:
-        # Try to get user's theme preference
-        user = context.get("user") if context else None
-        user_theme = get_user_theme(user)
-        if user_theme:
-            viewer_config["theme"] = user_theme
+    attrs = {
+        "id": container_id or f"blocknote_viewer_{uuid.uuid4().hex[:8]}",
+        "class": css_class,
+    }
 
     # Create widget in readonly mode
     widget = BlockNoteWidget(
         mode="readonly",
         editor_config=viewer_config,
-        attrs={
-            "id": container_id or f"blocknote_viewer_{uuid.uuid4().hex[:8]}",
-            "class": css_class,
-        },
+        attrs=attrs,
+        hydrate=hydrate,
+    )
+
+    # The blocks are passed as they are, the widget serializes them once
+    return widget.render(VIEWER_FIELD_NAME, content or [], attrs=attrs)
+
+
+@register.simple_tag(takes_context=True)
+def blocknote_viewer_list(
+    context,
+    contents,
+    css_class="blocknote-viewer",
+    theme=None,
+    hydrate="eager",
+):
+    """
+    Readonly viewers for many documents, sharing one viewer config
+    Usage:
+        {% blocknote_viewer_list contents %}
+        {% blocknote_viewer_list contents hydrate="visible" %}
+
+    contents is an iterable of documents, e.g. from
+    posts.values_list("content", flat=True). Use iter_render_viewers to
+    stream the viewers from a view instead.
+    """
+    user = context.get("user") if context else None
+    return mark_safe(
+        "".join(
+            iter_render_viewers(
+                contents,
+                user=user,
+                css_class=css_class,
+                theme=theme,
+                hydrate=hydrate,
+            ),
+        ),
+    )
+
+
+@register.simple_tag(takes_context=True)
+def blocknote_viewer_paginated(
+    context,
+    instance,
+    field_name,
+    page_size=None,
+    container_id=None,
+    css_class="blocknote-viewer",
+    theme=None,
+    hydrate="eager",
+):
+    """
+    Readonly viewer for large documents, fetching blocks as the reader scrolls
+    Usage:
+        {% blocknote_viewer_paginated article "content" %}
+        {% blocknote_viewer_paginated article "content" page_size=20 %}
+
+    Only the first page_size top-level blocks are embedded in the page,
+    DJ_BN_VIEWER_PAGE_SIZE by default. Requires the django_blocknote URLs.
+    """
+    user = context.get("user") if context else None
+    return mark_safe(
+        render_paginated_viewer(
+            instance,
+            field_name,
+            user=user,
+            page_size=page_size,
+            container_id=container_id,
+            css_class=css_class,
+            theme=theme,
+            hydrate=hydrate,
+        ),
     )
 
-    # Render the widget with proper attrs
-    field_name = "blocknote_content"
-    content_json = json.dumps(content or [], cls=DjangoJSONEncoder, ensure_ascii=False)
-    attrs = {
-        "id": container_id or f"blocknote_viewer_{uuid.uuid4().hex[:8]}",
-        "class": css_class,
-    }
 
-    return widget.render(field_name, content_json, attrs=attrs)
+@register.simple_tag
+def blocknote_render(content, css_class="blocknote-rendered"):
+    """
+    Render BlockNote content to HTML on the server, without JavaScript
+    Usage:
+        {% blocknote_render article.content %}
+        {% blocknote_render article.content css_class="prose" %}
+    """
+    return mark_safe(render_cached(content, css_class))
 
 
 # INFO: Can delete, here for reference
@@ -0,0 +1,185 @@
+"""Theme preferences of users, for readonly viewers.
+
+The theme is resolved by, in order:
+
+1. The callable named by `DJ_BN_THEME_RESOLVER`, taking the user and
+   returning "light", "dark", "auto" or None.
+2. The attribute path in `DJ_BN_THEME_ATTRIBUTE`, e.g. "profile.theme".
+3. With `DJ_BN_THEME_PROBE` enabled, `probe_user_theme`, which tries the
+   relations and attributes user models commonly keep a theme in.
+
+The resolvers are built once per process, and reset whenever one of their
+settings changes. Themes are memoized for the request with
+`RequestCacheMiddleware`.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+
+import structlog
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_blocknote.request_cache import memoize_for_request
+
+logger = structlog.get_logger(__name__)
+
+THEMES = ("light", "dark", "auto")
+
+# Settings the resolvers depend on
+THEME_SETTINGS = frozenset(
+    {
+        "DJ_BN_THEME_RESOLVER",
+        "DJ_BN_THEME_ATTRIBUTE",
+        "DJ_BN_THEME_PROBE",
+    },
+)
+
+ThemeResolver = Callable[[object], str | None]
+
+_resolvers: list[ThemeResolver] | None = None
+_lock = threading.Lock()
+
+
+def get_user_theme(user):
+    """
+    The user's theme, "light", "dark" or "auto", None if unknown or for
+    anonymous users.
+    """
+    if not user or not user.is_authenticated:
+        return None
+
+    resolvers = get_theme_resolvers()
+    if not resolvers:
+        return None
+
+    def resolve():
+        for resolver in resolvers:
+            theme = resolver(user)
+            if theme in THEMES:
+                return theme
+        return None
+
+    return memoize_for_request(("djbn_user_theme", user.pk), resolve)
+
+
+def make_attribute_resolver(path: str) -> ThemeResolver:
+    """A resolver reading the dotted attribute `path` from the user.
+
+    Missing attributes and related objects resolve to None.
+    """
+    names = path.split(".")
+
+    def resolve(user):
+        value = user
+        try:
+            for name in names:
+                value = getattr(value, name)
+                if value is None:
+                    return None
+        except (AttributeError, ObjectDoesNotExist):
+            return None
+        return value
+
+    return resolve
+
+
+def get_theme_resolvers() -> list[ThemeResolver]:
+    """The theme resolvers, in the order they're tried, see the module."""
+    global _resolvers  # noqa: PLW0603
+    if _resolvers is None:
+        with _lock:
+            if _resolvers is None:
+                resolvers = []
+                if settings.DJ_BN_THEME_RESOLVER:
+                    resolvers.append(import_string(settings.DJ_BN_THEME_RESOLVER))
+                if settings.DJ_BN_THEME_ATTRIBUTE:
+                    resolvers.append(
+                        make_attribute_resolver(settings.DJ_BN_THEME_ATTRIBUTE),
+                    )
+                if settings.DJ_BN_THEME_PROBE:
+                    resolvers.append(probe_user_theme)
+                _resolvers = resolvers
+    return _resolvers
+
+
+def load_theme_resolvers() -> None:
+    """Resolves the theme resolvers up front, called when the app is ready.
+
+    Failures are logged rather than raised, the system checks report them.
+    """
+    try:
+        get_theme_resolvers()
+    except ImportError:
+        logger.exception(
+            event="load_theme_resolvers_error",
+            msg="Unable to import the theme resolver",
+            data={"resolver": settings.DJ_BN_THEME_RESOLVER},
+        )
+
+
+@receiver(setting_changed)
+def reset_theme_resolvers_on_setting_changed(sender, setting, **kwargs):
+    """Rebuild the resolvers when a setting they depend on changes."""
+    global _resolvers  # noqa: PLW0603
+    if setting in THEME_SETTINGS:
+        with _lock:
+            _resolvers = None
+
+
+def probe_user_theme(user):
+    """
+    Robust user theme detection supporting multiple patterns:
+    - user.profile.theme (field or property)
+    - user.userprofile.theme (field or property)
+    - user.preferences.theme (field or property)
+    - user.theme_preference (direct field)
+
+    Each probe of a missing reverse relation may cost a query, so this is
+    only used with DJ_BN_THEME_PROBE enabled.
+    """
+    # List of possible theme attribute paths to check
+    theme_paths = [
+        ("profile", "theme"),
+        ("userprofile", "theme"),
+        ("preferences", "theme"),
+        ("user_preferences", "theme"),
+        ("settings", "theme"),
+    ]
+
+    # Check each possible path
+    for relation_name, theme_attr in theme_paths:
+        try:
+            # Check if user has the relation
+            if hasattr(user, relation_name):
+                relation_obj = getattr(user, relation_name, None)
+                # Handle case where relation exists but is None
+                if relation_obj is None:
+                    continue
+                # Check if the relation object has the theme attribute
+                if hasattr(relation_obj, theme_attr):
+                    theme_value = getattr(relation_obj, theme_attr, None)
+                    # Validate theme value
+                    if theme_value and theme_value in THEMES:
+                        return theme_value
+        except (AttributeError, ObjectDoesNotExist, TypeError):
+            # Continue to next path if this one fails
+            continue
+
+    # Check for direct theme attributes on user
+    direct_theme_attrs = ["theme", "theme_preference", "ui_theme", "color_scheme"]
+    for attr_name in direct_theme_attrs:
+        try:
+            if hasattr(user, attr_name):
+                theme_value = getattr(user, attr_name, None)
+                if theme_value and theme_value in THEMES:
+                    return theme_value
+        except (AttributeError, TypeError):
+            continue
+
+    return None
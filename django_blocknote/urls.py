@@ -1,9 +1,17 @@
 from django.urls import path
 
 from django_blocknote.views import (
+    block_range,
+    check_image,
+    chunked_upload,
+    chunked_upload_finalize,
+    chunked_upload_start,
     remove_image,
+    serve_image,
     upload_file,
     upload_image,
+    upload_images,
+    upload_metrics,
 )
 
 app_name = "django_blocknote"
@@ -15,11 +23,51 @@ urlpatterns = [
         upload_image,
         name="upload_image",
     ),
+    path(
+        "upload-image/chunked/",
+        chunked_upload_start,
+        name="chunked_upload_start",
+    ),
+    path(
+        "upload-image/chunked/<str:upload_id>/",
+        chunked_upload,
+        name="chunked_upload",
+    ),
+    path(
+        "upload-image/chunked/<str:upload_id>/finalize/",
+        chunked_upload_finalize,
+        name="chunked_upload_finalize",
+    ),
+    path(
+        "upload-images/",
+        upload_images,
+        name="upload_images",
+    ),
+    path(
+        "check-image/",
+        check_image,
+        name="check_image",
+    ),
     path(
         "remove-image/",
         remove_image,
         name="remove_image",
     ),
+    path(
+        "metrics/",
+        upload_metrics,
+        name="upload_metrics",
+    ),
+    path(
+        "blocks/<str:token>/",
+        block_range,
+        name="block_range",
+    ),
+    path(
+        "image/<path:name>",
+        serve_image,
+        name="serve_image",
+    ),
     path(
         "upload-file/",
         upload_file,
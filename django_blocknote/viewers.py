@@ -0,0 +1,292 @@
+"""Readonly viewers of BlockNote content.
+
+`blocknote_viewer` renders a single document. Pages listing many documents
+use `iter_render_viewers`, or the `blocknote_viewer_list` tag, which build
+the viewer config, resolve the user's theme, resolve the upload URLs and
+load the widget template once for the whole list:
+
+    from django.http import StreamingHttpResponse
+
+    def feed(request):
+        posts = Post.objects.all()
+        return StreamingHttpResponse(
+            iter_render_viewers(
+                (post.content for post in posts),
+                user=request.user,
+                hydrate="visible",
+            ),
+        )
+
+Very large documents are streamed with `streaming_viewer_response`, which
+yields the viewer's JSON payload per top-level block instead of building it
+in memory, or paginated with `render_paginated_viewer`, which embeds the
+first blocks only and lets the viewer fetch the rest as the reader scrolls.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import structlog
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.forms.renderers import get_default_renderer
+from django.http import StreamingHttpResponse
+from django.urls import NoReverseMatch, reverse
+
+from django_blocknote.block_ranges import (
+    get_document_block_index,
+    make_block_range_token,
+)
+from django_blocknote.render import iter_render_chunks, parse_blocks
+from django_blocknote.render.renderer import STREAM_CHUNK_SIZE
+from django_blocknote.themes import get_user_theme
+from django_blocknote.widgets import JSON_SCRIPT_ESCAPES, BlockNoteWidget
+
+logger = structlog.get_logger(__name__)
+
+VIEWER_FIELD_NAME = "blocknote_content"
+
+
+def get_viewer_config(user=None, theme: str | None = None) -> dict[str, Any]:
+    """
+    The editor config of readonly viewers, with the theme resolved.
+    Theme priority: explicit > user preference > setting default
+    """
+    # Get viewer config from settings
+    viewer_config = getattr(
+        settings,
+        "DJ_BN_VIEWER_CONFIG",
+        {
+            "theme": "light",
+            "animations": True,
+        },
+    )
+    # Handle if it's accidentally a tuple
+    if isinstance(viewer_config, tuple):
+        viewer_config = viewer_config[0].copy()
+    else:
+        viewer_config = viewer_config.copy()
+
+    if theme:
+        # Explicit override has highest priority
+        viewer_config["theme"] = theme
+    else:
+        # Try to get user's theme preference
+        user_theme = get_user_theme(user)
+        if user_theme:
+            viewer_config["theme"] = user_theme
+
+    return viewer_config
+
+
+def iter_render_viewers(
+    contents: Iterable[Any],
+    *,
+    user=None,
+    css_class: str = "blocknote-viewer",
+    theme: str | None = None,
+    hydrate: str = "eager",
+) -> Iterator[str]:
+    """Renders a readonly viewer for each document, yielding them one by one.
+
+    Args:
+        contents: The documents, block lists as stored in a `BlockNoteField`.
+        user: The user whose theme the viewers use, if `theme` isn't given.
+        css_class: The class of each viewer.
+        theme: The theme of the viewers, overriding the user's.
+        hydrate: When the viewers mount, see `BlockNoteWidget`.
+
+    Yields:
+        The HTML of each viewer.
+    """
+    widget = BlockNoteWidget(
+        mode="readonly",
+        editor_config=get_viewer_config(user, theme),
+        attrs={"class": css_class},
+        hydrate=hydrate,
+    )
+    shared_context = widget.get_shared_context()
+    template = get_default_renderer().get_template(widget.template_name)
+
+    # One random prefix keeps the ids unique across lists on the page
+    id_prefix = f"blocknote_viewer_{uuid.uuid4().hex[:8]}"
+    for index, content in enumerate(contents):
+        attrs = {"id": f"{id_prefix}_{index}", "class": css_class}
+        context = widget.get_value_context(
+            VIEWER_FIELD_NAME,
+            content or [],
+            attrs,
+            shared_context,
+        )
+        yield template.render(context).strip()
+
+
+def _iter_json_chunks(blocks: list, chunk_size: int) -> Iterator[str]:
+    """The JSON of a block list, escaped for a script element, in chunks."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    buffer = ["["]
+    size = 1
+    for index, block in enumerate(blocks):
+        encoded = encoder.encode(block).translate(JSON_SCRIPT_ESCAPES)
+        buffer.append(f", {encoded}" if index else encoded)
+        size += len(encoded)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    buffer.append("]")
+    yield "".join(buffer)
+
+
+def iter_render_viewer(
+    content: Any,
+    *,
+    user=None,
+    container_id: str | None = None,
+    css_class: str = "blocknote-viewer",
+    theme: str | None = None,
+    hydrate: str = "eager",
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[str]:
+    """Renders a readonly viewer for a document in chunks.
+
+    The viewer markup is rendered once around placeholders, which are then
+    replaced by the document's JSON, and its server render for lazily
+    hydrated viewers, streamed per top-level block.
+
+    Yields:
+        The HTML of the viewer.
+    """
+    blocks = parse_blocks(content)
+    widget = BlockNoteWidget(
+        mode="readonly",
+        editor_config=get_viewer_config(user, theme),
+        attrs={"class": css_class},
+        hydrate=hydrate,
+    )
+    attrs = {
+        "id": container_id or f"blocknote_viewer_{uuid.uuid4().hex[:8]}",
+        "class": css_class,
+    }
+    context = widget.get_value_context(
+        VIEWER_FIELD_NAME,
+        [],
+        attrs,
+        widget.get_shared_context(),
+    )
+
+    # Alphanumeric, so the markers survive escaping unchanged
+    marker = uuid.uuid4().hex
+    content_marker = f"djbncontent{marker}"
+    rendered_marker = f"djbnrendered{marker}"
+    context["has_content"] = bool(blocks)
+    context["widget"]["initial_content"] = content_marker
+    if hydrate != "eager":
+        context["rendered_content"] = rendered_marker
+
+    template = get_default_renderer().get_template(widget.template_name)
+    # Stripped like the form renderer does
+    html = template.render(context).strip()
+
+    streams = {
+        content_marker: lambda: _iter_json_chunks(blocks, chunk_size),
+        rendered_marker: lambda: iter_render_chunks(blocks, chunk_size),
+    }
+    while True:
+        positions = [(html.find(found), found) for found in streams if found in html]
+        if not positions:
+            break
+        position, found = min(positions)
+        yield html[:position]
+        yield from streams.pop(found)()
+        html = html[position + len(found) :]
+    yield html
+
+
+def streaming_viewer_response(content: Any, **kwargs: Any) -> StreamingHttpResponse:
+    """A response streaming a readonly viewer, see `iter_render_viewer`.
+
+    Keyword arguments are passed to `iter_render_viewer`.
+    """
+    return StreamingHttpResponse(
+        iter_render_viewer(content, **kwargs),
+        content_type="text/html; charset=utf-8",
+    )
+
+
+def render_paginated_viewer(
+    instance,
+    field_name: str,
+    *,
+    user=None,
+    page_size: int | None = None,
+    container_id: str | None = None,
+    css_class: str = "blocknote-viewer",
+    theme: str | None = None,
+    hydrate: str = "eager",
+) -> str:
+    """Renders a readonly viewer embedding the first blocks of a document.
+
+    The viewer fetches the remaining top-level blocks from the `block_range`
+    view as the reader scrolls, see `django_blocknote.block_ranges`.
+    Documents that fit in one page, or apps without the django_blocknote
+    URLs, get a regular viewer.
+
+    Args:
+        instance: The saved model instance holding the document.
+        field_name: The name of its `BlockNoteField`.
+        user: The user whose theme the viewer uses, if `theme` isn't given.
+        page_size: The top-level blocks embedded, `DJ_BN_VIEWER_PAGE_SIZE`
+            by default.
+        container_id: The id of the viewer.
+        css_class: The class of the viewer.
+        theme: The theme of the viewer, overriding the user's.
+        hydrate: When the viewer mounts, see `BlockNoteWidget`.
+
+    Returns:
+        The HTML of the viewer.
+    """
+    page_size = page_size or settings.DJ_BN_VIEWER_PAGE_SIZE
+    blocks = parse_blocks(getattr(instance, field_name))
+
+    block_range = None
+    if len(blocks) > page_size and instance.pk is not None:
+        index = get_document_block_index(instance, field_name, blocks)
+        token = make_block_range_token(instance, field_name, index.digest)
+        try:
+            url = reverse("django_blocknote:block_range", kwargs={"token": token})
+        except NoReverseMatch:
+            logger.debug(
+                event="url_resolution_failed",
+                msg="No block range URL configured, embedding the whole document",
+                data={"url_name": "django_blocknote:block_range"},
+            )
+        else:
+            block_range = {"url": url, "total": index.total, "loaded": page_size}
+            blocks = blocks[:page_size]
+
+    widget = BlockNoteWidget(
+        mode="readonly",
+        editor_config=get_viewer_config(user, theme),
+        attrs={"class": css_class},
+        hydrate=hydrate,
+    )
+    attrs = {
+        "id": container_id or f"blocknote_viewer_{uuid.uuid4().hex[:8]}",
+        "class": css_class,
+    }
+    context = widget.get_value_context(
+        VIEWER_FIELD_NAME,
+        blocks,
+        attrs,
+        widget.get_shared_context(),
+    )
+    context["block_range"] = block_range
+
+    template = get_default_renderer().get_template(widget.template_name)
+    # Stripped like the form renderer does
+    return template.render(context).strip()
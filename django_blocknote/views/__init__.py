@@ -1,11 +1,35 @@
+from .async_views import (
+    aremove_image,
+    aupload_file,
+    aupload_image,
+)
 from .views import (
+    block_range,
+    check_image,
+    chunked_upload,
+    chunked_upload_finalize,
+    chunked_upload_start,
     remove_image,
+    serve_image,
     upload_file,
     upload_image,
+    upload_images,
+    upload_metrics,
 )
 
 __all__ = [
+    "aremove_image",
+    "aupload_file",
+    "aupload_image",
+    "block_range",
+    "check_image",
+    "chunked_upload",
+    "chunked_upload_finalize",
+    "chunked_upload_start",
     "remove_image",
+    "serve_image",
     "upload_file",
     "upload_image",
+    "upload_images",
+    "upload_metrics",
 ]
@@ -0,0 +1,223 @@
+# async_views.py
+"""Async versions of the upload and removal views for ASGI deployments.
+
+Select them by including `django_blocknote.async_urls` instead of
+`django_blocknote.urls`. The event loop is never blocked on an upload:
+image verification, conversion and the storage save run on a bounded pool
+of `DJ_BN_ASYNC_UPLOAD_WORKERS` threads, and removal requests use the async
+ORM throughout.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import (
+    Http404,
+    HttpResponseNotAllowed,
+    JsonResponse,
+)
+from django.utils.translation import pgettext_lazy as _
+
+from django_blocknote.image import (
+    aprocess_image_urls,
+    atrigger_cleanup_if_needed,
+    has_permission_to_upload_images,
+)
+
+from .views import _upload_response, _verify_and_process_image
+
+logger = structlog.get_logger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _async_post_view(view):
+    """
+    `csrf_exempt` and `require_http_methods(["POST"])` for async views.
+
+    The Django decorators only accept async views from Django 5.0.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        return await view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DJ_BN_ASYNC_UPLOAD_WORKERS,
+                    thread_name_prefix="BlockNoteUpload",
+                )
+    return _executor
+
+
+def _run_upload_task(func, *args):
+    try:
+        return func(*args)
+    finally:
+        # Pool threads outlive the request, don't leave connections open
+        connections.close_all()
+
+
+async def _run_in_upload_executor(func, *args):
+    """Run blocking upload work on the upload pool, in a copy of the context."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_upload_executor(),
+        functools.partial(context.run, _run_upload_task, func, *args),
+    )
+
+
+async def _aget_upload_user(request):
+    if hasattr(request, "auser"):
+        user = await request.auser()
+    else:
+        user = await sync_to_async(getattr)(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+@_async_post_view
+async def aupload_image(request):
+    """
+    Async version of `upload_image`.
+    Returns JSON with the uploaded file URL
+    """
+    try:
+        if not await sync_to_async(has_permission_to_upload_images)(request):
+            raise Http404(  # noqa: TRY301
+                _(
+                    "Message",
+                    "Page not found.",
+                ),
+            )
+
+        # Check if file was provided
+        if "file" not in request.FILES:
+            return JsonResponse(
+                {"error": "No file provided", "code": "NO_FILE"},
+                status=400,
+            )
+
+        uploaded_file = request.FILES["file"]
+        payload, status = await _run_in_upload_executor(
+            _verify_and_process_image,
+            request,
+            uploaded_file,
+        )
+        return _upload_response(payload, status)
+
+    except Http404:
+        raise
+
+    except Exception:
+        msg = "Upload failed"
+        logger.exception(
+            event="aupload_image",
+            msg=msg,
+            data={},
+        )
+        return JsonResponse(
+            {
+                "error": msg,
+                "code": "SERVER_ERROR",
+            },
+            status=500,
+        )
+
+
+@_async_post_view
+async def aremove_image(request):
+    """
+    Async version of `remove_image`.
+    """
+    error_response = None
+
+    try:
+        # Consolidated validation
+        if not request.body:
+            error_response = {"message": "Empty request body", "code": "EMPTY_BODY"}
+        else:
+            try:
+                data = json.loads(request.body.decode("utf-8"))
+
+                if "imageUrls" not in data:
+                    error_response = {
+                        "message": "Missing 'imageUrls' field",
+                        "code": "MISSING_FIELD",
+                    }
+                elif not isinstance(data["imageUrls"], list):
+                    error_response = {
+                        "message": "imageUrls must be a list",
+                        "code": "INVALID_TYPE",
+                    }
+
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                logger.warning(
+                    event="aremove_image",
+                    msg="Invalid JSON received",
+                    data={"error": str(e), "content_type": request.content_type},
+                )
+                error_response = {
+                    "message": "Invalid JSON format",
+                    "code": "INVALID_JSON",
+                }
+
+        # Return validation error if any
+        if error_response:
+            return JsonResponse({"error": error_response}, status=400)
+
+        result = await aprocess_image_urls(
+            image_urls=data["imageUrls"],
+            user=await _aget_upload_user(request),
+        )
+
+        if result["success"]:
+            return JsonResponse(result["data"], status=result["status_code"])
+        return JsonResponse(
+            {"error": result["error"]},
+            status=result["status_code"],
+        )
+
+    except Exception:
+        logger.exception(
+            event="aremove_image",
+            msg="Unexpected error in remove_image view",
+            data={},
+        )
+        return JsonResponse(
+            {"error": {"message": "Internal server error", "code": "INTERNAL_ERROR"}},
+            status=500,
+        )
+    finally:
+        # Always check if cleanup is needed (regardless of request success/failure)
+        await atrigger_cleanup_if_needed()
+
+
+@_async_post_view
+async def aupload_file(request):
+    """
+    Async version of `upload_file`.
+    """
+    return JsonResponse(
+        {"error": "File upload not permitted", "code": "PERMISSION"},
+        status=400,
+    )
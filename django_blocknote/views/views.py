@@ -1,25 +1,53 @@
 # views.py
 import json
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 
 import structlog
+from django.conf import settings
+from django.db import connections
 from django.http import (
     Http404,
+    HttpResponse,
+    HttpResponseRedirect,
     JsonResponse,
 )
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.translation import pgettext_lazy as _
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
+from django_blocknote.block_ranges import get_block_range
 from django_blocknote.exceptions import (
+    BlockRangeError,
+    ChunkedUploadError,
+    ImageTooLargeError,
     InvalidImageTypeError,
     PillowImageError,
+    UploadRejectedError,
 )
 from django_blocknote.image import (
-    handle_uploaded_image,
+    admit_upload,
+    append_chunk,
+    check_upload_rate,
+    choose_image_variant,
+    finalize_chunked_upload,
+    find_existing_image,
+    get_available_variants,
+    get_chunked_upload,
+    get_dedup_owner,
+    get_image_storage,
+    get_upload_identity,
+    has_permission_to_read_metrics,
     has_permission_to_upload_images,
     image_verify,
+    is_upload_name,
+    is_valid_digest,
     process_image_urls,
+    process_uploaded_image,
+    remove_chunked_upload,
+    render_prometheus_metrics,
+    start_chunked_upload,
     trigger_cleanup_if_needed,
 )
 
@@ -71,64 +99,503 @@ def upload_image(request):
             },
         )
 
-        try:
-            image_verify(uploaded_file)
-            logger.debug(
-                event="view_for_upload_image",
-                msg="Image verified",
-                data={
-                    "files_object": request.FILES,
-                    "file": request.FILES["file"],
-                },
-            )
+        payload, status = _verify_and_process_image(request, uploaded_file)
+        return _upload_response(payload, status)
+
+    except Exception:
+        msg = ("Upload failed",)
+        logger.exception(
+            event="upload_image",
+            msg=msg,
+            data={},
+        )
+        return JsonResponse(
+            {
+                "error": msg,
+                "code": "SERVER_ERROR",
+            },
+            status=500,
+        )
+
+
+def _verify_and_process_image(
+    request,
+    uploaded_file,
+    *,
+    charge: bool = True,
+) -> tuple[dict, int]:
+    """
+    Verify one uploaded image and save it, once admitted for processing.
+
+    Args:
+        request: The upload request.
+        uploaded_file: The uploaded image.
+        charge: Whether to charge the upload rate, see `admit_upload`.
+
+    Returns:
+        The JSON payload for the file and its HTTP status code.
+    """
+    try:
+        with admit_upload(request, charge=charge):
+            return _verify_and_save_image(request, uploaded_file)
+
+    except UploadRejectedError as e:
+        return _rejected_payload(e), e.status
+
+
+def _rejected_payload(error: UploadRejectedError) -> dict:
+    return {
+        "error": str(error),
+        "code": error.code,
+        "retry_after": error.retry_after,
+    }
+
+
+def _verify_and_save_image(request, uploaded_file) -> tuple[dict, int]:
+    try:
+        image_verify(uploaded_file)
+        logger.debug(
+            event="view_for_upload_image",
+            msg="Image verified",
+            data={
+                "file": uploaded_file,
+            },
+        )
+
+        content_type = (
+            uploaded_file.content_type or mimetypes.guess_type(uploaded_file.name)[0]
+        )
+
+    except PillowImageError as e:
+        msg = str(e)
+        logger.exception(
+            event="upload_image",
+            msg=msg,
+            data={},
+        )
+        return {"error": msg, "code": "VERIFICATION"}, 400
+
+    except InvalidImageTypeError as e:
+        msg = str(e)
+        logger.exception(
+            event="upload_image",
+            msg=msg,
+            data={},
+        )
+        return {"error": msg, "code": "VALIDATION"}, 400
+
+    except ImageTooLargeError as e:
+        msg = str(e)
+        logger.exception(
+            event="upload_image",
+            msg=msg,
+            data={},
+        )
+        return {"error": msg, "code": "TOO_LARGE"}, 413
+
+    uploaded_image = process_uploaded_image(request, uploaded_file)
+    return {
+        "url": uploaded_image["url"],
+        "filename": uploaded_file.name,
+        "size": uploaded_file.size,
+        "content_type": content_type,
+        "width": uploaded_image.get("width"),
+        "height": uploaded_image.get("height"),
+        "placeholder": uploaded_image.get("placeholder"),
+    }, 200
+
+
+def _upload_response(payload: dict, status: int) -> JsonResponse:
+    """
+    The JSON response for an upload result, with `Retry-After` when rejected.
+    """
+    response = JsonResponse(payload, status=status)
+    if "retry_after" in payload:
+        response["Retry-After"] = str(payload["retry_after"])
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def upload_images(request):
+    """
+    Handle several image uploads for BlockNote editor in one request.
 
-            content_type = (
-                uploaded_file.content_type
-                or mimetypes.guess_type(uploaded_file.name)[0]
+    Files are posted as `files` and processed concurrently on a pool of at
+    most `DJ_BN_BATCH_UPLOAD_WORKERS` threads. Returns JSON with one result
+    per file, in the order posted. Each result is what `upload_image` returns
+    for that file, plus its `status`, so some files can fail while others
+    succeed. The whole batch counts as one upload against the rate limit.
+    """
+    try:
+        if not has_permission_to_upload_images(request):
+            raise Http404(  # noqa: TRY301
+                _(
+                    "Message",
+                    "Page not found.",
+                ),
             )
 
-        except PillowImageError as e:
-            msg = str(e)
-            logger.exception(
-                event="upload_image",
-                msg=msg,
-                data={},
+        uploaded_files = request.FILES.getlist("files")
+        if not uploaded_files:
+            return JsonResponse(
+                {"error": "No files provided", "code": "NO_FILE"},
+                status=400,
             )
+
+        max_files = settings.DJ_BN_BATCH_UPLOAD_MAX_FILES
+        if len(uploaded_files) > max_files:
             return JsonResponse(
                 {
-                    "error": msg,
-                    "code": "VERIFICATION",
+                    "error": f"At most {max_files} files can be uploaded at once",
+                    "code": "TOO_MANY_FILES",
                 },
                 status=400,
             )
 
-        except InvalidImageTypeError as e:
-            msg = str(e)
-            logger.exception(
-                event="upload_image",
-                msg=msg,
-                data={},
+        try:
+            check_upload_rate(request)
+        except UploadRejectedError as e:
+            return _upload_response(_rejected_payload(e), e.status)
+
+        workers = min(settings.DJ_BN_BATCH_UPLOAD_WORKERS, len(uploaded_files))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    lambda uploaded_file: _process_batch_file(request, uploaded_file),
+                    uploaded_files,
+                ),
+            )
+
+        succeeded = sum(1 for result in results if result["status"] == 200)
+        logger.debug(
+            event="view_for_upload_images",
+            msg="Processed batch upload",
+            data={
+                "files": len(results),
+                "succeeded": succeeded,
+                "workers": workers,
+            },
+        )
+        return JsonResponse(
+            {
+                "results": results,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+            },
+            status=200,
+        )
+
+    except Http404:
+        raise
+
+    except Exception:
+        msg = "Upload failed"
+        logger.exception(
+            event="upload_images",
+            msg=msg,
+            data={},
+        )
+        return JsonResponse(
+            {
+                "error": msg,
+                "code": "SERVER_ERROR",
+            },
+            status=500,
+        )
+
+
+def _process_batch_file(request, uploaded_file) -> dict:
+    """Process one file of a batch upload, on a worker thread."""
+    try:
+        payload, status = _verify_and_process_image(
+            request,
+            uploaded_file,
+            charge=False,
+        )
+    except Exception:
+        logger.exception(
+            event="upload_images",
+            msg="Upload failed",
+            data={"filename": uploaded_file.name},
+        )
+        payload, status = (
+            {
+                "filename": uploaded_file.name,
+                "error": "Upload failed",
+                "code": "SERVER_ERROR",
+            },
+            500,
+        )
+    finally:
+        # Worker threads open their own database connections, close them
+        # rather than leave them to linger after the pool shuts down
+        connections.close_all()
+
+    payload.setdefault("filename", uploaded_file.name)
+    return {**payload, "status": status}
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def chunked_upload_start(request):
+    """
+    Start a resumable chunked image upload.
+
+    The client posts JSON with the `filename`, total `size` and optional
+    `content_type`, and gets back the `upload_id` and maximum `chunk_size`.
+    Chunks are then sent to `chunked_upload` and the upload finished with
+    `chunked_upload_finalize`. Starting counts as the upload against the
+    rate limit, and each uploader may only have
+    `DJ_BN_CHUNKED_UPLOAD_MAX_OPEN` uploads in progress.
+    """
+    try:
+        if not has_permission_to_upload_images(request):
+            raise Http404(  # noqa: TRY301
+                _(
+                    "Message",
+                    "Page not found.",
+                ),
+            )
+
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+            filename, size = data["filename"], data["size"]
+            content_type = data.get("content_type", "")
+        except (
+            json.JSONDecodeError,
+            UnicodeDecodeError,
+            KeyError,
+            TypeError,
+            AttributeError,
+        ):
+            return JsonResponse(
+                {"error": "Expected JSON with 'filename' and 'size'", "code": "INVALID"},
+                status=400,
+            )
+
+        try:
+            with admit_upload(request):
+                upload = start_chunked_upload(
+                    filename=filename,
+                    size=size,
+                    content_type=content_type,
+                    user=_get_upload_user(request),
+                    identity=get_upload_identity(request),
+                )
+        except UploadRejectedError as e:
+            return _upload_response(_rejected_payload(e), e.status)
+
+        return JsonResponse(upload, status=201)
+
+    except Http404:
+        raise
+
+    except ChunkedUploadError as e:
+        return _chunked_upload_error_response(e)
+
+    except Exception:
+        return _chunked_upload_server_error("chunked_upload_start")
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PATCH", "DELETE"])
+def chunked_upload(request, upload_id):
+    """
+    Query, continue or abort a chunked image upload.
+
+    GET returns the current `offset`, where an interrupted upload resumes.
+    PATCH appends the raw request body as a chunk starting at the
+    `Upload-Offset` header, and returns the new `offset`. DELETE aborts.
+    """
+    try:
+        if not has_permission_to_upload_images(request):
+            raise Http404(  # noqa: TRY301
+                _(
+                    "Message",
+                    "Page not found.",
+                ),
+            )
+
+        user = _get_upload_user(request)
+        match request.method:
+            case "GET":
+                upload = get_chunked_upload(upload_id, user)
+                return JsonResponse(
+                    {
+                        "upload_id": upload_id,
+                        "offset": upload["offset"],
+                        "size": upload["size"],
+                    },
+                    status=200,
+                )
+            case "PATCH":
+                try:
+                    offset = int(request.headers["Upload-Offset"])
+                except (KeyError, ValueError):
+                    return JsonResponse(
+                        {"error": "Missing Upload-Offset header", "code": "INVALID"},
+                        status=400,
+                    )
+                new_offset = append_chunk(upload_id, offset, request, user)
+                return JsonResponse(
+                    {"upload_id": upload_id, "offset": new_offset},
+                    status=200,
+                )
+            case _:
+                get_chunked_upload(upload_id, user)
+                remove_chunked_upload(upload_id)
+                return JsonResponse({"upload_id": upload_id}, status=200)
+
+    except Http404:
+        raise
+
+    except ChunkedUploadError as e:
+        return _chunked_upload_error_response(e)
+
+    except Exception:
+        return _chunked_upload_server_error("chunked_upload")
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def chunked_upload_finalize(request, upload_id):
+    """
+    Finish a chunked image upload.
+
+    The assembled file goes through the same verification and conversion as
+    `upload_image`, and the response is the same.
+    """
+    try:
+        if not has_permission_to_upload_images(request):
+            raise Http404(  # noqa: TRY301
+                _(
+                    "Message",
+                    "Page not found.",
+                ),
+            )
+
+        uploaded_file = finalize_chunked_upload(upload_id, _get_upload_user(request))
+        status = None
+        try:
+            # The rate was charged when the upload started
+            payload, status = _verify_and_process_image(
+                request,
+                uploaded_file,
+                charge=False,
             )
+        finally:
+            uploaded_file.close()
+            # A rejected upload is kept, so the client can finalize it later
+            if status not in (429, 503):
+                remove_chunked_upload(upload_id)
+
+        return _upload_response(payload, status)
+
+    except Http404:
+        raise
+
+    except ChunkedUploadError as e:
+        return _chunked_upload_error_response(e)
+
+    except Exception:
+        return _chunked_upload_server_error("chunked_upload_finalize")
+
+
+def _get_upload_user(request):
+    user = getattr(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def _chunked_upload_error_response(error: ChunkedUploadError) -> JsonResponse:
+    payload = {"error": str(error), "code": error.code}
+    if error.offset is not None:
+        payload["offset"] = error.offset
+    return JsonResponse(payload, status=error.status)
+
+
+def _chunked_upload_server_error(event: str) -> JsonResponse:
+    msg = "Upload failed"
+    logger.exception(
+        event=event,
+        msg=msg,
+        data={},
+    )
+    return JsonResponse(
+        {
+            "error": msg,
+            "code": "SERVER_ERROR",
+        },
+        status=500,
+    )
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def check_image(request):
+    """
+    Pre-flight check for image uploads.
+
+    The client posts the SHA-256 digest and size of the original file, and
+    gets back the URL of the stored image if the user uploaded the same
+    content before. Only a miss requires the file itself to be uploaded.
+    """
+    try:
+        if not has_permission_to_upload_images(request):
+            raise Http404(  # noqa: TRY301
+                _(
+                    "Message",
+                    "Page not found.",
+                ),
+            )
+
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+            digest = data["sha256"]
+            size = data["size"]
+        except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+            return JsonResponse(
+                {"error": "Expected JSON with 'sha256' and 'size'", "code": "INVALID"},
+                status=400,
+            )
+
+        if not is_valid_digest(digest) or not isinstance(size, int) or size < 0:
             return JsonResponse(
-                {"error": msg, "code": "VALIDATION"},
+                {"error": "Invalid 'sha256' or 'size'", "code": "INVALID"},
                 status=400,
             )
 
-        url = handle_uploaded_image(request)
+        existing = find_existing_image(digest, size, get_dedup_owner(request))
+        logger.debug(
+            event="view_for_check_image",
+            msg="Checked image digest",
+            data={
+                "digest": digest,
+                "size": size,
+                "exists": existing is not None,
+            },
+        )
+        if existing is None:
+            return JsonResponse({"exists": False}, status=200)
+
         return JsonResponse(
             {
-                "url": url,
-                "filename": uploaded_file.name,
-                "size": uploaded_file.size,
-                "content_type": content_type,
+                "exists": True,
+                "url": existing["url"],
+                "width": existing.get("width"),
+                "height": existing.get("height"),
+                "placeholder": existing.get("placeholder"),
             },
             status=200,
         )
 
+    except Http404:
+        raise
+
     except Exception:
-        msg = ("Upload failed",)
+        msg = "Image check failed"
         logger.exception(
-            event="upload_image",
+            event="check_image",
             msg=msg,
             data={},
         )
@@ -141,6 +608,97 @@ def upload_image(request):
         )
 
 
+@require_http_methods(["GET", "HEAD"])
+def serve_image(request, name):
+    """
+    Redirect to the best stored format of an image for the requesting browser.
+
+    The format is chosen from the `Accept` header among the variants listed
+    in `DJ_BN_IMAGE_VARIANTS`, falling back to the stored image. Only
+    uploads, stored under `DJ_BN_UPLOAD_PATH`, are served.
+    """
+    if not is_upload_name(name):
+        raise Http404(_("Message", "Page not found."))
+
+    storage = get_image_storage()
+    if not storage.exists(name):
+        raise Http404(_("Message", "Page not found."))
+
+    available = get_available_variants(storage, name)
+    chosen = choose_image_variant(
+        name,
+        request.headers.get("accept", ""),
+        available,
+    )
+    logger.debug(
+        event="view_for_serve_image",
+        msg="Chose image variant",
+        data={
+            "name": name,
+            "available": available,
+            "chosen": chosen,
+        },
+    )
+
+    response = HttpResponseRedirect(storage.url(chosen))
+    patch_vary_headers(response, ["Accept"])
+    patch_cache_control(response, max_age=settings.DJ_BN_IMAGE_SERVE_MAX_AGE)
+    return response
+
+
+@require_http_methods(["GET"])
+def upload_metrics(request):
+    """
+    Upload stage timings in the Prometheus text format.
+
+    Only available with `DJ_BN_UPLOAD_METRICS` enabled, to staff users and
+    requests bearing `DJ_BN_UPLOAD_METRICS_TOKEN`. The metrics are
+    collected per process, so scrape each process, or aggregate the
+    `upload_stage_timed` signal yourself for multi-process servers.
+    """
+    if not (settings.DJ_BN_UPLOAD_METRICS and has_permission_to_read_metrics(request)):
+        raise Http404(_("Message", "Page not found."))
+
+    return HttpResponse(
+        render_prometheus_metrics(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@require_http_methods(["GET"])
+def block_range(request, token):
+    """
+    A range of top-level blocks of a document, for paginated viewers.
+
+    The `start` and `count` query parameters select the blocks, `count` is
+    capped at `DJ_BN_BLOCK_RANGE_MAX`. The token is the signed document
+    reference rendered into the viewer. Returns the `blocks`, the `start`
+    and `end` of the range, and the `total` blocks in the document, or 409
+    once the document has changed and 410 once it is deleted or the token
+    has expired.
+    """
+    try:
+        start = int(request.GET.get("start", 0))
+        count = int(request.GET.get("count", settings.DJ_BN_VIEWER_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse(
+            {"error": "Invalid start or count", "code": "INVALID"},
+            status=400,
+        )
+
+    try:
+        page = get_block_range(token, start, count)
+    except BlockRangeError as e:
+        return JsonResponse({"error": str(e), "code": e.code}, status=e.status)
+
+    # The blocks are already JSON, sliced from the cached block index
+    return HttpResponse(
+        f'{{"blocks":{page.blocks},"start":{page.start},'
+        f'"end":{page.end},"total":{page.total}}}',
+        content_type="application/json",
+    )
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def remove_image(request):
@@ -1,16 +1,48 @@
 import json
+import threading
 import uuid
+from typing import ClassVar
 
 import structlog
 from django import forms
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
-from django.urls import NoReverseMatch, reverse
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, get_script_prefix, get_urlconf, reverse
 
 from django_blocknote.assets import get_vite_asset
+from django_blocknote.render import render_cached
 
 logger = structlog.get_logger(__name__)
 
+# Escapes for JSON embedded in a <script> element, as in `json_script`
+JSON_SCRIPT_ESCAPES = {
+    ord(">"): "\\u003E",
+    ord("<"): "\\u003C",
+    ord("&"): "\\u0026",
+}
+
+# When the editor mounts: "eager" on page load, or lazily once "visible" in
+# the viewport, when the browser is "idle", or on the first "interaction"
+HYDRATE_MODES = ("eager", "visible", "idle", "interaction")
+
+# Most widget configurations whose serialized configs are kept
+CONFIG_CACHE_MAX_ENTRIES = 256
+
+
+def safe_json_dump(data, fallback="{}"):
+    """Convert data to JSON, safe to embed in a script element."""
+    try:
+        return json.dumps(
+            data,
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ).translate(JSON_SCRIPT_ESCAPES)
+    except (TypeError, ValueError):
+        return fallback
+
+
 templates = [
     {
         "id": "1",
@@ -173,10 +205,19 @@ class BlockNoteWidget(forms.Textarea):
                 menu_type='minimal'
             )
         )
+        # Or mount lazily, e.g. for pages with many readonly viewers:
+        content = forms.CharField(
+            widget=BlockNoteWidget(mode='readonly', hydrate='visible')
+        )
     """
 
     template_name = "django_blocknote/blocknote.html"
 
+    # Serialized configs, per widget configuration and settings version
+    _config_cache: ClassVar[dict[tuple, dict[str, str]]] = {}
+    _config_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    _settings_version: ClassVar[int] = 0
+
     def __init__(
         self,
         attrs=None,
@@ -186,6 +227,7 @@ class BlockNoteWidget(forms.Textarea):
         menu_type="default",
         mode="edit",
         template_max_blocks=None,
+        hydrate="eager",
     ):
         # Set default CSS class
         default_attrs = {"class": "django-blocknote-editor"}
@@ -201,6 +243,11 @@ class BlockNoteWidget(forms.Textarea):
         self.mode = mode
         self.template_max_blocks = template_max_blocks
 
+        if hydrate not in HYDRATE_MODES:
+            msg = f"hydrate must be one of {', '.join(HYDRATE_MODES)}, not {hydrate!r}"
+            raise ValueError(msg)
+        self.hydrate = hydrate
+
     @property
     def media(self):
         """Define CSS and JS assets required by this widget."""
@@ -246,18 +293,94 @@ class BlockNoteWidget(forms.Textarea):
 
     def get_context(self, name, value, attrs):
         """Build the template context for rendering the widget."""
-        context = super().get_context(name, value, attrs)
+        return self.get_value_context(name, value, attrs, self.get_shared_context())
 
-        # Generate unique ID for this editor instance
-        widget_id = attrs.get("id", f"blocknote_{uuid.uuid4().hex[:8]}")
+    def get_shared_context(self):
+        """
+        Serialize the configs, which are the same for every value rendered.
+        Rendering many values, e.g. with blocknote_viewer_list, builds them
+        once and passes them to get_value_context for each value.
+        """
+        shared_context = dict(self.get_config_context())
+        # Per user, so never memoized with the configs
+        shared_context["doc_templates"] = safe_json_dump(
+            self._get_user_templates(),
+            "[]",
+        )
+        return shared_context
 
-        def safe_json_dump(data, fallback="{}"):
-            """Convert data to JSON with error handling."""
-            try:
-                return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
-            except (TypeError, ValueError):
-                return fallback
+    @classmethod
+    def clear_config_cache(cls):
+        """Forget the serialized configs, e.g. when settings change."""
+        with cls._config_cache_lock:
+            BlockNoteWidget._settings_version += 1
+            cls._config_cache.clear()
+
+    def _get_config_cache_key(self):
+        """
+        Key of the serialized configs of this widget's configuration, None if
+        the configuration can't be keyed. Subclasses may build the configs
+        differently, the resolved upload and removal URLs depend on the
+        active URLconf and script prefix, and the pre-check URL on the user.
+        """
+        try:
+            widget_config = json.dumps(
+                [
+                    self.editor_config,
+                    self.image_upload_config,
+                    self.image_removal_config,
+                    self.menu_type,
+                    self.mode,
+                    self.template_max_blocks,
+                ],
+                cls=DjangoJSONEncoder,
+                sort_keys=True,
+            )
+        except (TypeError, ValueError):
+            return None
+        return (
+            self._settings_version,
+            type(self),
+            get_urlconf(),
+            get_script_prefix(),
+            self._can_precheck_uploads(),
+            widget_config,
+        )
+
+    def _can_precheck_uploads(self):
+        """Whether the user's uploads may be deduplicated, see check_image."""
+        user = self.attrs.get("user", None)
+        return bool(
+            getattr(settings, "DJ_BN_IMAGE_DEDUP", False)
+            and getattr(user, "is_authenticated", False),
+        )
 
+    def get_config_context(self):
+        """
+        The serialized editor, upload, removal, slash menu and template
+        configs. They only depend on settings, the widget's configuration and
+        whether the user's uploads can be deduplicated, so they are built once
+        and memoized on the class until a setting changes.
+        """
+        cache_key = self._get_config_cache_key()
+        if cache_key is not None:
+            config_context = self._config_cache.get(cache_key)
+            if config_context is not None:
+                return config_context
+
+        config_context = self._build_config_context()
+
+        if cache_key is not None:
+            with self._config_cache_lock:
+                # A setting changed while building, keep the stale configs out
+                if cache_key[0] == self._settings_version:
+                    if len(self._config_cache) >= CONFIG_CACHE_MAX_ENTRIES:
+                        self._config_cache.clear()
+                    self._config_cache[cache_key] = config_context
+        return config_context
+
+    def _build_config_context(self):
+        """Build and serialize the configs, see get_config_context."""
         # 🔧 INTERFACE TRANSLATION: Convert Django config to BlockNote format
         translated_editor_config = self.translate_editor_config_to_blocknote(
             self.editor_config.copy() if self.editor_config else {}
@@ -270,18 +393,41 @@ class BlockNoteWidget(forms.Textarea):
             "image_removal_config": self._get_image_removal_config(),
             "slash_menu_config": self._get_slash_menu_config(),
             "template_config": self._get_template_config(),
-            "initial_content": self.format_value(value),
-            "doc_templates": self._get_user_templates(),
         }
 
+        # Debug output in development
+        if getattr(settings, "DEBUG", False):
+            logger.debug(
+                event="blocknote_widget_context",
+                msg="BlockNote Widget Context",
+                data={
+                    "mode": self.mode,
+                    "editor_config": self.editor_config,
+                    "translated_config": translated_editor_config,
+                    "configs": configs,
+                },
+            )
+
         # Add all configs to context as JSON
-        for key, config_data in configs.items():
-            fallback = "[]" if key in ["initial_content", "doc_templates"] else "{}"
-            context["widget"][key] = safe_json_dump(config_data, fallback)
+        return {
+            key: safe_json_dump(config_data)
+            for key, config_data in configs.items()
+        }
+
+    def get_value_context(self, name, value, attrs, shared_context):
+        """Build the template context for a value, from the shared configs."""
+        context = super().get_context(name, value, attrs)
+
+        # Generate unique ID for this editor instance
+        widget_id = attrs.get("id", f"blocknote_{uuid.uuid4().hex[:8]}")
+
+        # Parsed once by format_value in super().get_context()
+        initial_content = context["widget"]["value"]
 
-        # Add additional widget data
+        context["widget"].update(shared_context)
         context["widget"].update(
             {
+                "initial_content": safe_json_dump(initial_content, "[]"),
                 "editor_id": widget_id,
             }
         )
@@ -289,29 +435,13 @@ class BlockNoteWidget(forms.Textarea):
         # Add unified context variables for template
         context["mode"] = self.mode
         context["editor_id"] = widget_id
-        context["has_content"] = bool(self.format_value(value))
+        context["has_content"] = bool(initial_content)
+        context["hydrate"] = self.hydrate
 
-        # Debug output in development
-        if getattr(settings, "DEBUG", False):
-            logger.debug(
-                event="blocknote_widget_context",
-                msg=f"BlockNote Widget Context: {widget_id}",
-                data={
-                    "widget_id": widget_id,
-                    "mode": self.mode,
-                    "editor_config": self.editor_config,
-                    "translated_config": translated_editor_config,
-                    "configs": {
-                        k: v
-                        if k not in ["initial_content"]
-                        else (v[:150] + "..." if len(v) > 100 else v)
-                        for k, v in configs.items()
-                    },
-                    "template_count": len(configs["doc_templates"])
-                    if isinstance(configs["doc_templates"], list)
-                    else 0,
-                },
-            )
+        # Lazily mounted viewers show the content rendered on the server
+        # until the editor replaces it
+        if self.mode == "readonly" and self.hydrate != "eager":
+            context["rendered_content"] = render_cached(initial_content, css_class="")
 
         return context
 
@@ -339,6 +469,42 @@ class BlockNoteWidget(forms.Textarea):
                     data={"url_name": "django_blocknote:upload_image"},
                 )
 
+        # The pre-check hashes every file before uploading it, only worth it
+        # when the upload can be deduplicated
+        if "checkUrl" not in base_config and self._can_precheck_uploads():
+            try:
+                base_config["checkUrl"] = reverse("django_blocknote:check_image")
+            except NoReverseMatch:
+                logger.debug(
+                    event="url_resolution_failed",
+                    msg="No check URL configured, uploads skip the hash pre-check",
+                    data={"url_name": "django_blocknote:check_image"},
+                )
+
+        if "batchUploadUrl" not in base_config:
+            try:
+                base_config["batchUploadUrl"] = reverse(
+                    "django_blocknote:upload_images",
+                )
+            except NoReverseMatch:
+                logger.debug(
+                    event="url_resolution_failed",
+                    msg="No batch upload URL configured, files upload one by one",
+                    data={"url_name": "django_blocknote:upload_images"},
+                )
+
+        if "chunkedUploadUrl" not in base_config:
+            try:
+                base_config["chunkedUploadUrl"] = reverse(
+                    "django_blocknote:chunked_upload_start",
+                )
+            except NoReverseMatch:
+                logger.debug(
+                    event="url_resolution_failed",
+                    msg="No chunked upload URL configured, large files upload whole",
+                    data={"url_name": "django_blocknote:chunked_upload_start"},
+                )
+
         logger.debug(
             event="get_image_upload_config",
             msg="Using upload config with widget overrides",
@@ -568,3 +734,9 @@ class BlockNoteWidget(forms.Textarea):
         )
 
         return blocknote_config
+
+
+@receiver(setting_changed)
+def reset_config_cache_on_setting_changed(sender, setting, **kwargs):
+    """Rebuild the widget configs with the new settings."""
+    BlockNoteWidget.clear_config_cache()
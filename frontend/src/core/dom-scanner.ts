@@ -21,19 +21,107 @@ interface DocumentTemplate {
     content: any[];
 }
 
+type InitWidgetCallback = (
+    editorId: string,
+    editorConfig: EditorConfig,
+    uploadConfig: UploadConfig,
+    removalConfig: RemovalConfig,
+    slashMenuConfig: SlashMenuConfig,
+    docTemplates: DocumentTemplate[],
+    initialContent: unknown,
+    readonly: boolean,
+    templateConfig: TemplateConfig,
+) => void;
+
+// Distance from the viewport at which "visible" widgets start mounting
+const VISIBLE_ROOT_MARGIN = '200px';
+
+// Events that mount "interaction" widgets
+const INTERACTION_EVENTS = ['pointerenter', 'focusin', 'touchstart'];
+
+// Containers waiting to be mounted, so rescans don't schedule them twice
+const scheduledContainers = new WeakSet<Element>();
+
+let visibleObserver: IntersectionObserver | null = null;
+const visibleCallbacks = new WeakMap<Element, () => void>();
+
+function observeVisible(container: Element, mount: () => void): void {
+    if (typeof IntersectionObserver === 'undefined') {
+        mount();
+        return;
+    }
+    if (!visibleObserver) {
+        // One observer for every lazily hydrated widget on the page
+        visibleObserver = new IntersectionObserver(
+            (entries) => {
+                entries.forEach((entry) => {
+                    if (!entry.isIntersecting) {
+                        return;
+                    }
+                    visibleObserver?.unobserve(entry.target);
+                    const callback = visibleCallbacks.get(entry.target);
+                    visibleCallbacks.delete(entry.target);
+                    callback?.();
+                });
+            },
+            { rootMargin: VISIBLE_ROOT_MARGIN },
+        );
+    }
+    visibleCallbacks.set(container, mount);
+    visibleObserver.observe(container);
+}
+
+function onIdle(mount: () => void): void {
+    if (typeof window.requestIdleCallback === 'function') {
+        window.requestIdleCallback(mount, { timeout: 2000 });
+    } else {
+        setTimeout(mount, 1);
+    }
+}
+
+function onInteraction(container: Element, mount: () => void): void {
+    const handler = () => {
+        INTERACTION_EVENTS.forEach((name) => container.removeEventListener(name, handler));
+        mount();
+    };
+    INTERACTION_EVENTS.forEach((name) =>
+        container.addEventListener(name, handler, { once: true, passive: true }),
+    );
+}
+
+// Defers mounting a widget according to its data-hydrate mode
+function scheduleHydration(container: Element, hydrate: string, mount: () => void): void {
+    if (scheduledContainers.has(container)) {
+        return;
+    }
+    scheduledContainers.add(container);
+    const run = () => {
+        scheduledContainers.delete(container);
+        // The container may have been swapped out (e.g. by HTMX) meanwhile
+        if (container.isConnected) {
+            mount();
+        }
+    };
+
+    switch (hydrate) {
+        case 'visible':
+            observeVisible(container, run);
+            break;
+        case 'idle':
+            onIdle(run);
+            break;
+        case 'interaction':
+            onInteraction(container, run);
+            break;
+        default:
+            console.warn(`⚠️ Unknown hydrate mode "${hydrate}", mounting now`);
+            run();
+    }
+}
+
 export function scanForWidgets(
     rootElement: Document | Element = document,
-    initWidgetCallback: (
-        editorId: string,
-        editorConfig: EditorConfig,
-        uploadConfig: UploadConfig,
-        removalConfig: RemovalConfig,
-        slashMenuConfig: SlashMenuConfig,
-        docTemplates: DocumentTemplate[],
-        initialContent: unknown,
-        readonly: boolean,
-        templateConfig: TemplateConfig,
-    ) => void
+    initWidgetCallback: InitWidgetCallback,
 ): void {
     console.debug('🔍 Scanning for BlockNote widgets...');
     // Find all BlockNote containers
@@ -41,194 +129,190 @@ export function scanForWidgets(
     console.debug(`Found ${containers.length} potential widget containers`);
 
     containers.forEach((container) => {
-        const editorId = container.getAttribute('data-editor-id');
-        const isReadonly = container.getAttribute('data-readonly') === 'true';
-
-        if (!editorId) {
-            console.warn('Container missing data-editor-id:', container);
-            return;
+        const hydrate = container.getAttribute('data-hydrate') || 'eager';
+        if (hydrate === 'eager') {
+            initContainer(container, initWidgetCallback);
+        } else {
+            scheduleHydration(container, hydrate, () =>
+                initContainer(container, initWidgetCallback),
+            );
         }
+    });
 
-        console.debug(`📝 Processing ${isReadonly ? 'viewer' : 'widget'}: ${editorId}`);
+    console.debug('✅ Widget scanning complete');
+}
 
-        // Get EDITOR configuration from script tag with ID "_editor_config"
-        let editorConfig = {};
-        const editorConfigScript = document.getElementById(`${editorId}_editor_config`);
-        if (editorConfigScript) {
-            try {
-                editorConfig = JSON.parse(editorConfigScript.textContent || '{}');
-                console.debug(`📋 Editor config loaded for ${editorId}:`, editorConfig);
-            } catch (e) {
-                console.warn(`⚠️ Invalid editor config for ${editorId}:`, e);
-            }
-        }
-        if (editorConfigScript) {
-            try {
-                editorConfig = JSON.parse(editorConfigScript.textContent || '{}');
-                console.debug(`📋 Editor config loaded for ${editorId}:`, editorConfig);
+function initContainer(container: Element, initWidgetCallback: InitWidgetCallback): void {
+    const editorId = container.getAttribute('data-editor-id');
+    const isReadonly = container.getAttribute('data-readonly') === 'true';
 
-                // 🔍 DEBUG: Specifically check for placeholder
-                console.debug(`🔍 PLACEHOLDER DEBUG - Raw script content:`, editorConfigScript.textContent);
-                console.debug(`🔍 PLACEHOLDER DEBUG - Parsed editorConfig:`, editorConfig);
-                console.debug(`🔍 PLACEHOLDER DEBUG - editorConfig.placeholder:`, editorConfig.placeholder);
-                console.debug(`🔍 PLACEHOLDER DEBUG - Has placeholder property:`, 'placeholder' in editorConfig);
-                console.debug(`🔍 PLACEHOLDER DEBUG - typeof placeholder:`, typeof editorConfig.placeholder);
+    if (!editorId) {
+        console.warn('Container missing data-editor-id:', container);
+        return;
+    }
 
-                // Check all keys to see what Django is actually sending
-                console.debug(`🔍 PLACEHOLDER DEBUG - All keys in editorConfig:`, Object.keys(editorConfig));
+    console.debug(`📝 Processing ${isReadonly ? 'viewer' : 'widget'}: ${editorId}`);
 
-            } catch (e) {
-                console.warn(`⚠️ Invalid editor config for ${editorId}:`, e);
-            }
+    // Get EDITOR configuration from script tag with ID "_editor_config"
+    let editorConfig = {};
+    const editorConfigScript = document.getElementById(`${editorId}_editor_config`);
+    if (editorConfigScript) {
+        try {
+            editorConfig = JSON.parse(editorConfigScript.textContent || '{}');
+            console.debug(`📋 Editor config loaded for ${editorId}:`, editorConfig);
+        } catch (e) {
+            console.warn(`⚠️ Invalid editor config for ${editorId}:`, e);
         }
+    }
 
-        // Get TEMPLATE loading configuration from script tag with ID "_template_config"
-        let templateConfig: TemplateConfig = { ...DEFAULT_TEMPLATE_CONFIG }; // Start with defaults
-        const templateConfigScript = document.getElementById(`${editorId}_template_config`);
-        // Wherever you call initWidgetCallback, log the templateConfig parameter
-        console.debug(`🔧 Widget Manager - templateConfig being passed:`, templateConfig);
+    // Get TEMPLATE loading configuration from script tag with ID "_template_config"
+    let templateConfig: TemplateConfig = { ...DEFAULT_TEMPLATE_CONFIG }; // Start with defaults
+    const templateConfigScript = document.getElementById(`${editorId}_template_config`);
+    // Wherever you call initWidgetCallback, log the templateConfig parameter
+    console.debug(`🔧 Widget Manager - templateConfig being passed:`, templateConfig);
 
-        if (templateConfigScript) {
-            try {
-                const parsed = JSON.parse(templateConfigScript.textContent || '{}');
-                templateConfig = { ...templateConfig, ...parsed }; // merge with defaults
-                console.debug(`⚙️ Template config loaded for ${editorId}:`, templateConfig);
-            } catch (e) {
-                console.warn(`⚠️ Invalid template config for ${editorId}:`, e);
-            }
-        }
-        // In dom-scanner.ts, after parsing templateConfig:
-        console.debug(`⚙️ Template config loaded for ${editorId}:`, templateConfig);
-        console.debug(`🔍 DEBUG - Raw template script content:`, templateConfigScript?.textContent);
-        console.debug(`🔍 DEBUG - Final template config:`, templateConfig);
-        console.debug(`⚙️ DEBUG - maxBlocks: ${templateConfig.maxBlocks}, chunkSize: ${templateConfig.chunkSize}`);
-
-        // Get UPLOAD configuration from script tag with ID "_image_upload_config"
-        let uploadConfig = {};
-        const imageUploadConfigScript = document.getElementById(`${editorId}_image_upload_config`);
-        console.debug(`🔍 Looking for upload config script: ${editorId}_image_upload_config`);
-        console.debug(`📜 Upload config script element:`, imageUploadConfigScript);
-        if (imageUploadConfigScript) {
-            try {
-                uploadConfig = JSON.parse(imageUploadConfigScript.textContent || '{}');
-                console.debug(`📤 Upload config loaded for ${editorId}:`, uploadConfig);
-            } catch (e) {
-                console.warn(`⚠️ Invalid upload config for ${editorId}:`, e);
-            }
-        } else {
-            console.error(`❌ No image upload config script found for ${editorId}_image_upload_config`);
+    if (templateConfigScript) {
+        try {
+            const parsed = JSON.parse(templateConfigScript.textContent || '{}');
+            templateConfig = { ...templateConfig, ...parsed }; // merge with defaults
+            console.debug(`⚙️ Template config loaded for ${editorId}:`, templateConfig);
+        } catch (e) {
+            console.warn(`⚠️ Invalid template config for ${editorId}:`, e);
         }
+    }
+    // In dom-scanner.ts, after parsing templateConfig:
+    console.debug(`⚙️ Template config loaded for ${editorId}:`, templateConfig);
+    console.debug(`🔍 DEBUG - Raw template script content:`, templateConfigScript?.textContent);
+    console.debug(`🔍 DEBUG - Final template config:`, templateConfig);
+    console.debug(`⚙️ DEBUG - maxBlocks: ${templateConfig.maxBlocks}, chunkSize: ${templateConfig.chunkSize}`);
 
-        if (!uploadConfig.uploadUrl) {
-            console.error(`❌ Missing uploadUrl for ${editorId} - check Django widget configuration`);
-            console.debug(`Upload Config for ${editorId} is`, uploadConfig);
-            return; // Don't initialize broken widget
+    // Get UPLOAD configuration from script tag with ID "_image_upload_config"
+    let uploadConfig = {};
+    const imageUploadConfigScript = document.getElementById(`${editorId}_image_upload_config`);
+    console.debug(`🔍 Looking for upload config script: ${editorId}_image_upload_config`);
+    console.debug(`📜 Upload config script element:`, imageUploadConfigScript);
+    if (imageUploadConfigScript) {
+        try {
+            uploadConfig = JSON.parse(imageUploadConfigScript.textContent || '{}');
+            console.debug(`📤 Upload config loaded for ${editorId}:`, uploadConfig);
+        } catch (e) {
+            console.warn(`⚠️ Invalid upload config for ${editorId}:`, e);
         }
+    } else {
+        console.error(`❌ No image upload config script found for ${editorId}_image_upload_config`);
+    }
 
-        // Get REMOVAL configuration from script tag with ID "_image_removal_config"
-        let removalConfig = {};
-        const imageRemovalConfigScript = document.getElementById(`${editorId}_image_removal_config`);
-        console.debug(`🔍 Looking for removal config script: ${editorId}_image_removal_config`);
-        console.debug(`📜 Removal config script element:`, imageRemovalConfigScript);
-        if (imageRemovalConfigScript) {
-            try {
-                removalConfig = JSON.parse(imageRemovalConfigScript.textContent || '{}');
-                console.debug(`🗑️ Removal config loaded for ${editorId}:`, removalConfig);
-            } catch (e) {
-                console.warn(`⚠️ Invalid removal config for ${editorId}:`, e);
-            }
-        } else {
-            console.error(`❌ No image removal config script found for ${editorId}_image_removal_config`);
+    if (!uploadConfig.uploadUrl) {
+        console.error(`❌ Missing uploadUrl for ${editorId} - check Django widget configuration`);
+        console.debug(`Upload Config for ${editorId} is`, uploadConfig);
+        return; // Don't initialize broken widget
+    }
+
+    // Get REMOVAL configuration from script tag with ID "_image_removal_config"
+    let removalConfig = {};
+    const imageRemovalConfigScript = document.getElementById(`${editorId}_image_removal_config`);
+    console.debug(`🔍 Looking for removal config script: ${editorId}_image_removal_config`);
+    console.debug(`📜 Removal config script element:`, imageRemovalConfigScript);
+    if (imageRemovalConfigScript) {
+        try {
+            removalConfig = JSON.parse(imageRemovalConfigScript.textContent || '{}');
+            console.debug(`🗑️ Removal config loaded for ${editorId}:`, removalConfig);
+        } catch (e) {
+            console.warn(`⚠️ Invalid removal config for ${editorId}:`, e);
         }
+    } else {
+        console.error(`❌ No image removal config script found for ${editorId}_image_removal_config`);
+    }
+
+    if (!removalConfig.removalUrl) {
+        console.error(`❌ Missing removalUrl for ${editorId} - check Django widget configuration`);
+        console.debug(`Removal Config for ${editorId} is`, removalConfig);
+        return; // Don't initialize broken widget
+    }
 
-        if (!removalConfig.removalUrl) {
-            console.error(`❌ Missing removalUrl for ${editorId} - check Django widget configuration`);
-            console.debug(`Removal Config for ${editorId} is`, removalConfig);
-            return; // Don't initialize broken widget
+    // Get SLASH MENU configuration from script tag with ID "_slash_menu_config"
+    let slashMenuConfig = {};
+    const slashMenuConfigScript = document.getElementById(`${editorId}_slash_menu_config`);
+    console.debug(`🔍 Looking for slash menu config script: ${editorId}_slash_menu_config`);
+    console.debug(`📜 Slash menu config script element:`, slashMenuConfigScript);
+    if (slashMenuConfigScript) {
+        try {
+            slashMenuConfig = JSON.parse(slashMenuConfigScript.textContent || '{}');
+            console.debug(`⚡ Slash menu config loaded for ${editorId}:`, slashMenuConfig);
+        } catch (e) {
+            console.warn(`⚠️ Invalid slash menu config for ${editorId}:`, e);
         }
+    } else {
+        console.warn(`⚠️ No slash menu config script found for ${editorId}_slash_menu_config - using defaults`);
+        // Set default config if script is missing
+        slashMenuConfig = {
+            enabled: false  // Default to disabled if no config found
+        };
+    }
 
-        // Get SLASH MENU configuration from script tag with ID "_slash_menu_config"
-        let slashMenuConfig = {};
-        const slashMenuConfigScript = document.getElementById(`${editorId}_slash_menu_config`);
-        console.debug(`🔍 Looking for slash menu config script: ${editorId}_slash_menu_config`);
-        console.debug(`📜 Slash menu config script element:`, slashMenuConfigScript);
-        if (slashMenuConfigScript) {
-            try {
-                slashMenuConfig = JSON.parse(slashMenuConfigScript.textContent || '{}');
-                console.debug(`⚡ Slash menu config loaded for ${editorId}:`, slashMenuConfig);
-            } catch (e) {
-                console.warn(`⚠️ Invalid slash menu config for ${editorId}:`, e);
-            }
-        } else {
-            console.warn(`⚠️ No slash menu config script found for ${editorId}_slash_menu_config - using defaults`);
-            // Set default config if script is missing
-            slashMenuConfig = {
-                enabled: false  // Default to disabled if no config found
-            };
+    // Get DOCUMENT TEMPLATES from script tag with ID "_doc_templates"
+    let docTemplates: DocumentTemplate[] = [];
+    const docTemplatesScript = document.getElementById(`${editorId}_doc_templates`);
+    console.debug(`🔍 Looking for document templates script: ${editorId}_doc_templates`);
+    console.debug(`📜 Document templates script element:`, docTemplatesScript);
+    if (docTemplatesScript) {
+        try {
+            docTemplates = JSON.parse(docTemplatesScript.textContent || '[]');
+            console.debug(`📄 Document templates loaded for ${editorId}:`, docTemplates);
+            console.debug(`   Found ${docTemplates.length} templates`);
+        } catch (e) {
+            console.warn(`⚠️ Invalid document templates for ${editorId}:`, e);
+            docTemplates = []; // Fallback to empty array
         }
+    } else {
+        console.warn(`⚠️ No document templates script found for ${editorId}_doc_templates - using empty array`);
+    }
 
-        // Get DOCUMENT TEMPLATES from script tag with ID "_doc_templates"
-        let docTemplates: DocumentTemplate[] = [];
-        const docTemplatesScript = document.getElementById(`${editorId}_doc_templates`);
-        console.debug(`🔍 Looking for document templates script: ${editorId}_doc_templates`);
-        console.debug(`📜 Document templates script element:`, docTemplatesScript);
-        if (docTemplatesScript) {
-            try {
-                docTemplates = JSON.parse(docTemplatesScript.textContent || '[]');
-                console.debug(`📄 Document templates loaded for ${editorId}:`, docTemplates);
-                console.debug(`   Found ${docTemplates.length} templates`);
-            } catch (e) {
-                console.warn(`⚠️ Invalid document templates for ${editorId}:`, e);
-                docTemplates = []; // Fallback to empty array
-            }
-        } else {
-            console.warn(`⚠️ No document templates script found for ${editorId}_doc_templates - using empty array`);
+    // Get content from its single location: the "_content" script tag in
+    // readonly mode, the form's textarea in edit mode
+    let content = [];
+    const contentScript = document.getElementById(`${editorId}_content`);
+    const contentSource = contentScript
+        ? contentScript.textContent
+        : (document.getElementById(editorId) as HTMLTextAreaElement | null)?.value;
+    if (contentSource) {
+        try {
+            content = JSON.parse(contentSource);
+            console.debug(`📄 Content loaded for ${editorId}:`, content);
+        } catch (e) {
+            console.error(`❌ Failed to parse content for ${editorId}:`, e);
         }
+    }
 
-        // Get content from script tag with ID "_content"
-        let content = [];
-        const contentScript = document.getElementById(`${editorId}_content`);
-        if (contentScript) {
+    // Fallback for markup rendered before content had a single location
+    if (!content.length) {
+        const contentAttr = container.getAttribute('data-blocknote-content');
+        if (contentAttr) {
             try {
-                content = JSON.parse(contentScript.textContent || '[]');
-                console.debug(`📄 Content loaded from script tag for ${editorId}:`, content);
+                content = JSON.parse(contentAttr);
+                console.debug(`📄 Content loaded from data attribute for ${editorId}:`, content);
             } catch (e) {
-                console.error(`❌ Failed to parse script tag content for ${editorId}:`, e);
+                console.error(`❌ Failed to parse data attribute content for ${editorId}:`, e);
             }
         }
+    }
 
-        // Fallback methods for content
-        if (!content.length) {
-            const contentAttr = container.getAttribute('data-blocknote-content');
-            if (contentAttr) {
-                try {
-                    content = JSON.parse(contentAttr);
-                    console.debug(`📄 Content loaded from data attribute for ${editorId}:`, content);
-                } catch (e) {
-                    console.error(`❌ Failed to parse data attribute content for ${editorId}:`, e);
-                }
-            }
-        }
+    // Initialize with all configs including templates
+    console.debug(`✅ Initializing BlockNote ${isReadonly ? 'viewer' : 'widget'}: ${editorId}`);
+    console.debug(`   🎯 Slash menu ${slashMenuConfig.enabled ? 'ENABLED' : 'DISABLED'} for ${editorId}`);
+    console.debug(`   📄 Templates: ${docTemplates.length} available for ${editorId}`);
+    // Add this debug line HERE (after templateConfig is fully parsed):
+    console.debug(`🔧 DOM Scanner - Final templateConfig being passed to callback:`, templateConfig);
 
-        // Initialize with all configs including templates
-        console.debug(`✅ Initializing BlockNote ${isReadonly ? 'viewer' : 'widget'}: ${editorId}`);
-        console.debug(`   🎯 Slash menu ${slashMenuConfig.enabled ? 'ENABLED' : 'DISABLED'} for ${editorId}`);
-        console.debug(`   📄 Templates: ${docTemplates.length} available for ${editorId}`);
-        // Add this debug line HERE (after templateConfig is fully parsed):
-        console.debug(`🔧 DOM Scanner - Final templateConfig being passed to callback:`, templateConfig);
-
-        initWidgetCallback(
-            editorId,
-            editorConfig,
-            uploadConfig,
-            removalConfig,
-            slashMenuConfig,
-            docTemplates,
-            content,
-            isReadonly,
-            templateConfig,
-        );
-    });
-
-    console.debug('✅ Widget scanning complete');
+    initWidgetCallback(
+        editorId,
+        editorConfig,
+        uploadConfig,
+        removalConfig,
+        slashMenuConfig,
+        docTemplates,
+        content,
+        isReadonly,
+        templateConfig,
+    );
 }
@@ -22,6 +22,7 @@ import { CustomSlashMenu } from './slash-menu';
 import {
 	useBlockNoteImageUpload,
 	useBlockNoteImageRemoval,
+	useBlockRangeLoader,
 } from '../hooks';
 import type {
 	DocumentTemplate,
@@ -124,6 +125,9 @@ export function BlockNoteEditor({
 		uploadFile: processedEditorConfig.uploadFile || uploadFile,
 	});
 
+	// Paginated viewers append the rest of the document as the reader scrolls
+	useBlockRangeLoader(editor, editorId);
+
 	//  Handle readonly changes separately without recreating the editor
 	useEffect(() => {
 		if (editor) {
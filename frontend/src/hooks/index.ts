@@ -5,6 +5,7 @@
 
 export { useBlockNoteImageUpload } from './useBlockNoteImageUpload';
 export { useBlockNoteImageRemoval } from './useBlockNoteImageRemoval';
+export { useBlockRangeLoader } from './useBlockRangeLoader';
 
 // Future hook exports will go here:
 // export { useBlockNoteEditor } from './useBlockNoteEditor';
@@ -1,13 +1,60 @@
-import { useCallback, useMemo, useState } from 'react';
+import { useCallback, useMemo, useRef, useState } from 'react';
 import type {
     ImageUploadConfig,
     UploadState,
     UploadError,
     UseBlockNoteUploadReturn
 } from '../types/upload';
-import type { DjangoUploadResponse, DjangoUploadError } from '../types/django';
+import type {
+    DjangoBatchUploadResponse,
+    DjangoChunkedUploadResponse,
+    DjangoImageCheckResponse,
+    DjangoUploadResponse,
+    DjangoUploadError,
+} from '../types/django';
 import { getCsrfToken } from '../internal/csrf-helpers';
 
+interface PendingBatchUpload {
+    file: File;
+    resolve: (data: DjangoUploadResponse) => void;
+    reject: (error: unknown) => void;
+}
+
+/**
+ * Read the error message from a failed Django response
+ */
+async function readErrorMessage(response: Response): Promise<string> {
+    try {
+        const errorData = await response.json() as DjangoUploadError;
+        return errorData.error;
+    } catch {
+        return `HTTP ${response.status}: ${response.statusText}`;
+    }
+}
+
+/**
+ * Resolve after the given number of milliseconds
+ */
+function sleep(ms: number): Promise<void> {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+/**
+ * Fetch, waiting out the server's Retry-After when it is rate limiting (429)
+ * or too busy (503)
+ */
+async function fetchWithRetryAfter(url: string, init: RequestInit, retryAttempts: number): Promise<Response> {
+    for (let attempt = 0; ; attempt += 1) {
+        const response = await fetch(url, init);
+        if ((response.status !== 429 && response.status !== 503) || attempt >= retryAttempts) {
+            return response;
+        }
+
+        const retryAfter = Number(response.headers.get('Retry-After'));
+        await sleep((Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter : 1) * 1000);
+    }
+}
+
 /**
  * Custom hook for handling BlockNote file uploads with Django backend
  * 
@@ -34,6 +81,14 @@ export function useBlockNoteImageUpload(config: ImageUploadConfig): UseBlockNote
     const uploadConfig = useMemo((): Required<ImageUploadConfig> => {
         const result = {
             uploadUrl: config.uploadUrl ?? '/django-blocknote/upload-image/',
+            checkUrl: config.checkUrl ?? '',
+            batchUploadUrl: config.batchUploadUrl ?? '',
+            batchWindow: config.batchWindow ?? 50,
+            batchMaxFiles: config.batchMaxFiles ?? 20,
+            chunkedUploadUrl: config.chunkedUploadUrl ?? '',
+            chunkSize: config.chunkSize ?? (1024 * 1024),
+            retryAttempts: config.retryAttempts ?? 3,
+            retryDelay: config.retryDelay ?? 1000,
             maxFileSize: config.maxFileSize ?? (10 * 1024 * 1024),
             allowedTypes: config.allowedTypes ?? ['image/*'],
             showProgress: config.showProgress ?? false,
@@ -83,6 +138,211 @@ export function useBlockNoteImageUpload(config: ImageUploadConfig): UseBlockNote
         }
     }, [uploadConfig.maxFileSize, uploadConfig.allowedTypes]);
 
+    /**
+     * Ask the backend whether the file content is already stored.
+     * Sends only the SHA-256 digest and size, returns the existing URL on a hit.
+     * Any failure falls back to a normal upload.
+     */
+    const findExistingImage = useCallback(async (file: File): Promise<string | null> => {
+        // SubtleCrypto is only available in secure contexts
+        if (!uploadConfig.checkUrl || !globalThis.crypto?.subtle) {
+            return null;
+        }
+
+        try {
+            const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+            const sha256 = Array.from(new Uint8Array(digest))
+                .map((byte) => byte.toString(16).padStart(2, '0'))
+                .join('');
+
+            const response = await fetch(uploadConfig.checkUrl, {
+                method: 'POST',
+                body: JSON.stringify({ sha256, size: file.size }),
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCsrfToken(),
+                },
+            });
+
+            if (!response.ok) {
+                return null;
+            }
+
+            const data: DjangoImageCheckResponse = await response.json();
+            return data.exists && typeof data.url === 'string' ? data.url : null;
+
+        } catch (error) {
+            console.debug('Image pre-check failed, uploading file instead:', error);
+            return null;
+        }
+    }, [uploadConfig.checkUrl]);
+
+    /**
+     * Post one file to the single upload endpoint
+     */
+    const postSingleFile = useCallback(async (file: File): Promise<DjangoUploadResponse> => {
+        const formData = new FormData();
+        formData.append('file', file);
+        formData.append('image_upload_config', JSON.stringify(config));
+
+        const response = await fetchWithRetryAfter(uploadConfig.uploadUrl, {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-CSRFToken': getCsrfToken(),
+            },
+        }, uploadConfig.retryAttempts);
+
+        if (!response.ok) {
+            throw new Error(await readErrorMessage(response));
+        }
+
+        return await response.json() as DjangoUploadResponse;
+    }, [config, uploadConfig.uploadUrl, uploadConfig.retryAttempts]);
+
+    /**
+     * Upload a large file in chunks to the resumable upload endpoint.
+     * A failed chunk is retried from the offset the server reports,
+     * so only the missing bytes are sent again.
+     */
+    const postChunkedFile = useCallback(async (file: File): Promise<DjangoUploadResponse> => {
+        const headers = { 'X-CSRFToken': getCsrfToken() };
+
+        const startResponse = await fetch(uploadConfig.chunkedUploadUrl, {
+            method: 'POST',
+            body: JSON.stringify({
+                filename: file.name,
+                size: file.size,
+                content_type: file.type,
+            }),
+            headers: { ...headers, 'Content-Type': 'application/json' },
+        });
+        if (!startResponse.ok) {
+            throw new Error(await readErrorMessage(startResponse));
+        }
+
+        const upload: DjangoChunkedUploadResponse = await startResponse.json();
+        const uploadUrl = `${uploadConfig.chunkedUploadUrl}${upload.upload_id}/`;
+        const chunkSize = Math.min(uploadConfig.chunkSize, upload.chunk_size ?? uploadConfig.chunkSize);
+        let offset = upload.offset;
+        let failures = 0;
+
+        while (offset < file.size) {
+            try {
+                const response = await fetch(uploadUrl, {
+                    method: 'PATCH',
+                    body: file.slice(offset, offset + chunkSize),
+                    headers: {
+                        ...headers,
+                        'Content-Type': 'application/octet-stream',
+                        'Upload-Offset': String(offset),
+                    },
+                });
+                const data = await response.json() as DjangoChunkedUploadResponse & DjangoUploadError;
+
+                if (response.ok) {
+                    offset = data.offset;
+                    failures = 0;
+                    setState(prev => ({ ...prev, progress: Math.round((offset / file.size) * 100) }));
+                } else if (response.status === 409 && typeof data.offset === 'number') {
+                    // Server has a different offset, carry on from there
+                    offset = data.offset;
+                } else {
+                    throw new Error(data.error);
+                }
+            } catch (error) {
+                failures += 1;
+                if (failures > uploadConfig.retryAttempts) {
+                    throw error;
+                }
+                await sleep(uploadConfig.retryDelay * failures);
+
+                // Resume from whatever the server actually received
+                try {
+                    const response = await fetch(uploadUrl, { headers });
+                    if (response.ok) {
+                        offset = (await response.json() as DjangoChunkedUploadResponse).offset;
+                    }
+                } catch {
+                    // Still offline, the next attempt retries the same chunk
+                }
+            }
+        }
+
+        const response = await fetchWithRetryAfter(`${uploadUrl}finalize/`, {
+            method: 'POST',
+            headers,
+        }, uploadConfig.retryAttempts);
+        if (!response.ok) {
+            throw new Error(await readErrorMessage(response));
+        }
+
+        return await response.json() as DjangoUploadResponse;
+    }, [
+        uploadConfig.chunkedUploadUrl,
+        uploadConfig.chunkSize,
+        uploadConfig.retryAttempts,
+        uploadConfig.retryDelay,
+    ]);
+
+    // Files waiting to be sent in the next batch request
+    const batchQueue = useRef<PendingBatchUpload[]>([]);
+    const batchTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+    /**
+     * Send all queued files in one request to the batch endpoint,
+     * settling each file's promise with its own result
+     */
+    const flushBatch = useCallback(async (): Promise<void> => {
+        batchTimer.current = null;
+        const batch = batchQueue.current.splice(0, uploadConfig.batchMaxFiles);
+        if (batchQueue.current.length > 0) {
+            batchTimer.current = setTimeout(flushBatch, 0);
+        }
+
+        const formData = new FormData();
+        batch.forEach(({ file }) => formData.append('files', file));
+        formData.append('image_upload_config', JSON.stringify(config));
+
+        try {
+            const response = await fetch(uploadConfig.batchUploadUrl, {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'X-CSRFToken': getCsrfToken(),
+                },
+            });
+
+            if (!response.ok) {
+                throw new Error(await readErrorMessage(response));
+            }
+
+            const data: DjangoBatchUploadResponse = await response.json();
+            batch.forEach(({ resolve, reject }, index) => {
+                const result = data.results[index];
+                if (result && result.status === 200) {
+                    resolve(result);
+                } else {
+                    reject(new Error(result?.error ?? 'Missing result for file in batch'));
+                }
+            });
+        } catch (error) {
+            batch.forEach(({ reject }) => reject(error));
+        }
+    }, [config, uploadConfig.batchUploadUrl, uploadConfig.batchMaxFiles]);
+
+    /**
+     * Queue a file for the next batch request
+     */
+    const enqueueBatchUpload = useCallback((file: File): Promise<DjangoUploadResponse> => {
+        return new Promise((resolve, reject) => {
+            batchQueue.current.push({ file, resolve, reject });
+            if (batchTimer.current === null) {
+                batchTimer.current = setTimeout(flushBatch, uploadConfig.batchWindow);
+            }
+        });
+    }, [flushBatch, uploadConfig.batchWindow]);
+
     /**
      * Upload a file to the Django backend
      */
@@ -104,39 +364,25 @@ export function useBlockNoteImageUpload(config: ImageUploadConfig): UseBlockNote
                 progress: 0
             }));
 
-            // Prepare request
-            const formData = new FormData();
-            formData.append('file', file);
-
-            formData.append('image_upload_config', JSON.stringify(config));
-
-            const csrfToken = getCsrfToken();
-
-            // Make request
-            const response = await fetch(uploadConfig.uploadUrl, {
-                method: 'POST',
-                body: formData,
-                headers: {
-                    'X-CSRFToken': csrfToken,
-                },
-            });
-
-            // Handle response
-            if (!response.ok) {
-                let errorData: DjangoUploadError;
-                try {
-                    errorData = await response.json() as DjangoUploadError;
-                } catch {
-                    errorData = {
-                        error: `HTTP ${response.status}: ${response.statusText}`
-                    };
-                }
+            // Skip the upload entirely if the content is already stored
+            const existingUrl = await findExistingImage(file);
+            if (existingUrl) {
+                setState(prev => ({
+                    ...prev,
+                    uploading: false,
+                    progress: 100
+                }));
 
-                throw new Error(errorData.error);
+                return existingUrl;
             }
 
-            // Parse successful response
-            const data: DjangoUploadResponse = await response.json();
+            // Large files upload in resumable chunks, files added together
+            // (e.g. a multi-image paste) share one request
+            const data: DjangoUploadResponse = uploadConfig.chunkedUploadUrl && file.size > uploadConfig.chunkSize
+                ? await postChunkedFile(file)
+                : uploadConfig.batchUploadUrl
+                    ? await enqueueBatchUpload(file)
+                    : await postSingleFile(file);
 
             if (!data.url || typeof data.url !== 'string') {
                 throw new Error('Invalid server response: missing or invalid URL');
@@ -174,7 +420,16 @@ export function useBlockNoteImageUpload(config: ImageUploadConfig): UseBlockNote
 
             throw error;
         }
-    }, [uploadConfig.uploadUrl, validateFile]);
+    }, [
+        validateFile,
+        findExistingImage,
+        postChunkedFile,
+        enqueueBatchUpload,
+        postSingleFile,
+        uploadConfig.chunkedUploadUrl,
+        uploadConfig.chunkSize,
+        uploadConfig.batchUploadUrl,
+    ]);
 
     /**
      * Clear current error
@@ -0,0 +1,143 @@
+import { useEffect } from 'react';
+import type { BlockNoteEditor } from '@blocknote/core';
+
+/**
+ * A range of top-level blocks, as returned by the Django block_range view
+ */
+interface BlockRangeResponse {
+    blocks: any[];
+    start: number;
+    end: number;
+    total: number;
+}
+
+/**
+ * Appends the rest of a paginated document to a readonly editor as the
+ * reader scrolls towards its end.
+ *
+ * Paginated viewers embed the first blocks of the document only, and mark
+ * the editor container with `data-block-range-url`, `data-block-total` and
+ * `data-block-loaded`. Containers without them are left alone.
+ *
+ * When the document has changed since the page was rendered (409), or it
+ * is deleted or the page is too old to fetch more (410), loading stops, the
+ * container is marked `data-block-range-stale` and a
+ * `blocknote-block-range-stale` event is dispatched, so the page can offer a
+ * reload.
+ *
+ * @param editor The editor the blocks are appended to
+ * @param editorId The id of the Django widget
+ *
+ * @example
+ * ```typescript
+ * const editor = useCreateBlockNote({ initialContent });
+ * useBlockRangeLoader(editor, editorId);
+ * ```
+ */
+export function useBlockRangeLoader(
+    editor: BlockNoteEditor<any, any, any> | null,
+    editorId: string,
+): void {
+    useEffect(() => {
+        if (!editor || !editorId) return;
+
+        const container = document.querySelector<HTMLElement>(
+            `[data-editor-id="${editorId}"]`,
+        );
+        const rangeUrl = container?.dataset.blockRangeUrl;
+        if (!container || !rangeUrl) return;
+
+        const total = Number(container.dataset.blockTotal ?? 0);
+        let loaded = Number(container.dataset.blockLoaded ?? 0);
+        if (loaded >= total) return;
+
+        // Fetching starts once the sentinel after the editor nears the viewport
+        const sentinel = document.createElement('div');
+        sentinel.className = 'blocknote-block-range-sentinel';
+        sentinel.setAttribute('aria-hidden', 'true');
+        container.after(sentinel);
+
+        let loading = false;
+        let stopped = false;
+        const controller = new AbortController();
+
+        const stop = () => {
+            stopped = true;
+            observer.disconnect();
+            sentinel.remove();
+        };
+
+        const loadNextRange = async () => {
+            if (loading || stopped) return;
+            loading = true;
+            try {
+                const url = new URL(rangeUrl, window.location.href);
+                url.searchParams.set('start', String(loaded));
+                const response = await fetch(url.toString(), {
+                    credentials: 'same-origin',
+                    signal: controller.signal,
+                });
+                if (response.status === 409 || response.status === 410) {
+                    console.info('📄 Document is out of date, stopping:', response.status);
+                    container.dataset.blockRangeStale = 'true';
+                    document.dispatchEvent(new CustomEvent('blocknote-block-range-stale', {
+                        detail: { editorId, status: response.status },
+                    }));
+                    stop();
+                    return;
+                }
+                if (!response.ok) {
+                    console.warn('📄 Failed to load blocks, stopping:', response.status);
+                    stop();
+                    return;
+                }
+
+                const range: BlockRangeResponse = await response.json();
+                if (range.blocks.length > 0) {
+                    const lastBlock = editor.document[editor.document.length - 1];
+                    editor.insertBlocks(range.blocks, lastBlock, 'after');
+                }
+
+                loaded = range.end;
+                container.dataset.blockLoaded = String(loaded);
+                console.debug('📄 Loaded blocks:', { editorId, loaded, total: range.total });
+
+                if (range.blocks.length === 0 || loaded >= range.total) {
+                    stop();
+                }
+            } catch (error) {
+                if ((error as Error).name !== 'AbortError') {
+                    console.warn('📄 Failed to load blocks, stopping:', error);
+                }
+                stop();
+            } finally {
+                loading = false;
+            }
+
+            // Still in view after appending a short range, keep going
+            if (!stopped && isNearViewport(sentinel)) {
+                loadNextRange();
+            }
+        };
+
+        const observer = new IntersectionObserver(
+            (entries) => {
+                if (entries.some((entry) => entry.isIntersecting)) {
+                    loadNextRange();
+                }
+            },
+            { rootMargin: '800px 0px' },
+        );
+        observer.observe(sentinel);
+
+        return () => {
+            controller.abort();
+            stop();
+        };
+    }, [editor, editorId]);
+}
+
+function isNearViewport(element: Element): boolean {
+    const rect = element.getBoundingClientRect();
+    return rect.top < window.innerHeight + 800;
+}
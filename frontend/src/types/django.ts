@@ -10,6 +10,66 @@ export interface DjangoUploadResponse {
     size?: number;
     /** MIME type */
     content_type?: string;
+    /** Displayed width of the image in pixels */
+    width?: number | null;
+    /** Displayed height of the image in pixels */
+    height?: number | null;
+    /** Tiny data URI version of the image, shown while it loads */
+    placeholder?: string | null;
+}
+
+/**
+ * Result for one file from the Django batch upload endpoint
+ */
+export interface DjangoBatchUploadResult extends Partial<DjangoUploadResponse> {
+    /** HTTP status the file would have had as a single upload */
+    status: number;
+    /** Error message when the file failed */
+    error?: string;
+    /** Error code when the file failed */
+    code?: string;
+}
+
+/**
+ * Response from Django batch upload endpoint
+ */
+export interface DjangoBatchUploadResponse {
+    /** One result per file, in the order posted */
+    results: DjangoBatchUploadResult[];
+    /** Number of files uploaded */
+    succeeded: number;
+    /** Number of files that failed */
+    failed: number;
+}
+
+/**
+ * Response from the Django chunked upload endpoints
+ */
+export interface DjangoChunkedUploadResponse {
+    /** Identifier for the upload, used in the chunk and finalize URLs */
+    upload_id: string;
+    /** Bytes received so far, where the next chunk starts */
+    offset: number;
+    /** Total size of the file in bytes */
+    size?: number;
+    /** Maximum chunk size the server accepts */
+    chunk_size?: number;
+}
+
+/**
+ * Response from Django image hash pre-check endpoint
+ */
+export interface DjangoImageCheckResponse {
+    /** Whether the content is already stored */
+    exists: boolean;
+    /** URL of the stored image when it exists */
+    url?: string;
+    /** Displayed width of the stored image in pixels */
+    width?: number | null;
+    /** Displayed height of the stored image in pixels */
+    height?: number | null;
+    /** Tiny data URI version of the stored image */
+    placeholder?: string | null;
 }
 
 /**
@@ -20,6 +80,8 @@ export interface DjangoUploadError {
     error: string;
     /** Error code for programmatic handling */
     code?: string;
+    /** Seconds to wait before retrying a rejected (429 or 503) upload */
+    retry_after?: number;
     /** Additional error details */
     details?: Record<string, unknown>;
 }
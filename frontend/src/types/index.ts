@@ -33,6 +33,10 @@ export type {
 export type {
     DjangoUploadResponse,
     DjangoUploadError,
+    DjangoBatchUploadResponse,
+    DjangoChunkedUploadResponse,
+    DjangoBatchUploadResult,
+    DjangoImageCheckResponse,
     CsrfTokenSource,
     DjangoRemovalError,
     DjangoRemovalResponse,
@@ -23,6 +23,16 @@ export interface BaseUploadConfig {
 }
 
 export interface ImageUploadConfig extends BaseUploadConfig {
+	/** URL endpoint for the content hash pre-check, skipped when empty */
+	checkUrl?: string;
+	/** URL endpoint for batch uploads, files upload one by one when empty */
+	batchUploadUrl?: string;
+	/** URL endpoint for resumable chunked uploads of files over chunkSize */
+	chunkedUploadUrl?: string;
+	/** Milliseconds to wait for more files before sending a batch */
+	batchWindow?: number;
+	/** Maximum files per batch request */
+	batchMaxFiles?: number;
 	/** Image model identifier */
 	img_model?: string;
 	/** Auto-resize large images */
@@ -0,0 +1,70 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+
+@pytest.fixture
+def animation():
+    """Makes an animated image of moving bars, in the given format."""
+
+    def animation(frames=6, image_format="GIF"):
+        images = []
+        for frame in range(frames):
+            image = Image.new("RGB", (32, 16), "white")
+            image.paste((200, 0, 0), (frame * 4, 0, frame * 4 + 4, 16))
+            images.append(image)
+        # A repeated frame, dropped by the encoder
+        images.append(images[-1].copy())
+
+        stream = BytesIO()
+        images[0].save(
+            stream,
+            format=image_format,
+            save_all=True,
+            append_images=images[1:],
+            duration=80,
+            loop=0,
+        )
+        return stream.getvalue()
+
+    return animation
+
+
+def stored_image(response):
+    """Helper to open the image an upload response points at."""
+    assert response.status_code == 200
+    name = response.json()["url"].removeprefix("/media/")
+    return Image.open(default_storage.open(name))
+
+
+@pytest.mark.parametrize(
+    ("image_format", "name"),
+    [("GIF", "a.gif"), ("WEBP", "a.webp")],
+)
+def test_animations_stay_animated(upload_image, animation, image_format, name):
+    """Test that animated GIFs and WebPs are stored as animated WebPs."""
+    response = upload_image(animation(image_format=image_format), name=name)
+
+    with stored_image(response) as image:
+        assert image.format == "WEBP"
+        assert image.is_animated
+        durations = []
+        for frame in range(image.n_frames):
+            image.seek(frame)
+            image.load()
+            durations.append(image.info["duration"])
+        # The repeated last frame is merged into the one before it
+        assert durations == [80, 80, 80, 80, 80, 160]
+        assert image.size == (32, 16)
+
+
+@override_settings(DJ_BN_ANIMATION_MAX_FRAMES=3)
+def test_animations_over_budget_become_a_still(upload_image, animation):
+    """Test that long animations are reduced to their first frame."""
+    with stored_image(upload_image(animation(), name="long.gif")) as image:
+        assert image.format == "WEBP"
+        assert not getattr(image, "is_animated", False)
+        assert image.size == (32, 16)
@@ -0,0 +1,123 @@
+import json
+import threading
+from contextvars import ContextVar
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve, reverse
+
+from django_blocknote import async_urls, urls
+from django_blocknote.models import UnusedImageURLS
+from django_blocknote.views import aremove_image, async_views, aupload_image, views
+
+urlpatterns = [
+    path("django-blocknote/", include("django_blocknote.async_urls")),
+]
+
+request_marker: ContextVar[str | None] = ContextVar("request_marker", default=None)
+
+
+def test_async_urls_only_swap_the_async_views():
+    """Test that the async routes match the sync ones but for three views."""
+    assert [str(p.pattern) for p in async_urls.urlpatterns] == [
+        str(p.pattern) for p in urls.urlpatterns
+    ]
+    swapped = {
+        p.name
+        for p, sync in zip(async_urls.urlpatterns, urls.urlpatterns, strict=True)
+        if p.callback is not sync.callback
+    }
+    assert swapped == {"upload_image", "remove_image", "upload_file"}
+
+
+@override_settings(ROOT_URLCONF=__name__, DJ_BN_IMAGE_VARIANTS=False)
+class AsyncViewTests(TestCase):
+    @pytest.fixture(autouse=True)
+    def image(self, make_image):
+        self.data = make_image()
+
+    def test_routes_resolve_to_the_async_views(self):
+        """Test that including async_urls serves the async views."""
+        resolved = resolve(reverse("django_blocknote:upload_image"))
+        assert resolved.func is aupload_image
+        resolved = resolve(reverse("django_blocknote:remove_image"))
+        assert resolved.func is aremove_image
+
+    async def test_uploads_are_processed_on_the_upload_pool(self):
+        """Test that processing runs on a pool thread, in the request's context."""
+        seen = {}
+        verify_and_process = views._verify_and_process_image
+
+        def record(request, uploaded_file):
+            seen["thread"] = threading.current_thread().name
+            seen["marker"] = request_marker.get()
+            return verify_and_process(request, uploaded_file)
+
+        request_marker.set("upload")
+        with patch.object(async_views, "_verify_and_process_image", record):
+            response = await self.async_client.post(
+                reverse("django_blocknote:upload_image"),
+                {"file": ContentFile(self.data, name="async.png")},
+            )
+
+        assert response.status_code == 200
+        name = response.json()["url"].removeprefix("/media/")
+        assert default_storage.exists(name)
+        default_storage.delete(name)
+        assert seen["thread"].startswith("BlockNoteUpload")
+        assert seen["marker"] == "upload"
+
+    async def test_upload_errors(self):
+        """Test that bad requests and failures are answered, not raised."""
+        url = reverse("django_blocknote:upload_image")
+        assert (await self.async_client.get(url)).status_code == 405
+
+        response = await self.async_client.post(url, {})
+        assert response.status_code == 400
+        assert response.json()["code"] == "NO_FILE"
+
+        with patch.object(
+            async_views,
+            "_verify_and_process_image",
+            side_effect=RuntimeError("boom"),
+        ):
+            response = await self.async_client.post(
+                url,
+                {"file": ContentFile(self.data, name="async.png")},
+            )
+        assert response.status_code == 500
+        assert response.json()["code"] == "SERVER_ERROR"
+
+    async def test_removals_are_queued_with_the_async_orm(self):
+        """Test that removed image URLs are saved for the cleanup."""
+        image_url = "http://testserver/media/blocknote_uploads/removed.png"
+
+        response = await self.async_client.post(
+            reverse("django_blocknote:remove_image"),
+            json.dumps({"imageUrls": [image_url]}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 201
+        assert await UnusedImageURLS.objects.filter(image_url=image_url).aexists()
+
+    async def test_invalid_removals(self):
+        """Test that malformed removal requests are rejected."""
+        url = reverse("django_blocknote:remove_image")
+
+        for body, code in (
+            ("", "EMPTY_BODY"),
+            ("{", "INVALID_JSON"),
+            ("{}", "MISSING_FIELD"),
+            ('{"imageUrls": "x"}', "INVALID_TYPE"),
+        ):
+            response = await self.async_client.post(
+                url,
+                body,
+                content_type="application/json",
+            )
+            assert response.status_code == 400
+            assert response.json()["error"]["code"] == code
@@ -0,0 +1,48 @@
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.urls import reverse
+
+
+def post_batch(client, files):
+    return client.post(reverse("django_blocknote:upload_images"), {"files": files})
+
+
+def test_some_files_can_fail_while_others_succeed(client, make_image):
+    """Test that each file gets its own result, in the order posted."""
+    response = post_batch(
+        client,
+        [
+            ContentFile(make_image(), name="first.png"),
+            ContentFile(b"not an image", name="broken.png"),
+            ContentFile(make_image(image_format="JPEG"), name="last.jpg"),
+        ],
+    )
+    assert response.status_code == 200
+
+    batch = response.json()
+    assert (batch["succeeded"], batch["failed"]) == (2, 1)
+
+    first, broken, last = batch["results"]
+    assert first["status"] == 200
+    assert first["filename"] == "first.png"
+    assert first["url"].endswith(".webp")
+    assert broken["status"] == 400
+    assert broken["code"] in {"VALIDATION", "VERIFICATION"}
+    assert "url" not in broken
+    assert last["status"] == 200
+    assert last["filename"] == "last.jpg"
+
+
+@override_settings(DJ_BN_BATCH_UPLOAD_MAX_FILES=2)
+def test_batches_are_limited(client, make_image):
+    """Test that empty and oversized batches are rejected as a whole."""
+    response = post_batch(client, [])
+    assert response.status_code == 400
+    assert response.json()["code"] == "NO_FILE"
+
+    response = post_batch(
+        client,
+        [ContentFile(make_image(), name=f"{number}.png") for number in range(3)],
+    )
+    assert response.status_code == 400
+    assert response.json()["code"] == "TOO_MANY_FILES"
@@ -0,0 +1,67 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from django_blocknote.image import benchmark
+
+
+@pytest.fixture
+def tiny_corpus(tmp_path, make_image, monkeypatch):
+    """Replaces the benchmark corpus with one tiny generated photo."""
+    photo = tmp_path / "photo.png"
+    photo.write_bytes(make_image(size=(32, 24)))
+    monkeypatch.setattr(benchmark, "build_corpus", lambda corpus_dir: {"photo": photo})
+    return photo
+
+
+def run(*args):
+    stdout = StringIO()
+    call_command(
+        "blocknote_benchmark",
+        "--repeat=1",
+        "--no-isolate",
+        *args,
+        stdout=stdout,
+        stderr=StringIO(),
+    )
+    return stdout.getvalue()
+
+
+def test_benchmark_runs_and_compares_with_a_baseline(tiny_corpus, tmp_path):
+    """Test that every benchmark runs, is written and compares cleanly."""
+    output = tmp_path / "results.json"
+    stdout = run(f"--output={output}")
+
+    results = json.loads(output.read_text())
+    assert results["corpus_version"] == benchmark.CORPUS_VERSION
+    assert [result["benchmark"] for result in results["results"]] == list(
+        benchmark.BENCHMARKS,
+    )
+    for result in results["results"]:
+        assert "error" not in result, result
+        assert result["case"] == "photo"
+        assert result["input_bytes"] == tiny_corpus.stat().st_size
+        assert result["wall_time"]["median"] >= 0
+    assert "convert_image_to_webp[adaptive]" in stdout
+
+    # Generous tolerances, timings of tiny images are mostly noise
+    stdout = run(
+        "--benchmark=image_verify",
+        f"--baseline={output}",
+        "--time-tolerance=100",
+    )
+    assert "No regressions against the baseline" in stdout
+
+
+def test_benchmark_rejects_other_corpus_versions(tiny_corpus, tmp_path):
+    """Test that results of a different corpus aren't compared."""
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"corpus_version": -1, "results": []}))
+
+    with pytest.raises(CommandError, match="different corpus version"):
+        run("--benchmark=image_verify", f"--baseline={baseline}")
+
+    with pytest.raises(CommandError, match="--repeat"):
+        run("--repeat=0")
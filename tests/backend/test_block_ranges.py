@@ -0,0 +1,173 @@
+from unittest.mock import patch
+
+from django.core import signing
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_blocknote.block_ranges import (
+    TOKEN_SALT,
+    BlockIndex,
+    build_block_index,
+    make_block_range_token,
+)
+from django_blocknote.viewers import render_paginated_viewer
+from tests.models import Document
+
+
+def paragraphs(count, prefix="p"):
+    """Helper to build a document of numbered paragraphs."""
+    return [
+        {
+            "id": f"{prefix}{number}",
+            "type": "paragraph",
+            "props": {},
+            "content": [{"type": "text", "text": str(number), "styles": {}}],
+            "children": [],
+        }
+        for number in range(count)
+    ]
+
+
+@override_settings(DJ_BN_VIEWER_PAGE_SIZE=2, DJ_BN_BLOCK_RANGE_MAX=3)
+class BlockRangeTests(TestCase):
+    def setUp(self):
+        self.document = Document.objects.create(content=paragraphs(5))
+
+    def token(self, content=None):
+        index = build_block_index(content or self.document.content)
+        return make_block_range_token(self.document, "content", index.digest)
+
+    def fetch(self, token, **params):
+        return self.client.get(
+            reverse("django_blocknote:block_range", kwargs={"token": token}),
+            params,
+        )
+
+    def test_ranges_are_clamped_to_the_document(self):
+        """Test that start and count are kept within the document and limit."""
+        token = self.token()
+
+        response = self.fetch(token, start=2, count=2)
+        assert response.status_code == 200
+        page = response.json()
+        assert [block["id"] for block in page["blocks"]] == ["p2", "p3"]
+        assert (page["start"], page["end"], page["total"]) == (2, 4, 5)
+
+        page = self.fetch(token, start=-4, count=100).json()
+        assert [block["id"] for block in page["blocks"]] == ["p0", "p1", "p2"]
+        assert (page["start"], page["end"]) == (0, 3)
+
+        page = self.fetch(token, start=9).json()
+        assert page["blocks"] == []
+        assert (page["start"], page["end"], page["total"]) == (5, 5, 5)
+
+        assert self.fetch(token, start="x").status_code == 400
+
+    def test_invalid_and_expired_tokens(self):
+        """Test that forged tokens are not found and old ones are gone."""
+        forged = signing.dumps(
+            {"model": "auth.user", "pk": 1, "field": "password", "digest": ""},
+        )
+        assert self.fetch(forged).json()["code"] == "INVALID_TOKEN"
+        assert self.fetch(forged).status_code == 404
+
+        not_blocknote = signing.dumps(
+            {"model": "auth.user", "pk": 1, "field": "password", "digest": ""},
+            salt=TOKEN_SALT,
+        )
+        assert self.fetch(not_blocknote).status_code == 404
+
+        token = self.token()
+        with override_settings(DJ_BN_BLOCK_RANGE_TOKEN_MAX_AGE=-1):
+            response = self.fetch(token)
+        assert response.status_code == 410
+        assert response.json()["code"] == "EXPIRED"
+
+    def test_changed_documents_are_a_conflict(self):
+        """Test that a token for an older version of a document is refused."""
+        token = self.token()
+        self.document.content = paragraphs(6, prefix="q")
+        self.document.save()
+
+        response = self.fetch(token)
+        assert response.status_code == 409
+        assert response.json()["code"] == "CHANGED"
+
+        # The current version is served from the cache, not the database
+        with self.assertNumQueries(0):
+            page = self.fetch(self.token(), start=5).json()
+        assert [block["id"] for block in page["blocks"]] == ["q5"]
+
+    def viewer_token(self):
+        html = render_paginated_viewer(self.document, "content")
+        url = html.split('data-block-range-url="')[1].split('"')[0]
+        return url.rstrip("/").rsplit("/", 1)[1]
+
+    def test_viewer_tokens_of_changed_documents_are_a_conflict(self):
+        """Test that the index cached by the viewer isn't served once edited."""
+        token = self.viewer_token()
+        assert self.fetch(token, start=2).status_code == 200
+
+        self.document.content = paragraphs(5, prefix="q")
+        self.document.save()
+
+        response = self.fetch(token, start=2)
+        assert response.status_code == 409
+        assert response.json()["code"] == "CHANGED"
+
+    def test_viewer_tokens_of_deleted_documents_are_gone(self):
+        """Test that a deleted document's blocks are never served again."""
+        token = self.viewer_token()
+        assert self.fetch(token, start=2).status_code == 200
+
+        self.document.delete()
+
+        response = self.fetch(token, start=2)
+        assert response.status_code == 410
+        assert response.json()["code"] == "DELETED"
+        assert "blocks" not in response.json()
+
+    def test_viewer_reuses_the_cached_index(self):
+        """Test that the viewer only builds the index of a changed document."""
+        viewer_token = self.viewer_token
+
+        token = viewer_token()
+        with self.assertNumQueries(0):
+            page = self.fetch(token, start=2, count=3).json()
+        assert [block["id"] for block in page["blocks"]] == ["p2", "p3", "p4"]
+
+        with patch(
+            "django_blocknote.block_ranges.build_block_index",
+            wraps=build_block_index,
+        ) as build:
+            viewer_token()
+            # Too large for the in-process tier, served by the shared cache
+            with self.settings(DJ_BN_BLOCK_INDEX_MAX_BYTES=1):
+                viewer_token()
+            assert build.call_count == 0
+
+            self.document.content = paragraphs(3, prefix="q")
+            self.document.save()
+            page = self.fetch(viewer_token(), start=2).json()
+            assert build.call_count == 1
+        assert [block["id"] for block in page["blocks"]] == ["q2"]
+
+    def test_indexes_too_large_for_the_shared_cache_are_kept_in_process(self):
+        """Test that ranges don't reload the document when the cache drops it."""
+        token = self.token()
+        locmem_set = LocMemCache.set
+
+        def set_small_values(cache, key, value, *args, **kwargs):
+            if not isinstance(value, BlockIndex):
+                locmem_set(cache, key, value, *args, **kwargs)
+
+        with (
+            # A fresh in-process tier
+            self.settings(DJ_BN_BLOCK_INDEX_MAX_BYTES=1024 * 1024),
+            patch.object(LocMemCache, "set", set_small_values),
+        ):
+            with self.assertNumQueries(1):
+                assert self.fetch(token).status_code == 200
+            with self.assertNumQueries(0):
+                assert self.fetch(token, start=2).status_code == 200
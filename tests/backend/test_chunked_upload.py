@@ -0,0 +1,221 @@
+import json
+import threading
+import time
+from io import BytesIO
+
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from django_blocknote.exceptions import ChunkedUploadError
+from django_blocknote.image import (
+    append_chunk,
+    remove_chunked_upload,
+    start_chunked_upload,
+)
+from django_blocknote.views import views
+
+CHUNK_SIZE = 1024
+
+
+@pytest.fixture(autouse=True)
+def small_chunks():
+    with override_settings(DJ_BN_CHUNKED_UPLOAD_CHUNK_SIZE=CHUNK_SIZE):
+        yield
+
+
+def post_start(client, data, **extra):
+    return client.post(
+        reverse("django_blocknote:chunked_upload_start"),
+        json.dumps({"filename": "noise.png", "size": len(data)}),
+        content_type="application/json",
+        **extra,
+    )
+
+
+def start(client, data):
+    response = post_start(client, data)
+    assert response.status_code == 201
+    return response.json()["upload_id"]
+
+
+def patch(client, upload_id, offset, chunk):
+    return client.patch(
+        reverse("django_blocknote:chunked_upload", args=[upload_id]),
+        chunk,
+        content_type="application/offset+octet-stream",
+        headers={"Upload-Offset": str(offset)},
+    )
+
+
+def finalize(client, upload_id):
+    return client.post(
+        reverse("django_blocknote:chunked_upload_finalize", args=[upload_id]),
+    )
+
+
+def test_offset_mismatch_resume_and_finalize(client, make_image):
+    """Test that a client resumes from the offset the server reports."""
+    data = make_image()
+    assert len(data) > 2 * CHUNK_SIZE
+    upload_id = start(client, data)
+
+    assert patch(client, upload_id, 0, data[:CHUNK_SIZE]).json()["offset"] == CHUNK_SIZE
+
+    # Skipping ahead is refused, with the offset to resume from
+    response = patch(client, upload_id, 2 * CHUNK_SIZE, data[CHUNK_SIZE:])
+    assert response.status_code == 409
+    assert response.json() == {
+        "error": "Offset does not match the upload",
+        "code": "OFFSET_MISMATCH",
+        "offset": CHUNK_SIZE,
+    }
+
+    # Not complete yet
+    response = finalize(client, upload_id)
+    assert response.status_code == 409
+    assert response.json()["code"] == "INCOMPLETE"
+
+    offset = client.get(
+        reverse("django_blocknote:chunked_upload", args=[upload_id]),
+    ).json()["offset"]
+    while offset < len(data):
+        response = patch(client, upload_id, offset, data[offset : offset + CHUNK_SIZE])
+        assert response.status_code == 200
+        offset = response.json()["offset"]
+
+    response = finalize(client, upload_id)
+    assert response.status_code == 200
+    assert response.json()["url"]
+    assert response.json()["width"] == 64
+
+
+def test_repeated_chunk_is_appended_once(client, make_image):
+    """Test that resending a chunk at the same offset is refused."""
+    data = make_image()
+    upload_id = start(client, data)
+
+    assert patch(client, upload_id, 0, data[:CHUNK_SIZE]).status_code == 200
+    response = patch(client, upload_id, 0, data[:CHUNK_SIZE])
+    assert response.status_code == 409
+    assert response.json()["offset"] == CHUNK_SIZE
+
+
+class SlowStream(BytesIO):
+    """A request body arriving in small, slow pieces."""
+
+    def read(self, size=-1):
+        time.sleep(0.005)
+        return super().read(min(size, 128) if size > 0 else 128)
+
+
+def test_concurrent_chunks_at_the_same_offset(make_image):
+    """Test that racing appends of one chunk only write it once."""
+    data = make_image()
+    upload = start_chunked_upload("noise.png", len(data))
+    results = []
+    barrier = threading.Barrier(8)
+
+    def send():
+        barrier.wait()
+        try:
+            results.append(
+                append_chunk(upload["upload_id"], 0, SlowStream(data[:CHUNK_SIZE])),
+            )
+        except ChunkedUploadError as e:
+            results.append(e.code)
+
+    threads = [threading.Thread(target=send) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results, key=str) == [CHUNK_SIZE] + ["OFFSET_MISMATCH"] * 7
+
+
+def test_finalize_after_a_retried_chunk(client, make_image):
+    """Test that an upload with a retried chunk still completes."""
+    data = make_image()
+    upload_id = start(client, data)
+
+    offset = 0
+    while offset < len(data):
+        chunk = data[offset : offset + CHUNK_SIZE]
+        response = patch(client, upload_id, offset, chunk)
+        # The client timed out and sends the chunk again
+        assert patch(client, upload_id, offset, chunk).status_code == 409
+        offset = response.json()["offset"]
+
+    response = finalize(client, upload_id)
+    assert response.status_code == 200
+    assert response.json()["size"] == len(data)
+
+
+@override_settings(DJ_BN_CHUNKED_UPLOAD_MAX_OPEN=2)
+def test_open_uploads_are_capped_per_uploader(client, make_image):
+    """Test that an uploader can't hold more than the allowed open uploads."""
+    data = make_image()
+    upload_ids = [
+        post_start(client, data, REMOTE_ADDR="192.0.2.36").json()["upload_id"]
+        for _ in range(2)
+    ]
+    try:
+        response = post_start(client, data, REMOTE_ADDR="192.0.2.36")
+        assert response.status_code == 429
+        assert response.json()["code"] == "TOO_MANY_UPLOADS"
+
+        # Other uploaders are unaffected
+        response = post_start(client, data, REMOTE_ADDR="192.0.2.37")
+        assert response.status_code == 201
+        upload_ids.append(response.json()["upload_id"])
+
+        # Finishing one frees a slot
+        remove_chunked_upload(upload_ids.pop(0))
+        response = post_start(client, data, REMOTE_ADDR="192.0.2.36")
+        assert response.status_code == 201
+        upload_ids.append(response.json()["upload_id"])
+    finally:
+        for upload_id in upload_ids:
+            remove_chunked_upload(upload_id)
+
+
+@override_settings(DJ_BN_UPLOAD_RATE=1, DJ_BN_UPLOAD_BURST=1)
+def test_starts_are_rate_limited(client, make_image):
+    """Test that starting a chunked upload counts against the upload rate."""
+    data = make_image()
+    response = post_start(client, data, REMOTE_ADDR="192.0.2.38")
+    assert response.status_code == 201
+    upload_id = response.json()["upload_id"]
+    try:
+        response = post_start(client, data, REMOTE_ADDR="192.0.2.38")
+        assert response.status_code == 429
+        assert response.json()["code"] == "THROTTLED"
+
+        # The start was charged, so finishing the upload isn't charged again
+        for offset in range(0, len(data), CHUNK_SIZE):
+            chunk = data[offset : offset + CHUNK_SIZE]
+            assert patch(client, upload_id, offset, chunk).status_code == 200
+        response = client.post(
+            reverse("django_blocknote:chunked_upload_finalize", args=[upload_id]),
+            REMOTE_ADDR="192.0.2.38",
+        )
+        assert response.status_code == 200
+    finally:
+        remove_chunked_upload(upload_id)
+
+
+def test_unexpected_errors_are_answered(client, make_image):
+    """Test that an unexpected failure returns a 500, not an error page."""
+    data = make_image()
+    with mock.patch.object(
+        views,
+        "start_chunked_upload",
+        side_effect=RuntimeError("boom"),
+    ):
+        response = post_start(client, data, REMOTE_ADDR="192.0.2.39")
+
+    assert response.status_code == 500
+    assert response.json() == {"error": "Upload failed", "code": "SERVER_ERROR"}
@@ -0,0 +1,52 @@
+from django.core.checks import run_checks
+from django.test import override_settings
+
+from django_blocknote.image import components
+from django_blocknote.image.components import (
+    get_image_formatter,
+    get_image_storage,
+    get_image_url_handler,
+)
+
+
+def upper_url(url):
+    return url.upper()
+
+
+def test_components_are_resolved_once():
+    """Test that the storage is instantiated once and then reused."""
+    components.reset_components()
+
+    storage = get_image_storage()
+    assert get_image_storage() is storage
+    assert get_image_formatter() is get_image_formatter()
+
+
+def test_components_are_reset_when_their_settings_change():
+    """Test that override_settings resolves the changed components again."""
+    storage = get_image_storage()
+    assert get_image_url_handler() is None
+
+    with override_settings(
+        DJ_BN_IMAGE_URL_HANDLER="tests.backend.test_components.upper_url",
+    ):
+        assert get_image_url_handler() is upper_url
+        assert get_image_storage() is not storage
+
+    assert get_image_url_handler() is None
+
+
+def test_unrelated_settings_keep_the_components():
+    """Test that other settings changes don't drop the resolved components."""
+    storage = get_image_storage()
+
+    with override_settings(DJ_BN_IMAGE_DEDUP=True):
+        assert get_image_storage() is storage
+
+
+@override_settings(DJ_BN_IMAGE_FORMATTER="tests.backend.missing.formatter")
+def test_unimportable_components_are_reported_by_the_checks():
+    """Test that a bad dotted path is a system check error."""
+    errors = [error.id for error in run_checks()]
+
+    assert "django_blocknote.E002" in errors
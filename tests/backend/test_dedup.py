@@ -0,0 +1,118 @@
+import hashlib
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_blocknote.image.dedup import find_existing_image, remember_image
+from django_blocknote.image.remove import _delete_single_file
+from django_blocknote.models import SharedImage, UnusedImageURLS
+
+DIGEST = "0" * 64
+
+
+def test_dedup_is_off_by_default():
+    """Test that uploads are not deduplicated unless enabled."""
+    assert settings.DJ_BN_IMAGE_DEDUP is False
+
+
+@override_settings(DJ_BN_IMAGE_DEDUP=True)
+class DedupLookupTests(TestCase):
+    def test_digests_are_remembered_per_uploader(self):
+        """Test that a digest only hits for the user who uploaded the image."""
+        name = default_storage.save("dedup/owned.png", ContentFile(b"image"))
+        remember_image(DIGEST, 5, name, f"/media/{name}", owner=1)
+
+        assert find_existing_image(DIGEST, 5, owner=1)["name"] == name
+        assert find_existing_image(DIGEST, 5, owner=2) is None
+        assert find_existing_image(DIGEST, 5) is None
+        default_storage.delete(name)
+
+    def test_cleanup_keeps_files_while_deduplicated_uploads_use_them(self):
+        """Test that each removal releases one use before deleting the file."""
+        shared = default_storage.save("dedup/shared.png", ContentFile(b"shared"))
+        unshared = default_storage.save(
+            "dedup/unshared.png",
+            ContentFile(b"unshared"),
+        )
+        remember_image(DIGEST, 6, shared, f"/media/{shared}", owner=1)
+        assert find_existing_image(DIGEST, 6, owner=1) is not None
+        assert find_existing_image(DIGEST, 6, owner=1) is not None
+        # Uses are kept in the database, not the cache
+        cache.clear()
+
+        for _ in range(2):
+            result = _delete_single_file(f"http://testserver/media/{shared}")
+            assert result["success"]
+            assert result["kept"]
+            assert default_storage.exists(shared)
+
+        assert "kept" not in _delete_single_file(f"http://testserver/media/{shared}")
+        assert not default_storage.exists(shared)
+        assert not SharedImage.objects.exists()
+
+        assert _delete_single_file(f"http://testserver/media/{unshared}")["success"]
+        assert not default_storage.exists(unshared)
+
+    def test_cancelled_removals_are_not_counted_as_uses(self):
+        """Test that reviving a pending removal doesn't add a use."""
+        name = default_storage.save("dedup/revived.png", ContentFile(b"revived"))
+        url = f"/media/{name}"
+        remember_image(DIGEST, 7, name, url, owner=1)
+        UnusedImageURLS.objects.create(image_url=f"http://testserver{url}")
+
+        assert find_existing_image(DIGEST, 7, owner=1) is not None
+
+        assert not UnusedImageURLS.objects.exists()
+        assert not SharedImage.objects.exists()
+        default_storage.delete(name)
+
+
+@override_settings(DJ_BN_IMAGE_DEDUP=True, DJ_BN_IMAGE_VARIANTS=False)
+class DedupUploadTests(TestCase):
+    @pytest.fixture(autouse=True)
+    def image(self, make_image):
+        self.data = make_image()
+
+    def setUp(self):
+        users = get_user_model().objects
+        self.alice = users.create_user("alice", password="alice")  # noqa: S106
+        self.bob = users.create_user("bob", password="bob")  # noqa: S106
+
+    def upload(self, user):
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("django_blocknote:upload_image"),
+            {"file": ContentFile(self.data, name="noise.png")},
+        )
+        assert response.status_code == 200
+        return response.json()["url"]
+
+    def check(self, user):
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("django_blocknote:check_image"),
+            {
+                "sha256": hashlib.sha256(self.data).hexdigest(),
+                "size": len(self.data),
+            },
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_repeated_uploads_reuse_the_users_own_image(self):
+        """Test that only the uploader gets the stored image back."""
+        url = self.upload(self.alice)
+
+        assert self.upload(self.alice) == url
+        checked = self.check(self.alice)
+        assert checked["exists"]
+        assert checked["url"] == url
+        assert self.check(self.bob) == {"exists": False}
+        assert self.upload(self.bob) != url
@@ -0,0 +1,115 @@
+from io import BytesIO
+
+import pytest
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from django_blocknote.image import adaptive_policy, classify_image, legacy_policy
+from django_blocknote.image.encoder import get_encoder_options
+
+
+def fixed_policy(img, image_size):
+    """A custom encoder policy, named by its dotted path in the tests."""
+    return {"quality": 42, "method": 0}
+
+
+def flat_image():
+    """Helper to make a screenshot-like image of a few flat colours."""
+    image = Image.new("RGB", (64, 48), "white")
+    image.paste((30, 60, 200), (0, 0, 32, 24))
+    return image
+
+
+def noisy_image(make_image, mode="RGB"):
+    """Helper to open a photo-like noisy image, of more than 4096 colours."""
+    return Image.open(BytesIO(make_image(size=(128, 64), mode=mode)))
+
+
+def webp_kind(data):
+    """Helper to read whether a still WebP is lossless ("VP8L") or lossy."""
+    return data[12:16].decode()
+
+
+def test_adaptive_policy_is_the_default():
+    """Test that uploads are encoded by image class unless configured."""
+    assert settings.DJ_BN_IMAGE_ENCODER_POLICY == "adaptive"
+
+
+def test_images_are_classified(make_image):
+    """Test the classes the adaptive policy chooses encodings by."""
+    assert classify_image(flat_image()) == "screenshot"
+    assert classify_image(noisy_image(make_image)) == "photo"
+    assert classify_image(noisy_image(make_image, mode="RGBA")) == "alpha"
+    # Fully opaque alpha channels don't count
+    assert classify_image(flat_image().convert("RGBA")) == "screenshot"
+
+
+def test_adaptive_policy_options(make_image):
+    """Test lossless screenshots, near-lossless alpha and lossy photos."""
+    screenshot = adaptive_policy(flat_image(), 1000)
+    assert screenshot["lossless"]
+    assert screenshot["mode"] == "RGB"
+
+    alpha = adaptive_policy(noisy_image(make_image, mode="RGBA"), 1000)
+    assert alpha["mode"] == "RGBA"
+    assert alpha["quality"] == settings.DJ_BN_IMAGE_NEAR_LOSSLESS_QUALITY
+    assert alpha["alpha_quality"] == 100
+
+    photo = adaptive_policy(noisy_image(make_image), 1000)
+    assert not photo.get("lossless")
+    assert photo["quality"] == settings.DJ_BN_IMAGE_QUALITY
+
+    with override_settings(DJ_BN_IMAGE_ENCODER_PRESET="fast"):
+        assert adaptive_policy(noisy_image(make_image), 1000)["method"] == 2
+
+
+@pytest.mark.parametrize(
+    ("image_size", "quality"),
+    [(1000, 30), (600_000, 20), (1_500_000, 10), (5_000_000, 5), (20_000_000, 3)],
+)
+def test_legacy_policy_quality_by_size(image_size, quality):
+    """Test that the legacy policy keeps its size buckets."""
+    assert legacy_policy(flat_image(), image_size) == {
+        "mode": "RGB",
+        "quality": quality,
+        "method": 6,
+    }
+
+
+def test_policy_is_chosen_by_setting():
+    """Test the named policies and a dotted path to a custom one."""
+    image = flat_image()
+    assert get_encoder_options(image, 1000)["lossless"]
+
+    with override_settings(DJ_BN_IMAGE_ENCODER_POLICY="legacy"):
+        assert get_encoder_options(image, 1000)["quality"] == 30
+
+    with override_settings(
+        DJ_BN_IMAGE_ENCODER_POLICY="tests.backend.test_encoder.fixed_policy",
+    ):
+        assert get_encoder_options(image, 1000) == {"quality": 42, "method": 0}
+
+
+def stored(response):
+    assert response.status_code == 200
+    name = response.json()["url"].removeprefix("/media/")
+    with default_storage.open(name) as stored_file:
+        return stored_file.read()
+
+
+def encode(image):
+    stream = BytesIO()
+    image.save(stream, format="PNG")
+    return stream.getvalue()
+
+
+def test_uploads_are_encoded_by_class(upload_image, make_image):
+    """Test that screenshots are stored lossless and photos lossy."""
+    assert webp_kind(stored(upload_image(encode(flat_image())))) == "VP8L"
+    photo = make_image(size=(128, 64))
+    assert webp_kind(stored(upload_image(photo))) == "VP8 "
+
+    with override_settings(DJ_BN_IMAGE_ENCODER_POLICY="legacy"):
+        assert webp_kind(stored(upload_image(encode(flat_image())))) == "VP8 "
@@ -0,0 +1,52 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image, ImageCms
+
+ORIENTATION = 0x0112
+
+
+@pytest.fixture
+def phone_photo():
+    """A 64x32 JPEG stored sideways, with orientation, EXIF and ICC data."""
+    image = Image.new("RGB", (64, 32), "white")
+    image.paste((200, 0, 0), (0, 0, 8, 32))
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6  # Rotate 90 degrees clockwise to display
+    exif[0x010F] = "Phone maker"
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+    stream = BytesIO()
+    image.save(stream, format="JPEG", exif=exif.tobytes(), icc_profile=icc_profile)
+    return stream.getvalue()
+
+
+def stored_image(response):
+    assert response.status_code == 200
+    name = response.json()["url"].removeprefix("/media/")
+    return Image.open(default_storage.open(name))
+
+
+def test_photos_are_stored_upright_without_metadata(upload_image, phone_photo):
+    """Test that the EXIF orientation is applied and metadata dropped."""
+    response = upload_image(phone_photo, name="photo.jpg")
+    assert (response.json()["width"], response.json()["height"]) == (32, 64)
+
+    with stored_image(response) as image:
+        assert image.size == (32, 64)
+        # The red bar on the left is now along the top
+        assert image.getpixel((16, 2))[0] > 150
+        assert image.getpixel((16, 60))[1] > 150
+        assert not image.getexif()
+        assert "icc_profile" not in image.info
+        assert "xmp" not in image.info
+
+
+@override_settings(DJ_BN_IMAGE_KEEP_ICC_PROFILE=True)
+def test_colour_profiles_can_be_kept(upload_image, phone_photo):
+    """Test that only the ICC profile survives when asked to."""
+    with stored_image(upload_image(phone_photo, name="photo.jpg")) as image:
+        assert image.info["icc_profile"]
+        assert not image.getexif()
@@ -0,0 +1,63 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from PIL import Image
+
+from django_blocknote.exceptions import ImageTooLargeError
+from django_blocknote.image import image_precheck
+
+
+def encode(image, image_format="PNG", **save_kwargs):
+    """Helper to encode a Pillow image."""
+    stream = BytesIO()
+    image.save(stream, format=image_format, **save_kwargs)
+    return stream.getvalue()
+
+
+def animation(frames):
+    """Helper to encode an animated GIF with the given number of frames."""
+    images = [Image.new("RGB", (8, 8), (40 * frame, 0, 0)) for frame in range(frames)]
+    return encode(images[0], "GIF", save_all=True, append_images=images[1:])
+
+
+def test_precheck_reads_the_headers():
+    """Test that the dimensions, frames and mode are returned."""
+    image = ContentFile(animation(3), name="anim.gif")
+    assert image_precheck(image) == {
+        "width": 8,
+        "height": 8,
+        "frames": 3,
+        "mode": "P",
+    }
+    assert image.tell() == 0
+
+
+def test_oversized_images_are_rejected_before_decoding(upload_image):
+    """Test that a 9000x9000 image gets a 413, from its headers alone."""
+    # Bilevel, so the file stays small while the pixel count doesn't
+    data = encode(Image.new("1", (9000, 9000)))
+    assert len(data) < 1024 * 1024
+
+    response = upload_image(data, name="huge.png")
+    assert response.status_code == 413
+    assert response.json()["code"] == "TOO_LARGE"
+    assert "9000x9000" in response.json()["error"]
+
+
+@override_settings(DJ_BN_MAX_FRAMES=4)
+def test_animations_with_too_many_frames_are_rejected(upload_image):
+    """Test that the frame budget applies to animated images."""
+    assert upload_image(animation(4), name="ok.gif").status_code == 200
+
+    response = upload_image(animation(5), name="long.gif")
+    assert response.status_code == 413
+    assert response.json()["code"] == "TOO_LARGE"
+
+
+@override_settings(DJ_BN_MAX_FILE_SIZE=100)
+def test_files_over_the_size_budget_are_rejected(make_image):
+    """Test that the file size is checked before the image is opened."""
+    with pytest.raises(ImageTooLargeError, match="maximum is 100 bytes"):
+        image_precheck(ContentFile(make_image(), name="big.png"))
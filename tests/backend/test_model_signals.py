@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db.migrations.state import ProjectState
+from django.db.models.signals import post_delete, post_save
+from django.test import TestCase, override_settings
+
+from django_blocknote.render import cache as render_cache
+from tests.models import Document
+
+BLOCKS = [{"type": "paragraph", "content": "Saved"}]
+
+
+def test_historical_models_connect_no_receivers():
+    """Test that models rendered for migrations don't pile up receivers."""
+    receivers = (len(post_save.receivers), len(post_delete.receivers))
+
+    historical = ProjectState.from_apps(apps).apps.get_model("tests", "Document")
+
+    assert historical is not Document
+    assert (len(post_save.receivers), len(post_delete.receivers)) == receivers
+
+
+class RenderCacheWarmingTests(TestCase):
+    def test_saves_dont_render_by_default(self):
+        """Test that documents are rendered on first view, not on save."""
+        with patch.object(
+            render_cache,
+            "render_document",
+            wraps=render_cache.render_document,
+        ) as render:
+            Document.objects.create(content=BLOCKS)
+            assert render.call_count == 0
+
+    @override_settings(DJ_BN_RENDER_CACHE_WARM_ON_SAVE=True)
+    def test_saves_can_warm_the_render_cache(self):
+        """Test that opting in renders documents into the cache on save."""
+        with patch.object(
+            render_cache,
+            "render_document",
+            wraps=render_cache.render_document,
+        ) as render:
+            Document.objects.create(content=BLOCKS)
+            assert render.call_count == 1
+
+            render_cache.render_cached(BLOCKS)
+            assert render.call_count == 1
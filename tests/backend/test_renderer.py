@@ -0,0 +1,271 @@
+import json
+
+import pytest
+
+from django_blocknote.render import (
+    get_render_cache_key,
+    iter_render_chunks,
+    register_block_renderer,
+    render_blocks,
+    render_inline,
+)
+from django_blocknote.render.cache import RenderLRU
+from django_blocknote.render.renderer import _block_renderers
+
+
+def text(value, **styles):
+    """Helper to build a text inline content item."""
+    return {"type": "text", "text": value, "styles": styles}
+
+
+def block(block_type, content=None, children=None, **props):
+    """Helper to build a block."""
+    return {
+        "id": "block",
+        "type": block_type,
+        "props": props,
+        "content": content if content is not None else [],
+        "children": children or [],
+    }
+
+
+def test_empty_content_renders_nothing():
+    """Test that missing or invalid content renders an empty string."""
+    assert render_blocks(None) == ""
+    assert render_blocks([]) == ""
+    assert render_blocks("") == ""
+    assert render_blocks("{ invalid json }") == ""
+
+
+def test_json_string_content():
+    """Test that a JSON string is rendered like the parsed blocks."""
+    blocks = [block("paragraph", [text("Hello")])]
+    assert render_blocks(json.dumps(blocks)) == render_blocks(blocks)
+    assert render_blocks(blocks) == "<p>Hello</p>"
+
+
+def test_headings_and_props():
+    """Test heading levels, colours and alignment."""
+    html = render_blocks(
+        [
+            block("heading", [text("Title")], level=2, textAlignment="center"),
+            block("paragraph", [text("Red")], textColor="red"),
+        ],
+    )
+    assert html == (
+        '<h2 style="text-align: center">Title</h2>'
+        '<p data-text-color="red">Red</p>'
+    )
+
+
+def test_inline_styles_and_links():
+    """Test styled text and links, dropping unsafe link schemes."""
+    html = render_inline(
+        [
+            text("bold", bold=True, italic=True),
+            {"type": "link", "href": "https://example.com", "content": [text("ok")]},
+            {"type": "link", "href": "javascript:alert(1)", "content": [text("bad")]},
+        ],
+    )
+    assert html == (
+        "<strong><em>bold</em></strong>"
+        '<a href="https://example.com">ok</a>'
+        "bad"
+    )
+
+
+def test_text_is_escaped():
+    """Test that text and attributes can't inject markup."""
+    html = render_blocks(
+        [block("paragraph", [text('<script>alert("x")</script>')], textColor='"x')],
+    )
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+    assert 'data-text-color="&quot;x"' in html
+
+
+def test_consecutive_list_items_are_grouped():
+    """Test that list items share one list element, per list type."""
+    html = render_blocks(
+        [
+            block("bulletListItem", [text("a")]),
+            block("bulletListItem", [text("b")]),
+            block("numberedListItem", [text("c")]),
+            block("checkListItem", [text("d")], checked=True),
+            block("paragraph", [text("e")]),
+        ],
+    )
+    assert html == (
+        "<ul><li>a</li><li>b</li></ul>"
+        "<ol><li>c</li></ol>"
+        '<ul class="bn-check-list"><li><input type="checkbox" disabled checked> '
+        "d</li></ul>"
+        "<p>e</p>"
+    )
+
+
+def test_nested_children():
+    """Test nested lists inside list items and children of other blocks."""
+    html = render_blocks(
+        [
+            block(
+                "bulletListItem",
+                [text("parent")],
+                children=[block("bulletListItem", [text("child")])],
+            ),
+            block("paragraph", [text("p")], children=[block("paragraph", [text("c")])]),
+        ],
+    )
+    assert html == (
+        "<ul><li>parent<ul><li>child</li></ul></li></ul>"
+        '<p>p</p><div class="bn-block-children"><p>c</p></div>'
+    )
+
+
+def test_deeply_nested_document_does_not_recurse():
+    """Test that nesting deeper than the recursion limit still renders."""
+    document = block("bulletListItem", [text("leaf")])
+    for _ in range(5000):
+        document = block("bulletListItem", [text("x")], children=[document])
+    html = render_blocks([document])
+    assert html.count("<ul>") == 5001
+    assert "leaf" in html
+
+
+def test_table_with_header_row():
+    """Test tables with a header row and cell spans."""
+    html = render_blocks(
+        [
+            {
+                "type": "table",
+                "content": {
+                    "type": "tableContent",
+                    "headerRows": 1,
+                    "rows": [
+                        {"cells": [[text("H1")], [text("H2")]]},
+                        {
+                            "cells": [
+                                {
+                                    "type": "tableCell",
+                                    "props": {"colspan": 2},
+                                    "content": [text("wide")],
+                                },
+                            ],
+                        },
+                    ],
+                },
+            },
+        ],
+    )
+    assert html == (
+        "<table><thead><tr><th>H1</th><th>H2</th></tr></thead>"
+        '<tbody><tr><td colspan="2">wide</td></tr></tbody></table>'
+    )
+
+
+def test_image_block():
+    """Test images with captions, and images with unsafe URLs dropped."""
+    html = render_blocks(
+        [
+            block("image", url="/media/a.webp", caption="A cat", previewWidth=320),
+            block("image", url="javascript:alert(1)"),
+        ],
+    )
+    assert html == (
+        '<figure><img src="/media/a.webp" alt="A cat" width="320" '
+        'loading="lazy" decoding="async"><figcaption>A cat</figcaption></figure>'
+    )
+
+
+def test_unknown_alignments_are_dropped():
+    """Test that only known alignments reach the style attribute."""
+    html = render_blocks(
+        [
+            block("paragraph", [text("a")], textAlignment="justify"),
+            block("paragraph", [text("b")], textAlignment="left"),
+            block("paragraph", [text("c")], textAlignment="red; background: url(x)"),
+            block("paragraph", [text("d")], textAlignment=["center"]),
+        ],
+    )
+    assert html == '<p style="text-align: justify">a</p><p>b</p><p>c</p><p>d</p>'
+
+
+@pytest.mark.parametrize(
+    "width",
+    [float("inf"), float("-inf"), float("nan"), 0, -20, 0.5, True, "320"],
+)
+def test_invalid_image_widths_are_dropped(width):
+    """Test that images without a usable preview width render without one."""
+    html = render_blocks([block("image", url="/media/a.webp", previewWidth=width)])
+    assert html == (
+        '<figure><img src="/media/a.webp" alt="" '
+        'loading="lazy" decoding="async"></figure>'
+    )
+
+
+@pytest.fixture
+def alert_renderer():
+    """Register a renderer for a custom block type."""
+
+    @register_block_renderer("alert")
+    def render_alert(block):
+        return f'<div role="alert">{render_inline(block.get("content"))}', "</div>"
+
+    yield
+    del _block_renderers["alert"]
+
+
+def test_custom_block_renderer(alert_renderer):
+    """Test that registered renderers are used for their block type."""
+    html = render_blocks([block("alert", [text("Careful")])])
+    assert html == '<div role="alert">Careful</div>'
+
+
+def test_unknown_block_type():
+    """Test that unknown block types keep their text."""
+    html = render_blocks([block("mystery", [text("still here")])])
+    assert html == '<div class="bn-block" data-type="mystery">still here</div>'
+
+
+def test_render_cache_key_is_stable():
+    """Test that cache keys ignore key order but not content or options."""
+    blocks = [block("paragraph", [text("a")])]
+    reordered = [dict(reversed(blocks[0].items()))]
+    key = get_render_cache_key(blocks, css_class="x")
+    assert key == get_render_cache_key(reordered, css_class="x")
+    assert key != get_render_cache_key(blocks, css_class="y")
+    assert key != get_render_cache_key([block("paragraph", [text("b")])], css_class="x")
+
+
+def test_render_lru_evicts_least_recently_used():
+    """Test that the LRU stays within its byte budget."""
+    lru = RenderLRU(max_bytes=100)
+    lru.set("a", "x" * 40)
+    lru.set("b", "y" * 40)
+    lru.get("a")
+    lru.set("c", "z" * 40)
+    assert lru.get("b") is None
+    assert lru.get("a") == "x" * 40
+    assert lru.size <= 100
+
+    lru.set("huge", "x" * 200)
+    assert lru.get("huge") is None
+
+
+def test_streamed_render_matches_full_render():
+    """Test that chunks end on top-level blocks and join to the full render."""
+    blocks = [
+        block("paragraph", [text("p")], children=[block("paragraph", [text("c")])]),
+        block("bulletListItem", [text("a")]),
+        block("bulletListItem", [text("b")]),
+        block("heading", [text("h")]),
+    ]
+    chunks = list(iter_render_chunks(blocks, chunk_size=0))
+    assert "".join(chunks) == render_blocks(blocks)
+    assert chunks == [
+        '<p>p</p><div class="bn-block-children"><p>c</p></div>',
+        "<ul><li>a</li>",
+        "<li>b</li>",
+        "</ul><h1>h</h1>",
+    ]
+    assert list(iter_render_chunks(blocks)) == [render_blocks(blocks)]
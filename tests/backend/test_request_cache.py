@@ -0,0 +1,26 @@
+from django_blocknote.request_cache import (
+    forget_for_request,
+    memoize_for_request,
+    remember_for_request,
+    request_cache,
+)
+
+
+def test_values_are_memoized_within_a_request_cache():
+    """Test that factories run once per key inside a scope, always outside."""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return len(calls)
+
+    with request_cache():
+        assert memoize_for_request("key", factory) == 1
+        assert memoize_for_request("key", factory) == 1
+        remember_for_request("key", 10)
+        assert memoize_for_request("key", factory) == 10
+        forget_for_request("key")
+        assert memoize_for_request("key", factory) == 2
+
+    assert memoize_for_request("key", factory) == 3
+    assert memoize_for_request("key", factory) == 4
@@ -0,0 +1,59 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.urls import reverse
+
+from django_blocknote.image.admission import upload_slot
+
+
+@pytest.fixture
+def stored_image(make_image):
+    """An uploaded PNG and a file stored outside the upload path."""
+    data = make_image()
+    name = default_storage.save("blocknote_uploads/serve.png", ContentFile(data))
+    other = default_storage.save("private/serve.png", ContentFile(data))
+    yield name, other
+    for stored in (name, name.replace(".png", ".webp"), other):
+        default_storage.delete(stored)
+
+
+def serve(client, name):
+    return client.get(
+        reverse("django_blocknote:serve_image", kwargs={"name": name}),
+        headers={"Accept": "image/webp,*/*"},
+    )
+
+
+def test_only_uploads_are_served(client, stored_image):
+    """Test that names outside DJ_BN_UPLOAD_PATH are not found."""
+    name, other = stored_image
+
+    response = serve(client, name)
+    assert response.status_code == 302
+    assert response["Location"] == default_storage.url(name)
+
+    assert serve(client, other).status_code == 404
+    assert serve(client, f"blocknote_uploads/../{other}").status_code == 404
+    assert serve(client, "blocknote_uploads/missing.png").status_code == 404
+
+
+@override_settings(
+    DJ_BN_IMAGE_VARIANTS=["webp"],
+    DJ_BN_IMAGE_VARIANTS_LAZY=True,
+    DJ_BN_UPLOAD_MAX_CONCURRENT=1,
+    DJ_BN_UPLOAD_QUEUE_TIMEOUT=0,
+)
+def test_lazy_variants_wait_for_a_processing_slot(client, stored_image):
+    """Test that lazy variants are only encoded in a free upload slot."""
+    name, _ = stored_image
+    variant = name.replace(".png", ".webp")
+
+    with upload_slot():
+        response = serve(client, name)
+    assert response["Location"] == default_storage.url(name)
+    assert not default_storage.exists(variant)
+
+    response = serve(client, name)
+    assert response["Location"] == default_storage.url(variant)
+    assert default_storage.exists(variant)
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+from django.test import override_settings
+
+from django_blocknote.request_cache import request_cache
+from django_blocknote.themes import (
+    get_theme_resolvers,
+    get_user_theme,
+    make_attribute_resolver,
+    probe_user_theme,
+)
+
+calls = []
+
+
+def dark_theme(user):
+    calls.append(user.pk)
+    return "dark"
+
+
+def make_user(pk=1, **attrs):
+    return SimpleNamespace(pk=pk, is_authenticated=True, **attrs)
+
+
+def test_users_are_not_probed_by_default():
+    """Test that without theme settings no resolver runs."""
+    assert get_theme_resolvers() == []
+    assert get_user_theme(make_user(theme="dark")) is None
+
+
+def test_resolvers_are_rebuilt_when_settings_change():
+    """Test that override_settings resets the resolvers built before it."""
+    resolvers = get_theme_resolvers()
+    user = make_user(profile=SimpleNamespace(theme="auto"))
+
+    with override_settings(DJ_BN_THEME_ATTRIBUTE="profile.theme"):
+        assert len(get_theme_resolvers()) == 1
+        assert get_user_theme(user) == "auto"
+
+    with override_settings(DJ_BN_THEME_PROBE=True):
+        assert get_theme_resolvers() == [probe_user_theme]
+
+    with override_settings(
+        DJ_BN_THEME_RESOLVER="tests.backend.test_themes.dark_theme",
+        DJ_BN_THEME_PROBE=True,
+    ):
+        assert get_theme_resolvers() == [dark_theme, probe_user_theme]
+        assert get_user_theme(user) == "dark"
+
+    assert get_theme_resolvers() == resolvers
+    assert get_user_theme(user) is None
+
+
+def test_resolvers_are_reused_until_a_setting_changes():
+    """Test that the resolvers are built once per settings."""
+    with override_settings(DJ_BN_THEME_PROBE=True):
+        assert get_theme_resolvers() is get_theme_resolvers()
+
+        with override_settings(DJ_BN_IMAGE_DEDUP=True):
+            resolvers = get_theme_resolvers()
+        assert get_theme_resolvers() is resolvers
+
+
+@override_settings(DJ_BN_THEME_RESOLVER="tests.backend.test_themes.dark_theme")
+def test_themes_are_memoized_for_the_request():
+    """Test that each user's theme is resolved once per request cache."""
+    calls.clear()
+
+    with request_cache():
+        assert get_user_theme(make_user(1)) == "dark"
+        assert get_user_theme(make_user(1)) == "dark"
+        assert get_user_theme(make_user(2)) == "dark"
+
+    assert calls == [1, 2]
+
+
+def test_attribute_resolver_ignores_missing_attributes():
+    """Test that missing or empty attributes resolve to None."""
+    resolve = make_attribute_resolver("profile.theme")
+
+    assert resolve(make_user(profile=SimpleNamespace(theme="light"))) == "light"
+    assert resolve(make_user(profile=None)) is None
+    assert resolve(make_user()) is None
+
+
+def test_anonymous_users_have_no_theme():
+    """Test that anonymous users never reach the resolvers."""
+    with override_settings(DJ_BN_THEME_PROBE=True):
+        anonymous = SimpleNamespace(pk=None, is_authenticated=False, theme="dark")
+        assert get_user_theme(anonymous) is None
+        assert get_user_theme(None) is None
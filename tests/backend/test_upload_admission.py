@@ -0,0 +1,100 @@
+import pytest
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.urls import reverse
+
+from django_blocknote.image.admission import upload_slot
+
+
+@pytest.fixture
+def upload(client, make_image):
+    """Posts images to the single or batch upload view."""
+
+    def upload(count=None):
+        if count is None:
+            return client.post(
+                reverse("django_blocknote:upload_image"),
+                {"file": ContentFile(make_image(), name="noise.png")},
+            )
+        return client.post(
+            reverse("django_blocknote:upload_images"),
+            {
+                "files": [
+                    ContentFile(make_image(), name=f"noise{number}.png")
+                    for number in range(count)
+                ],
+            },
+        )
+
+    return upload
+
+
+@override_settings(DJ_BN_UPLOAD_RATE=1, DJ_BN_UPLOAD_BURST=1)
+def test_uploads_over_the_rate_are_throttled(upload):
+    """Test that an empty bucket gets a 429 with Retry-After."""
+    assert upload().status_code == 200
+
+    response = upload()
+    assert response.status_code == 429
+    assert response["Retry-After"] == "60"
+    assert response.json()["code"] == "THROTTLED"
+
+
+def forwarded_for(request):
+    return request.headers.get("X-Forwarded-For", "")
+
+
+def test_uploads_are_not_rate_limited_by_default(upload):
+    """Test that existing installs don't get a rate limit they didn't set."""
+    assert settings.DJ_BN_UPLOAD_RATE is None
+    for _ in range(3):
+        assert upload().status_code == 200
+
+
+@override_settings(
+    DJ_BN_UPLOAD_RATE=1,
+    DJ_BN_UPLOAD_BURST=1,
+    DJ_BN_UPLOAD_CLIENT_KEY="tests.backend.test_upload_admission.forwarded_for",
+)
+def test_anonymous_clients_can_be_keyed_by_a_callable(client, make_image):
+    """Test that clients behind one proxy get their own buckets."""
+
+    def upload(address):
+        return client.post(
+            reverse("django_blocknote:upload_image"),
+            {"file": ContentFile(make_image(), name="noise.png")},
+            headers={"X-Forwarded-For": address},
+        )
+
+    assert upload("192.0.2.1").status_code == 200
+    assert upload("192.0.2.2").status_code == 200
+    assert upload("192.0.2.1").status_code == 429
+
+
+@override_settings(DJ_BN_UPLOAD_RATE=1, DJ_BN_UPLOAD_BURST=1)
+def test_batches_are_charged_once(upload):
+    """Test that a batch takes one token, however many files it holds."""
+    response = upload(count=3)
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 3
+
+    response = upload(count=3)
+    assert response.status_code == 429
+    assert response["Retry-After"] == "60"
+    assert response.json()["code"] == "THROTTLED"
+
+
+@override_settings(DJ_BN_UPLOAD_MAX_CONCURRENT=1, DJ_BN_UPLOAD_QUEUE_TIMEOUT=0)
+def test_uploads_are_unavailable_while_every_slot_is_busy(upload):
+    """Test that uploads get a 503 with Retry-After when no slot frees up."""
+    with upload_slot():
+        response = upload()
+        batch = upload(count=2).json()
+
+    assert response.status_code == 503
+    assert response["Retry-After"] == "1"
+    assert response.json()["code"] == "BUSY"
+    assert [result["status"] for result in batch["results"]] == [503, 503]
+
+    assert upload().status_code == 200
@@ -0,0 +1,134 @@
+import re
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_blocknote.image.timing import (
+    stage_metrics,
+    timed_stage,
+    upload_stage_timed,
+)
+
+SAMPLE = re.compile(r'^(\w+)\{stage="(\w+)"(?:,le="([^"]+)")?\} (\S+)$')
+
+SUFFIXES = {
+    "counter": ("",),
+    "histogram": ("_bucket", "_sum", "_count"),
+    "summary": ("_sum", "_count"),
+}
+
+
+def parse_exposition(text):
+    """Helper to parse the text format, checking each sample's family."""
+    assert text.endswith("\n")
+    families = {}
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ")
+            assert name not in families
+            families[name] = metric_type
+        elif not line.startswith("# HELP "):
+            name, stage, le, value = SAMPLE.match(line).groups()
+            family = next(
+                family
+                for family, metric_type in families.items()
+                for suffix in SUFFIXES[metric_type]
+                if name == family + suffix
+            )
+            samples.append((family, name, stage, le, float(value)))
+    return families, samples
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    stage_metrics.reset()
+    yield
+    stage_metrics.reset()
+
+
+@override_settings(DJ_BN_UPLOAD_METRICS=True)
+def test_exposition_format():
+    """Test histogram, counter and summary families in the text format."""
+    for duration in (0.003, 0.2, 20):
+        stage_metrics.observe("encode", duration, bytes_in=10, details={"quality": 80})
+    stage_metrics.observe("save", 0.01, failed=True)
+
+    families, samples = parse_exposition(stage_metrics.render())
+    assert families == {
+        "djbn_upload_stage_duration_seconds": "histogram",
+        "djbn_upload_stage_failures_total": "counter",
+        "djbn_upload_stage_bytes_in_total": "counter",
+        "djbn_upload_stage_bytes_out_total": "counter",
+        "djbn_upload_encode_quality": "summary",
+    }
+
+    buckets = [
+        (le, value)
+        for _, name, stage, le, value in samples
+        if name.endswith("_bucket") and stage == "encode"
+    ]
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)
+    assert buckets[0] == ("0.005", 1)
+    assert buckets[-1] == ("+Inf", 3)
+
+    values = {(name, stage): value for _, name, stage, _, value in samples}
+    assert values["djbn_upload_stage_duration_seconds_count", "encode"] == 3
+    assert values["djbn_upload_stage_failures_total", "save"] == 1
+    assert values["djbn_upload_stage_bytes_in_total", "encode"] == 30
+    assert values["djbn_upload_encode_quality_sum", "encode"] == 240
+    assert values["djbn_upload_encode_quality_count", "encode"] == 3
+    assert ("djbn_upload_encode_quality_count", "save") not in values
+
+
+def test_failing_receivers_dont_fail_the_stage():
+    """Test that a broken receiver neither fails nor masks the stage's error."""
+
+    def broken_receiver(sender, **record):
+        raise RuntimeError("receiver failed")
+
+    upload_stage_timed.connect(broken_receiver)
+    try:
+        with timed_stage("save") as record:
+            record["bytes_out"] = 10
+
+        with pytest.raises(ValueError, match="encoder failed"), timed_stage("encode"):
+            raise ValueError("encoder failed")
+    finally:
+        upload_stage_timed.disconnect(broken_receiver)
+
+
+@override_settings(DJ_BN_UPLOAD_METRICS=True, DJ_BN_UPLOAD_METRICS_TOKEN="s3cret")
+class UploadMetricsViewTests(TestCase):
+    url = reverse("django_blocknote:upload_metrics")
+
+    def test_staff_and_token_holders_can_read_metrics(self):
+        """Test that the metrics are hidden from everyone else."""
+        assert self.client.get(self.url).status_code == 404
+        response = self.client.get(self.url, headers={"Authorization": "Bearer no"})
+        assert response.status_code == 404
+
+        response = self.client.get(self.url, headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+
+        users = get_user_model().objects
+        self.client.force_login(users.create_user("user"))
+        assert self.client.get(self.url).status_code == 404
+        self.client.force_login(users.create_user("staff", is_staff=True))
+        assert self.client.get(self.url).status_code == 200
+
+    @override_settings(DJ_BN_UPLOAD_METRICS_TOKEN="")
+    def test_no_token_is_accepted_without_one_set(self):
+        """Test that an empty token doesn't match an empty bearer."""
+        response = self.client.get(self.url, headers={"Authorization": "Bearer "})
+        assert response.status_code == 404
+
+    @override_settings(DJ_BN_UPLOAD_METRICS=False)
+    def test_metrics_are_off_by_default(self):
+        """Test that not even staff can read metrics that aren't collected."""
+        response = self.client.get(self.url, headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 404
@@ -0,0 +1,47 @@
+import base64
+from io import BytesIO
+
+from django.test import override_settings
+from PIL import Image
+
+
+def decode_placeholder(placeholder):
+    """Helper to open the image in a placeholder data URI."""
+    prefix = "data:image/webp;base64,"
+    assert placeholder.startswith(prefix)
+    return Image.open(BytesIO(base64.b64decode(placeholder.removeprefix(prefix))))
+
+
+def test_upload_response_has_dimensions_and_placeholder(upload_image, make_image):
+    """Test that uploads return the layout details of the image."""
+    data = make_image(size=(200, 100))
+    response = upload_image(data, name="wide.png")
+    assert response.status_code == 200
+
+    uploaded = response.json()
+    assert uploaded["filename"] == "wide.png"
+    assert uploaded["size"] == len(data)
+    assert uploaded["content_type"] == "image/png"
+    assert (uploaded["width"], uploaded["height"]) == (200, 100)
+
+    with decode_placeholder(uploaded["placeholder"]) as placeholder:
+        assert placeholder.format == "WEBP"
+        assert placeholder.size == (16, 8)
+    assert len(uploaded["placeholder"]) < 1024
+
+
+@override_settings(DJ_BN_IMAGE_PLACEHOLDER=False)
+def test_placeholders_can_be_turned_off(upload_image, make_image):
+    """Test that dimensions are returned without a placeholder."""
+    uploaded = upload_image(make_image(size=(30, 60))).json()
+    assert (uploaded["width"], uploaded["height"]) == (30, 60)
+    assert uploaded["placeholder"] is None
+
+
+@override_settings(DJ_BN_FORMAT_IMAGE=False)
+def test_unconverted_uploads_read_dimensions_from_headers(upload_image, make_image):
+    """Test that images stored as uploaded still report their dimensions."""
+    uploaded = upload_image(make_image(size=(30, 60))).json()
+    assert uploaded["url"].endswith(".png")
+    assert (uploaded["width"], uploaded["height"]) == (30, 60)
+    assert uploaded["placeholder"] is None
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+from django.template import Context, Template
+
+from django_blocknote.viewers import iter_render_viewers
+from django_blocknote.widgets import BlockNoteWidget
+
+SCRIPT_BREAKOUT = "</script><script>alert(1)</script>"
+
+
+def paragraph(text):
+    return [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]
+
+
+def render_list(contents, **context):
+    template = Template(
+        "{% load blocknote_tags %}{% blocknote_viewer_list contents %}",
+    )
+    return template.render(Context({"contents": contents, **context}))
+
+
+def test_viewer_list_escapes_script_endings():
+    """Test that no document can close the script element embedding it."""
+    html = render_list([paragraph(SCRIPT_BREAKOUT), paragraph("safe")])
+
+    assert html.count("</script>") == html.count("<script")
+    assert "\\u003C/script\\u003E" in html
+
+
+def test_viewer_list_renders_each_document_with_a_unique_id():
+    """Test that every document gets its own viewer."""
+    html = render_list([paragraph("first"), paragraph("second"), None])
+
+    assert "first" in html
+    assert "second" in html
+    assert "blocknote-empty-state" in html
+    assert html.count('_0_editor"') == 1
+    assert html.count('_1_editor"') == 1
+
+
+def test_viewers_share_one_config():
+    """Test that the configs are built once for the whole list."""
+    BlockNoteWidget.clear_config_cache()
+    with patch.object(
+        BlockNoteWidget,
+        "_build_config_context",
+        autospec=True,
+        side_effect=BlockNoteWidget._build_config_context,
+    ) as build:
+        viewers = list(iter_render_viewers([paragraph(str(i)) for i in range(5)]))
+
+    assert len(viewers) == 5
+    assert build.call_count == 1
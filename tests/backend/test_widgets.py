@@ -0,0 +1,133 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from django.test import override_settings
+
+from django_blocknote.widgets import BlockNoteWidget, safe_json_dump
+
+SCRIPT_BREAKOUT = "</script><script>alert(1)</script>"
+
+BLOCKS = [
+    {
+        "id": "block-1",
+        "type": "paragraph",
+        "content": [{"type": "text", "text": SCRIPT_BREAKOUT}],
+    },
+]
+
+
+def test_safe_json_dump_escapes_script_endings():
+    """Test that embedded JSON can't close its script element."""
+    dumped = safe_json_dump({"text": SCRIPT_BREAKOUT, "amp": "a & b"})
+
+    assert "</script>" not in dumped
+    assert "<" not in dumped
+    assert "&" not in dumped
+    assert json.loads(dumped) == {"text": SCRIPT_BREAKOUT, "amp": "a & b"}
+
+
+def test_safe_json_dump_falls_back_on_unserializable_data():
+    """Test that data JSON can't represent is replaced by the fallback."""
+    assert safe_json_dump({"value": object()}) == "{}"
+    assert safe_json_dump([object()], "[]") == "[]"
+
+
+def test_widget_content_is_escaped_in_its_script():
+    """Test that rendered readonly content keeps the breakout out of the HTML."""
+    html = BlockNoteWidget(mode="readonly").render(
+        "content",
+        BLOCKS,
+        attrs={"id": "viewer"},
+    )
+
+    assert html.count("</script>") == html.count("<script")
+    assert "\\u003C/script\\u003E" in html
+
+
+def test_lazy_viewers_embed_the_server_rendered_content():
+    """Test that non-eager viewers show rendered HTML until they mount."""
+    widget = BlockNoteWidget(mode="readonly", hydrate="visible")
+    html = widget.render(
+        "content",
+        [{"type": "paragraph", "content": "Hi"}],
+        attrs={"id": "viewer"},
+    )
+
+    assert 'data-hydrate="visible"' in html
+    assert "blocknote-placeholder" in html
+    assert "Hi</p>" in html
+
+
+def test_eager_widgets_mount_on_load():
+    """Test that eager widgets render the loading placeholder only."""
+    html = BlockNoteWidget(mode="readonly").render(
+        "content",
+        [{"type": "paragraph", "content": "Hi"}],
+        attrs={"id": "viewer"},
+    )
+
+    assert "data-hydrate" not in html
+    assert "blocknote-placeholder" not in html
+
+
+def test_unknown_hydrate_modes_are_rejected():
+    """Test that a typo in hydrate fails when the widget is built."""
+    with pytest.raises(ValueError, match="hydrate must be one of"):
+        BlockNoteWidget(hydrate="lazy")
+
+
+def test_configs_are_memoized_per_widget_configuration():
+    """Test that equal widgets share the serialized configs."""
+    BlockNoteWidget.clear_config_cache()
+
+    configs = BlockNoteWidget(menu_type="minimal").get_config_context()
+
+    assert BlockNoteWidget(menu_type="minimal").get_config_context() is configs
+    assert BlockNoteWidget(menu_type="default").get_config_context() is not configs
+
+
+def test_configs_are_rebuilt_when_settings_change():
+    """Test that override_settings bumps the settings version and rebuilds."""
+    widget = BlockNoteWidget()
+    configs = widget.get_config_context()
+    version = BlockNoteWidget._settings_version
+
+    with override_settings(DJ_BN_TEMPLATE_CONFIG={"maxBlocks": 7}):
+        assert BlockNoteWidget._settings_version > version
+        overridden = widget.get_config_context()
+        assert json.loads(overridden["template_config"])["maxBlocks"] == 7
+
+    restored = widget.get_config_context()
+    assert restored is not overridden
+    assert restored == configs
+
+
+def test_configs_follow_the_upload_config_setting():
+    """Test that changed upload settings reach the memoized configs."""
+    widget = BlockNoteWidget()
+    widget.get_config_context()
+
+    with override_settings(DJ_BN_IMAGE_UPLOAD_CONFIG={"uploadUrl": "/custom/"}):
+        upload_config = json.loads(widget.get_config_context()["image_upload_config"])
+
+    assert upload_config["uploadUrl"] == "/custom/"
+
+
+def upload_config_for(user=None):
+    attrs = {"user": user} if user is not None else None
+    configs = BlockNoteWidget(attrs=attrs).get_config_context()
+    return json.loads(configs["image_upload_config"])
+
+
+def test_pre_check_is_only_offered_for_deduplicated_uploads():
+    """Test that the hash pre-check is skipped when it can never hit."""
+    user = SimpleNamespace(pk=1, is_authenticated=True)
+    anonymous = SimpleNamespace(pk=None, is_authenticated=False)
+
+    assert "checkUrl" not in upload_config_for(user)
+
+    with override_settings(DJ_BN_IMAGE_DEDUP=True):
+        assert "checkUrl" in upload_config_for(user)
+        assert "checkUrl" not in upload_config_for(anonymous)
+        assert "checkUrl" not in upload_config_for()
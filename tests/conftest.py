@@ -0,0 +1,80 @@
+"""Sets up Django and a test database for the whole suite."""
+
+import os
+
+import django
+import pytest
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+
+def pytest_configure(config):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def django_test_environment():
+    """Test environment and databases, as Django's own test runner sets up."""
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    yield
+    teardown_databases(old_config, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """An empty cache for each test, e.g. for fresh upload rate buckets."""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def client():
+    """A Django test client."""
+    from django.test import Client
+
+    return Client()
+
+
+@pytest.fixture
+def make_image():
+    """Makes the bytes of an image file, noisy so it doesn't compress away."""
+    from io import BytesIO
+
+    from PIL import Image
+
+    def make_image(size=(64, 48), image_format="PNG", mode="RGB", **save_kwargs):
+        image = Image.frombytes(
+            mode,
+            size,
+            os.urandom(size[0] * size[1] * len(mode)),
+        )
+        stream = BytesIO()
+        image.save(stream, format=image_format, **save_kwargs)
+        return stream.getvalue()
+
+    return make_image
+
+
+@pytest.fixture
+def upload_image(client):
+    """Posts image bytes to the upload view."""
+    from django.core.files.base import ContentFile
+    from django.urls import reverse
+
+    def upload_image(data, name="image.png"):
+        return client.post(
+            reverse("django_blocknote:upload_image"),
+            {"file": ContentFile(data, name=name)},
+        )
+
+    return upload_image
@@ -0,0 +1,9 @@
+"""Models for the test suite."""
+
+from django.db import models
+
+from django_blocknote.models.fields import BlockNoteField
+
+
+class Document(models.Model):
+    content = BlockNoteField(default=list, blank=True)
@@ -0,0 +1,66 @@
+"""Django settings for the test suite."""
+
+import tempfile
+
+SECRET_KEY = "django-blocknote-tests"  # noqa: S105
+
+DEBUG = False
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.staticfiles",
+    "django_blocknote",
+    "tests",
+]
+
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django_blocknote.request_cache.RequestCacheMiddleware",
+]
+
+ROOT_URLCONF = "tests.urls"
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.contrib.auth.context_processors.auth",
+            ],
+        },
+    },
+]
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="djbn_media_")
+MEDIA_URL = "/media/"
+STATIC_URL = "/static/"
+
+USE_TZ = True
+
+DJ_BN_CHUNKED_UPLOAD_DIR = tempfile.mkdtemp(prefix="djbn_chunks_")
@@ -0,0 +1,5 @@
+from django.urls import include, path
+
+urlpatterns = [
+    path("django-blocknote/", include("django_blocknote.urls")),
+]